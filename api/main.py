@@ -1,5 +1,8 @@
 from fastapi import FastAPI, Query, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field
+from typing import List, Optional
 import sys
 import os
 import time
@@ -13,7 +16,7 @@ print("STARTING API")
 print(f"Current directory: {os.getcwd()}")
 print(f"Python version: {sys.version}")
 print(f"Cache exists: {os.path.exists('cache')}")
-print(f"BM25 exists: {os.path.exists('cache/bm25_index.pkl')}")
+print(f"BM25 exists: {os.path.exists('cache/bm25_index/manifest.json')}")
 print("=" * 80)
 
 # Add project root to path
@@ -22,6 +25,8 @@ if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
 from models.hybrid_search_engine import HybridSearchEngine
+from models.product_filter import ProductFilter
+from models.warmup import Warmup
 
 # ============================================================================
 # LOGGING SETUP
@@ -125,6 +130,17 @@ app.add_middleware(
 # Initialize search engine
 logger.info("Loading search engine...")
 engine = HybridSearchEngine()
+
+# Warm the models before serving, then replay the most frequent logged
+# queries into the caches in the background (WARMUP_QUERIES=0 disables replay)
+warmup = Warmup(
+    engine, "logs/queries.db",
+    max_queries=int(os.getenv("WARMUP_QUERIES", "500")),
+    budget=float(os.getenv("WARMUP_BUDGET_SECONDS", "60")),
+    rerank=os.getenv("WARMUP_RERANK", "true").lower() == "true",
+)
+warmup.warm_models()
+warmup.start()
 logger.info("API ready!")
 
 # In-memory metrics
@@ -145,9 +161,11 @@ def root():
         "version": "1.0.0",
         "endpoints": {
             "/search": "Main search",
+            "/search/batch": "Many queries in one request (POST)",
             "/health": "Health check",
             "/stats": "API statistics",
-            "/cache-stats": "Cache info"
+            "/cache-stats": "Cache info",
+            "/index/products": "Add / update (POST) or delete (DELETE) products in the BM25 index"
         }
     }
 
@@ -160,11 +178,12 @@ def health():
             "status": "healthy",
             "qdrant": "connected",
             "total_products": info.points_count,
-            "models": "loaded"
+            "models": "loaded",
+            "warmup": warmup.progress()
         }
     except Exception as e:
         logger.error(f"Health check failed: {e}")
-        return {"status": "unhealthy", "error": str(e)}
+        return {"status": "unhealthy", "error": str(e), "warmup": warmup.progress()}
 
 @app.get("/stats")
 def get_stats():
@@ -176,13 +195,56 @@ def get_stats():
         "total_searches": metrics["total_searches"],
         "avg_response_time": round(avg_time, 3),
         "cache_hits": metrics["cache_hits"],
-        "cache_hit_rate": round(cache_rate, 3)
+        "cache_hit_rate": round(cache_rate, 3),
+        "embedding_batches": engine.embedding_batcher.stats(),
+        "rerank_batches": engine.rerank_batcher.stats(),
+        "adaptive_retrieval": engine.get_adaptive_stats()
     }
 
 @app.get("/cache-stats")
 def cache_stats():
     return engine.get_cache_stats()
 
+# ============================================================================
+# INCREMENTAL INDEXING
+# ============================================================================
+
+class ProductDocument(BaseModel):
+    product_id: str
+    title: str = ""
+    abstracted_summary: str = ""
+    description: str = ""
+    point_id: Optional[int] = None  # numeric Qdrant ID, if the point is uploaded
+
+
+@app.post("/index/products")
+def index_products(products: List[ProductDocument]):
+    """Add or replace products in the BM25 index (searchable immediately; single API process only)"""
+    try:
+        indexed = engine.add_products([p.dict() for p in products])
+        logger.info(f"Indexed {indexed} products")
+        return {"indexed": indexed, "bm25": engine.bm25.stats()}
+    except RuntimeError as e:
+        logger.warning(f"Indexing refused: {e}")
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        logger.error(f"Indexing failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.delete("/index/products/{product_id}")
+def delete_product(product_id: str):
+    """Remove a product from the BM25 index (single API process only)"""
+    try:
+        deleted = engine.delete_products([product_id])
+    except RuntimeError as e:
+        logger.warning(f"Delete refused: {e}")
+        raise HTTPException(status_code=409, detail=str(e))
+    if not deleted:
+        raise HTTPException(status_code=404, detail=f"{product_id} is not indexed")
+    logger.info(f"Deleted {product_id} from the index")
+    return {"deleted": product_id, "bm25": engine.bm25.stats()}
+
 @app.get("/query-logs")
 def get_query_logs(limit: int = Query(1000, ge=1, le=5000)):
     """Get recent query logs from database"""
@@ -233,44 +295,62 @@ def get_query_logs(limit: int = Query(1000, ge=1, le=5000)):
             "error": str(e)
         }
 
+def build_filter(min_price=None, max_price=None, brands=None, min_rating=None, min_reviews=None, category=None):
+    """ ProductFilter from request parameters; 400 / 422 when it cannot be served """
+    product_filter = ProductFilter(min_price=min_price, max_price=max_price, brands=brands,
+                                   min_rating=min_rating, min_reviews=min_reviews, category=category)
+    if product_filter.is_empty:
+        return None
+    if min_price is not None and max_price is not None and min_price > max_price:
+        raise HTTPException(status_code=422, detail="min_price is greater than max_price")
+    if engine.filter_index is None:
+        raise HTTPException(status_code=400, detail="Filters need the local payload store (cache/payload_store)")
+    return product_filter
+
+
+def rerank_cache_report(stats):
+    """ Reranker score cache use of one query (None when no pair was scored) """
+    if not stats:
+        return None
+    return {**stats, "hit_rate": round(stats["cached"] / stats["pairs"], 3)}
+
+
 @app.get("/search")
-def search(
+async def search(
     query: str = Query(..., min_length=2),
     top_k: int = Query(3, ge=1, le=10),
-    use_reranker: bool = Query(True)
+    use_reranker: bool = Query(True),
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    brand: Optional[List[str]] = Query(None),
+    min_rating: Optional[float] = Query(None, ge=0, le=5),
+    min_reviews: Optional[int] = Query(None, ge=0),
+    category: Optional[str] = Query(None, min_length=2)
 ):
-    logger.info(f"Search: '{query}' | top_k={top_k} | reranker={use_reranker}")
+    product_filter = build_filter(min_price, max_price, brand, min_rating, min_reviews, category)
+    logger.info(f"Search: '{query}' | top_k={top_k} | reranker={use_reranker}"
+                + (f" | filters={product_filter.key}" if product_filter else ""))
     
     overall_start = time.time()
-    latency = {}
+    # Stages served from cache stay at 0
+    latency = {'embedding': 0, 'dense': 0, 'bm25': 0, 'fusion': 0}
     
     try:
-        cache_key = f"{query}_{20}_{0.65}"
-        was_cached = cache_key in engine._hybrid_cache
+        was_cached = engine.hybrid_cache_key(query, filters=product_filter) in engine._hybrid_cache
         
         if was_cached:
             metrics["cache_hits"] += 1
         
-        # Track components
-        emb_start = time.time()
-        _ = engine.get_embedding(query)
-        latency['embedding'] = time.time() - emb_start
-        
-        dense_start = time.time()
-        _ = engine.dense_search(query, 50)
-        latency['dense'] = time.time() - dense_start
-        
-        bm25_start = time.time()
-        _ = engine.bm25_search(query, 50)
-        latency['bm25'] = time.time() - bm25_start
-        
-        fusion_start = time.time()
-        candidates = engine.hybrid_search(query, top_k=20, alpha=0.65)
-        latency['fusion'] = time.time() - fusion_start
+        # Embedding + dense retrieval and BM25 run concurrently;
+        # the engine records each stage's time in latency
+        candidates = await engine.hybrid_search_async(query, top_k=20, alpha=0.65, timings=latency,
+                                                      filters=product_filter)
         
+        # Pairs scored by the reranker and how many came from its score cache
+        rerank_stats = {}
         if use_reranker:
             rerank_start = time.time()
-            results = engine.rerank(query, candidates, top_k=top_k)
+            results = await run_in_threadpool(engine.rerank, query, candidates, top_k, product_filter, rerank_stats)
             latency['reranker'] = time.time() - rerank_start
         else:
             results = candidates[:top_k]
@@ -283,7 +363,7 @@ def search(
         metrics["total_time"] += elapsed
         
         # Log to database
-        log_query(query, len(results), elapsed, was_cached, latency, use_reranker)
+        await run_in_threadpool(log_query, query, len(results), elapsed, was_cached, latency, use_reranker)
         
         logger.info(f"Search completed in {elapsed:.3f}s")
         
@@ -292,7 +372,9 @@ def search(
             "num_results": len(results),
             "response_time": round(elapsed, 3),
             "cached": was_cached,
+            "filters": product_filter.key if product_filter else None,
             "latency_breakdown_ms": {k: round(v * 1000, 1) for k, v in latency.items()},
+            "rerank_cache": rerank_cache_report(rerank_stats),
             "results": results
         }
         
@@ -300,6 +382,74 @@ def search(
         logger.error(f"Search failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+class BatchSearchRequest(BaseModel):
+    queries: List[str] = Field(..., min_length=1, max_length=1000)
+    top_k: int = Field(3, ge=1, le=10)
+    use_reranker: bool = True
+    # Filters (same as /search), applied to every query
+    min_price: Optional[float] = Field(None, ge=0)
+    max_price: Optional[float] = Field(None, ge=0)
+    brand: Optional[List[str]] = None
+    min_rating: Optional[float] = Field(None, ge=0, le=5)
+    min_reviews: Optional[int] = Field(None, ge=0)
+    category: Optional[str] = Field(None, min_length=2)
+
+
+@app.post("/search/batch")
+def search_batch(request: BatchSearchRequest):
+    """
+    Search many queries at once: each pipeline stage runs once for the whole
+    batch. Per-query latency_breakdown_ms attributes each batched stage's time
+    to the queries that used it.
+    """
+    short = [q for q in request.queries if len(q) < 2]
+    if short:
+        raise HTTPException(status_code=422, detail=f"Queries must have at least 2 characters: {short[:5]}")
+    product_filter = build_filter(request.min_price, request.max_price, request.brand,
+                                  request.min_rating, request.min_reviews, request.category)
+
+    logger.info(f"Batch search: {len(request.queries)} queries | top_k={request.top_k} | "
+                f"reranker={request.use_reranker}")
+    overall_start = time.time()
+
+    try:
+        cached = [engine.hybrid_cache_key(q, filters=product_filter) in engine._hybrid_cache
+                  for q in request.queries]
+        rerank_stats = {}
+        results, timings = engine.search_batch(request.queries, top_k=request.top_k,
+                                               use_reranker=request.use_reranker, filters=product_filter,
+                                               rerank_stats=rerank_stats)
+        elapsed = time.time() - overall_start
+
+        metrics["total_searches"] += len(request.queries)
+        metrics["total_time"] += elapsed
+        metrics["cache_hits"] += sum(cached)
+
+        for query, found, latency, was_cached in zip(request.queries, results, timings, cached):
+            log_query(query, len(found), sum(latency.values()), was_cached, latency, request.use_reranker)
+
+        logger.info(f"Batch search completed in {elapsed:.3f}s")
+
+        return {
+            "num_queries": len(request.queries),
+            "response_time": round(elapsed, 3),
+            "results": [
+                {
+                    "query": query,
+                    "num_results": len(found),
+                    "cached": was_cached,
+                    "latency_breakdown_ms": {k: round(v * 1000, 1) for k, v in latency.items()},
+                    "rerank_cache": rerank_cache_report(rerank_stats.get(query, {})),
+                    "results": found,
+                }
+                for query, found, latency, was_cached in zip(request.queries, results, timings, cached)
+            ],
+        }
+
+    except Exception as e:
+        logger.error(f"Batch search failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000, log_level="info")
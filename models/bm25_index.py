@@ -0,0 +1,628 @@
+"""
+BM25 INVERTED INDEX MODULE
+Native BM25 (Okapi) keyword scoring over a CSR posting-list matrix
+Includes:
+- Posting lists per term (doc indices + precomputed BM25 term weights)
+- Query scoring that only visits the postings of the query terms
+- argpartition top-k selection instead of a full argsort
+- Block-Max WAND style dynamic pruning over doc-range blocks (exact top-k)
+- Versioned on-disk format (flat .npy arrays + manifest) opened memory-mapped
+Scores are identical to rank_bm25.BM25Okapi built on the same corpus.
+"""
+
+import os
+import json
+import math
+import shutil
+import uuid
+from datetime import datetime
+import numpy as np
+
+from models.vocabulary import Vocabulary
+from models.text_analyzer import TextAnalyzer
+
+INDEX_FORMAT = "bm25-csr"
+INDEX_FORMAT_VERSION = 3
+INDEX_FILES = (
+    "indptr", "doc_ids", "tfs", "weights", "doc_len", "idf", "product_ids",
+    "block_indptr", "block_range", "block_start", "block_max",
+)
+
+# Documents per pruning block (doc-range partition shared by every term).
+# Small blocks keep block-max bounds tight; scripts/benchmark_bm25.py measured
+# 16 against 8-128 (8 loses to per-range bookkeeping, 64+ to loose bounds).
+DEFAULT_BLOCK_SIZE = 16
+
+SEARCH_MODES = ("exhaustive", "bmw", "auto")
+
+# "auto" prunes from this many postings on (indexes with DEFAULT_BLOCK_SIZE
+# blocks only). Crossover in scripts/benchmark_bm25.py: ~45k postings at 300k
+# docs, ~110k at 1M docs, never reached at 31k docs.
+AUTO_PRUNING_MIN_POSTINGS = 100_000
+
+# Block-Max WAND schedule: postings scored by the first batch of ranges (doubled
+# per batch), and the share of a query's postings that may still need scoring
+# once a threshold exists before the search falls back to exhaustive scoring
+BMW_FIRST_POSTINGS = 16_384
+BMW_FALLBACK_FRACTION = 0.5
+
+
+def expand_ranges(starts, ends):
+    """ Concatenation of arange(start, end) for every interval, vectorized """
+    lengths = ends - starts
+    total = int(lengths.sum())
+    if total == 0:
+        return np.empty(0, dtype=np.int64)
+    shifts = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    return shifts + np.arange(total)
+
+
+def group_ids(values):
+    """
+    Sorted distinct values and, for every input element, the index of its
+    value in that array (np.unique(return_inverse=True) via a plain sort).
+    """
+    order = np.argsort(values, kind="stable")
+    ordered = values[order]
+    first = np.empty(len(ordered), dtype=bool)
+    first[:1] = True
+    np.not_equal(ordered[1:], ordered[:-1], out=first[1:])
+
+    inverse = np.empty(len(values), dtype=np.int64)
+    inverse[order] = np.cumsum(first) - 1
+    return ordered[first], inverse
+
+
+def select_top_k(doc_idx, scores, top_k):
+    """
+    Return (doc_idx, scores) of the top_k highest scores, sorted descending.
+    Ties are broken by ascending doc index so the result is deterministic.
+    """
+    if top_k <= 0 or len(scores) == 0:
+        return doc_idx[:0], scores[:0]
+
+    if len(scores) > top_k:
+        kth = np.partition(scores, len(scores) - top_k)[len(scores) - top_k]
+        keep = np.flatnonzero(scores >= kth)
+        doc_idx, scores = doc_idx[keep], scores[keep]
+
+    order = np.lexsort((doc_idx, -scores))[:top_k]
+    return doc_idx[order], scores[order]
+
+
+def okapi_idf(df, num_docs, epsilon):
+    """
+    IDF exactly as rank_bm25.BM25Okapi computes it: negative values are
+    floored to epsilon * average_idf (averaged in vocabulary order).
+    """
+    unique_df, inverse = np.unique(df, return_inverse=True)
+    values = np.array(
+        [math.log(num_docs - f + 0.5) - math.log(f + 0.5) for f in unique_df.tolist()],
+        dtype=np.float64,
+    )
+    idf = values[inverse.reshape(-1)]
+
+    if len(idf):
+        # Sequential sum in vocabulary order, same as BM25Okapi's loop
+        average_idf = np.cumsum(idf)[-1] / len(idf)
+        idf[idf < 0] = epsilon * average_idf
+
+    return idf
+
+
+class BM25Index:
+    """
+    BM25 index stored as a CSR matrix (term -> postings).
+
+    Row t of the matrix lives in doc_ids[indptr[t]:indptr[t + 1]] with the
+    matching term frequencies and precomputed BM25 weights, sorted by doc index.
+    vocab is a dict while building and a Vocabulary once saved / loaded.
+    analyzer (optional) is the TextAnalyzer the index was built with; it is
+    stored in the manifest and reattached to the vocabulary on load.
+
+    For pruning, documents are partitioned into ranges of block_size doc ids.
+    Every term's postings are split at range boundaries into blocks:
+    blocks of term t are block_indptr[t]:block_indptr[t + 1], block i covers
+    range block_range[i], postings block_start[i]:block_start[i + 1], and its
+    largest weight is block_max[i].
+    """
+
+    def __init__(self, vocab, indptr, doc_ids, tfs, weights, doc_len, idf,
+                 product_ids, k1=1.5, b=0.75, epsilon=0.25, avgdl=None, index_id=None,
+                 blocks=None, block_size=DEFAULT_BLOCK_SIZE, analyzer=None):
+        self.vocab = vocab
+        self.indptr = indptr
+        self.doc_ids = doc_ids
+        self.tfs = tfs
+        self.weights = weights
+        self.doc_len = doc_len
+        self.idf = idf
+
+        # Fixed-width bytes so the table can be memory-mapped
+        if not isinstance(product_ids, np.ndarray):
+            product_ids = np.array([str(p).encode("utf-8") for p in product_ids], dtype=np.bytes_)
+        self.product_ids = product_ids
+
+        self.k1 = k1
+        self.b = b
+        self.epsilon = epsilon
+        self.avgdl = avgdl
+        self.index_id = index_id or uuid.uuid4().hex
+        self.analyzer = analyzer
+
+        self.num_docs = len(doc_len)
+        self.num_terms = len(indptr) - 1
+
+        self.block_size = block_size
+        self.num_ranges = -(-self.num_docs // block_size)
+        if blocks is None:
+            blocks = self._build_blocks()
+        self.block_indptr, self.block_range, self.block_start, self.block_max = blocks
+
+        # Pruning bounds are only valid when no posting lowers a score
+        self.prunable = len(self.weights) == 0 or float(np.min(self.weights)) >= 0
+
+    # BUILDERS
+    @classmethod
+    def from_corpus(cls, corpus, product_ids, k1=1.5, b=0.75, epsilon=0.25, analyzer=None):
+        """
+        Build from tokenized documents (same input as BM25Okapi).
+
+        With an analyzer, its frozen vocabulary (fitted here if needed) maps
+        tokens to term ids and rare terms it pruned are skipped; document
+        lengths still count every analyzed token.
+        """
+        if analyzer is None:
+            vocab = {}
+            term_ids = []
+            doc_ptr = [0]
+            for tokens in corpus:
+                for token in tokens:
+                    # First-seen order, same as BM25Okapi's vocabulary
+                    term_ids.append(vocab.setdefault(token, len(vocab)))
+                doc_ptr.append(len(term_ids))
+            doc_len = None
+        else:
+            vocab = analyzer.vocabulary if analyzer.vocabulary is not None else analyzer.fit(corpus)
+            term_ids = []
+            doc_ptr = [0]
+            doc_len = []
+            for tokens in corpus:
+                term_ids.extend(analyzer.encode(tokens))
+                doc_ptr.append(len(term_ids))
+                doc_len.append(len(tokens))
+            doc_len = np.asarray(doc_len, dtype=np.int64)
+
+        return cls.from_term_ids(
+            np.asarray(doc_ptr, dtype=np.int64),
+            np.asarray(term_ids, dtype=np.int64),
+            vocab, product_ids, k1=k1, b=b, epsilon=epsilon,
+            doc_len=doc_len, analyzer=analyzer,
+        )
+
+    @classmethod
+    def from_term_ids(cls, doc_ptr, term_ids, vocab, product_ids,
+                      k1=1.5, b=0.75, epsilon=0.25, doc_len=None, analyzer=None):
+        """
+        Vectorized build from a flat token stream.
+
+        doc_ptr: document boundaries into term_ids (len = num_docs + 1)
+        term_ids: integer term id of every token, documents concatenated
+        doc_len: BM25 document lengths (default: tokens per document)
+        """
+        num_docs = len(doc_ptr) - 1
+        num_terms = len(vocab)
+        tokens_per_doc = np.diff(doc_ptr)
+        if doc_len is None:
+            doc_len = tokens_per_doc
+
+        # One key per (term, doc) pair, sorted by term then doc
+        doc_of_token = np.repeat(np.arange(num_docs, dtype=np.int64), tokens_per_doc)
+        keys, tf = np.unique(term_ids * num_docs + doc_of_token, return_counts=True)
+
+        return cls.from_postings(
+            keys // num_docs, keys % num_docs, tf, doc_len, vocab, product_ids,
+            k1=k1, b=b, epsilon=epsilon, analyzer=analyzer,
+        )
+
+    @classmethod
+    def from_bm25okapi(cls, bm25, product_ids):
+        """ Convert an existing rank_bm25.BM25Okapi object (reuses its idf table) """
+        vocab = {term: i for i, term in enumerate(bm25.idf)}
+        idf = np.fromiter(bm25.idf.values(), dtype=np.float64, count=len(vocab))
+
+        post_term, post_doc, tf = [], [], []
+        for doc, freqs in enumerate(bm25.doc_freqs):
+            for term, freq in freqs.items():
+                post_term.append(vocab[term])
+                post_doc.append(doc)
+                tf.append(freq)
+
+        post_term = np.asarray(post_term, dtype=np.int64)
+        post_doc = np.asarray(post_doc, dtype=np.int64)
+        tf = np.asarray(tf, dtype=np.int64)
+
+        order = np.lexsort((post_doc, post_term))
+
+        return cls.from_postings(
+            post_term[order], post_doc[order], tf[order],
+            np.asarray(bm25.doc_len, dtype=np.int64), vocab, product_ids,
+            k1=bm25.k1, b=bm25.b, epsilon=bm25.epsilon, idf=idf, avgdl=bm25.avgdl,
+        )
+
+    @classmethod
+    def from_postings(cls, post_term, post_doc, tf, doc_len, vocab, product_ids,
+                      k1=1.5, b=0.75, epsilon=0.25, idf=None, avgdl=None, analyzer=None):
+        """
+        Build from (term, doc, tf) postings sorted by term then doc.
+
+        idf / avgdl default to this collection's own statistics; pass them in
+        to score against frozen statistics (incremental segments).
+        """
+        num_docs = len(doc_len)
+        num_terms = len(vocab)
+        doc_len = np.asarray(doc_len, dtype=np.int64)
+
+        df = np.bincount(post_term, minlength=num_terms)
+        indptr = np.zeros(num_terms + 1, dtype=np.int64)
+        np.cumsum(df, out=indptr[1:])
+
+        if avgdl is None:
+            avgdl = int(doc_len.sum()) / num_docs
+        if idf is None:
+            idf = okapi_idf(df, num_docs, epsilon)
+
+        weights = cls._term_weights(idf[post_term], tf, doc_len[post_doc], k1, b, avgdl)
+
+        return cls(vocab, indptr, np.asarray(post_doc, dtype=np.int32),
+                   np.asarray(tf, dtype=np.int32), weights,
+                   doc_len.astype(np.int32), idf, product_ids,
+                   k1=k1, b=b, epsilon=epsilon, avgdl=avgdl, analyzer=analyzer)
+
+    def postings_table(self):
+        """ Every posting as flat (term, doc, tf) arrays, sorted by term then doc """
+        post_term = np.repeat(np.arange(self.num_terms, dtype=np.int64), np.diff(self.indptr))
+        return post_term, np.asarray(self.doc_ids, dtype=np.int64), np.asarray(self.tfs, dtype=np.int64)
+
+    def _build_blocks(self):
+        """ Split every posting list at doc-range boundaries and record block maxima """
+        num_postings = len(self.doc_ids)
+        if num_postings == 0:
+            return (np.zeros(self.num_terms + 1, dtype=np.int64), np.empty(0, dtype=np.int32),
+                    np.zeros(1, dtype=np.int64), np.empty(0, dtype=np.float64))
+
+        post_term = np.repeat(np.arange(self.num_terms, dtype=np.int64), np.diff(self.indptr))
+        post_range = np.asarray(self.doc_ids, dtype=np.int64) // self.block_size
+
+        keys = post_term * self.num_ranges + post_range
+        starts = np.concatenate([[0], np.flatnonzero(keys[1:] != keys[:-1]) + 1])
+
+        block_max = np.maximum.reduceat(np.asarray(self.weights), starts)
+        block_range = post_range[starts].astype(np.int32)
+        block_start = np.append(starts, num_postings).astype(np.int64)
+
+        block_indptr = np.zeros(self.num_terms + 1, dtype=np.int64)
+        np.cumsum(np.bincount(post_term[starts], minlength=self.num_terms), out=block_indptr[1:])
+
+        return block_indptr, block_range, block_start, block_max
+
+    @staticmethod
+    def _term_weights(idf, tf, doc_len, k1, b, avgdl):
+        """ Per-posting BM25 contribution, same operation order as BM25Okapi.get_scores """
+        return idf * (tf * (k1 + 1) / (tf + k1 * (1 - b + b * doc_len / avgdl)))
+
+    # PERSISTENCE
+    def save(self, path):
+        """
+        Write the index as a directory of flat .npy arrays plus manifest.json.
+        The directory is built next to the target and swapped in at the end,
+        so readers never see a half-written index.
+        """
+        path = path.rstrip("/")
+        tmp_path = f"{path}.tmp-{os.getpid()}"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+
+        for name in INDEX_FILES:
+            np.save(os.path.join(tmp_path, f"{name}.npy"), np.asarray(getattr(self, name)))
+
+        vocab = self.vocab
+        if not isinstance(vocab, Vocabulary):
+            vocab = Vocabulary.from_terms(sorted(vocab, key=vocab.get))
+        vocab.save(tmp_path)
+
+        manifest = {
+            "format": INDEX_FORMAT,
+            "version": INDEX_FORMAT_VERSION,
+            "index_id": self.index_id,
+            "created_at": datetime.now().isoformat(),
+            "num_docs": self.num_docs,
+            "num_terms": self.num_terms,
+            "num_postings": int(len(self.doc_ids)),
+            "k1": self.k1,
+            "b": self.b,
+            "epsilon": self.epsilon,
+            "avgdl": self.avgdl,
+            "block_size": self.block_size,
+            "analyzer": self.analyzer.config() if self.analyzer else None,
+        }
+        # Manifest last: its presence marks a complete index
+        with open(os.path.join(tmp_path, "manifest.json"), "w") as f:
+            json.dump(manifest, f, indent=2)
+
+        old_path = f"{path}.old-{os.getpid()}"
+        if os.path.exists(path):
+            os.rename(path, old_path)
+        os.rename(tmp_path, path)
+        shutil.rmtree(old_path, ignore_errors=True)
+
+    @classmethod
+    def load(cls, path, mmap: bool = True):
+        """
+        Open an index directory. With mmap=True nothing is copied onto the heap:
+        arrays are served from the page cache, which all worker processes share.
+        """
+        with open(os.path.join(path, "manifest.json")) as f:
+            manifest = json.load(f)
+
+        if manifest.get("format") != INDEX_FORMAT:
+            raise ValueError(f"{path} is not a {INDEX_FORMAT} index")
+        if manifest.get("version") != INDEX_FORMAT_VERSION:
+            raise ValueError(
+                f"{path} has index format version {manifest.get('version')}, "
+                f"expected {INDEX_FORMAT_VERSION}. Rebuild it with scripts/create_bm25_index.py"
+            )
+
+        mode = "r" if mmap else None
+        arrays = {
+            name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mode)
+            for name in INDEX_FILES
+        }
+
+        vocab = Vocabulary.load(path, mmap=mmap)
+        analyzer = None
+        if manifest.get("analyzer"):
+            analyzer = TextAnalyzer.from_config(manifest["analyzer"], vocabulary=vocab)
+
+        return cls(
+            vocab,
+            arrays["indptr"], arrays["doc_ids"], arrays["tfs"], arrays["weights"],
+            arrays["doc_len"], arrays["idf"], arrays["product_ids"],
+            k1=manifest["k1"], b=manifest["b"], epsilon=manifest["epsilon"],
+            avgdl=manifest["avgdl"], index_id=manifest["index_id"],
+            blocks=(arrays["block_indptr"], arrays["block_range"],
+                    arrays["block_start"], arrays["block_max"]),
+            block_size=manifest["block_size"], analyzer=analyzer,
+        )
+
+    # QUERYING
+    def product_id(self, doc_idx) -> str:
+        return self.product_ids[doc_idx].decode("utf-8")
+
+    def product_ids_of(self, doc_idx):
+        """ product_id of every doc index, in order (one gather for the whole array) """
+        return [p.decode("utf-8") for p in np.asarray(self.product_ids[doc_idx]).tolist()]
+
+    def lookup(self, tokens):
+        """ Map query tokens to term ids (unknown tokens are dropped, duplicates kept) """
+        term_ids = [self.vocab.get(t) for t in tokens]
+        return [t for t in term_ids if t is not None]
+
+    def postings(self, term_id):
+        """ (doc indices, weights) of one term """
+        start, end = self.indptr[term_id], self.indptr[term_id + 1]
+        return self.doc_ids[start:end], self.weights[start:end]
+
+    def get_scores(self, tokens):
+        """ Score vector over every document (same contract as BM25Okapi.get_scores) """
+        scores = np.zeros(self.num_docs)
+        for term_id in self.lookup(tokens):
+            docs, weights = self.postings(term_id)
+            scores[docs] += weights
+        return scores
+
+    def search(self, tokens, top_k: int = 50, mode: str = "exhaustive", mask=None):
+        """
+        Top-k documents for a query.
+        Returns (doc indices, scores) sorted by descending score; only documents
+        that contain at least one query term are returned.
+
+        mode="exhaustive" scores every posting of the query terms.
+        mode="bmw" skips doc ranges whose block-max upper bound cannot reach the
+        current top-k threshold; it returns exactly the same top-k.
+        mode="auto" uses bmw only for queries with many postings (it wins from
+        AUTO_PRUNING_MIN_POSTINGS on and loses below).
+
+        mask: optional boolean array over documents; only documents where it is
+        True can be returned (applied before top-k selection).
+        """
+        return self.search_terms(self.lookup(tokens), top_k, mode, mask)
+
+    def search_terms(self, term_ids, top_k: int = 50, mode: str = "exhaustive", mask=None):
+        """ Same as search() for query terms already mapped to term ids """
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode '{mode}', expected one of {SEARCH_MODES}")
+
+        if not term_ids:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float64)
+
+        if mode == "auto":
+            heavy = self.postings_touched(term_ids) >= AUTO_PRUNING_MIN_POSTINGS
+            mode = "bmw" if heavy and self.block_size <= DEFAULT_BLOCK_SIZE else "exhaustive"
+
+        if mode == "bmw" and self.prunable:
+            return self._search_block_max(term_ids, top_k, mask)
+        return self._search_exhaustive(term_ids, top_k, mask)
+
+    def _search_exhaustive(self, term_ids, top_k, mask=None):
+        """ Score every posting of the query terms """
+        parts = [self.postings(t) for t in term_ids]
+        docs = np.concatenate([p[0] for p in parts])
+        contribs = np.concatenate([p[1] for p in parts])
+
+        candidates, scores = self._accumulate(docs, contribs)
+        if mask is not None:
+            keep = mask[candidates]
+            candidates, scores = candidates[keep], scores[keep]
+        return select_top_k(candidates, scores, top_k)
+
+    def search_batch(self, queries, top_k: int = 50, mode: str = "exhaustive", mask=None):
+        """
+        search_terms() for many queries (lists of term ids), one at a time.
+        A single sparse product over the batch was measured slower than this
+        loop (scripts/benchmark_bm25.py), and the loop keeps bmw / auto.
+        Returns a list of (doc indices, scores), one per query.
+        """
+        return [self.search_terms(q, top_k, mode, mask) for q in queries]
+
+    def _accumulate(self, docs, contribs):
+        """
+        Sum contributions per document.
+        bincount adds in input order (query term order), like BM25Okapi, so the
+        sums are bit-identical whichever path produced the postings.
+        """
+        if len(docs) * 8 < self.num_docs:
+            candidates, inverse = group_ids(docs)
+            scores = np.bincount(inverse, weights=contribs)
+        else:
+            scores = np.bincount(docs, weights=contribs, minlength=self.num_docs)
+            candidates = np.flatnonzero(np.bincount(docs, minlength=self.num_docs))
+            scores = scores[candidates]
+
+        return candidates.astype(np.int32), scores
+
+    def _search_block_max(self, term_ids, top_k, mask=None):
+        """
+        Block-Max WAND over doc-range blocks.
+
+        Per-block bound: the upper bound of a doc range is the sum of each query
+        term's block maximum in that range. Ranges are scored best-bound first
+        in batches of BMW_FIRST_POSTINGS postings, doubled per batch. Once k
+        documents are found, only ranges whose bound reaches the current k-th
+        best score are left, and the first range below it ends the search.
+        When those ranges still hold more than BMW_FALLBACK_FRACTION of the
+        query's postings, pruning cannot repay its overhead and the query is
+        scored exhaustively instead.
+
+        Per-term bound: once a threshold exists, terms whose maxima together
+        stay below it are non-essential: a document that has none of the
+        essential terms cannot reach the top-k, so it is not a candidate.
+
+        Bounds are summed in query term order, so float rounding keeps every
+        score <= its bound and the top-k matches the exhaustive mode exactly.
+        """
+        upper = np.zeros(self.num_ranges)
+        size = np.zeros(self.num_ranges, dtype=np.int64)
+        term_blocks = []
+        term_max = []
+
+        for t in term_ids:
+            bs, be = self.block_indptr[t], self.block_indptr[t + 1]
+            ranges = self.block_range[bs:be]
+            upper[ranges] += self.block_max[bs:be]
+            size[ranges] += np.diff(self.block_start[bs:be + 1])
+            term_blocks.append((bs, ranges))
+            term_max.append(float(self.block_max[bs:be].max(initial=0.0)))
+
+        order = np.flatnonzero(size)
+        order = order[np.argsort(-upper[order])]
+        # Postings scored once the ranges order[:i + 1] are done
+        scanned = np.cumsum(size[order])
+
+        best_docs = np.empty(0, dtype=np.int32)
+        best_scores = np.empty(0, dtype=np.float64)
+        threshold = -np.inf
+        essential = [True] * len(term_ids)
+
+        pos, budget = 0, BMW_FIRST_POSTINGS
+        while pos < len(order):
+            done = int(scanned[pos - 1]) if pos else 0
+            end = len(order)
+            if len(best_scores) >= top_k:
+                # order is sorted by bound, so the survivors are a prefix
+                end = pos + int(np.searchsorted(-upper[order[pos:]], -threshold, "right"))
+                if end == pos:
+                    break
+                if scanned[end - 1] - done > BMW_FALLBACK_FRACTION * scanned[-1]:
+                    return self._search_exhaustive(term_ids, top_k, mask)
+                essential = self._essential_terms(term_max, threshold)
+
+            stop = min(end, pos + 1 + int(np.searchsorted(scanned[pos:], done + budget, "right")))
+            chunk = order[pos:stop]
+            pos = stop
+            budget *= 2
+
+            candidates, scores = self._score_ranges(np.sort(chunk), term_blocks, essential)
+            if mask is not None:
+                keep = mask[candidates]
+                candidates, scores = candidates[keep], scores[keep]
+            best_docs, best_scores = select_top_k(
+                np.concatenate([best_docs, candidates]),
+                np.concatenate([best_scores, scores]),
+                top_k,
+            )
+            if len(best_scores) >= top_k:
+                threshold = best_scores[-1]
+
+        return best_docs, best_scores
+
+    @staticmethod
+    def _essential_terms(term_max, threshold):
+        """
+        MaxScore split: grow the non-essential set from the smallest per-term
+        bound while the sum of its bounds stays strictly below the threshold.
+        """
+        non_essential = [False] * len(term_max)
+
+        for i in np.argsort(term_max, kind="stable"):
+            non_essential[i] = True
+            bound = 0.0
+            for j, m in enumerate(term_max):
+                if non_essential[j]:
+                    bound += m
+            if not bound < threshold:
+                non_essential[i] = False
+                break
+
+        return [not ne for ne in non_essential]
+
+    def _score_ranges(self, chunk, term_blocks, essential):
+        """
+        Exact scores of every doc in the given (sorted) ranges that has an
+        essential term. Postings are summed in a (ranges x block_size) scratch
+        array: doc d of range chunk[i] sits at i * block_size + d % block_size.
+        """
+        width = len(chunk) * self.block_size
+        shift = (np.arange(len(chunk)) - chunk) * self.block_size
+
+        slots, contribs = [], []
+        is_candidate = np.zeros(width, dtype=bool)
+        for i, (bs, ranges) in enumerate(term_blocks):
+            if len(ranges) == 0:
+                continue
+            # Blocks of this term that fall in the chunk's ranges
+            hit = np.searchsorted(ranges, chunk)
+            hit[hit == len(ranges)] = 0
+            at = np.flatnonzero(ranges[hit] == chunk)
+            blocks = bs + hit[at]
+            starts, ends = self.block_start[blocks], self.block_start[blocks + 1]
+            idx = expand_ranges(starts, ends)
+
+            slot = self.doc_ids[idx] + np.repeat(shift[at], ends - starts)
+            slots.append(slot)
+            contribs.append(self.weights[idx])
+            if essential[i]:
+                is_candidate[slot] = True
+
+        candidates = np.flatnonzero(is_candidate)
+        if len(candidates) == 0:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float64)
+
+        # bincount adds in query term order, so sums match the exhaustive path
+        scores = np.bincount(np.concatenate(slots), weights=np.concatenate(contribs), minlength=width)
+        docs = candidates - shift[candidates // self.block_size]
+        return docs.astype(np.int32), scores[candidates]
+
+    def postings_touched(self, term_ids):
+        """ Number of postings an exhaustive query over these term ids visits """
+        return int(sum(self.indptr[t + 1] - self.indptr[t] for t in term_ids))
@@ -0,0 +1,665 @@
+"""
+SEGMENTED BM25 INDEX MODULE
+Incremental keyword index built from BM25Index segments
+Includes:
+- Base segment (built by scripts/create_bm25_index.py) + immutable flushed segments
+- In-memory write segment: added products are searchable immediately
+- Tombstones for deleted and replaced products
+- Background thread that flushes the write segment and merges segments
+- Registration of the processes that have the directory open, so writes and
+  merges are refused while it is shared
+The vocabulary and collection statistics (N, avgdl, idf) are frozen at base
+build. Weights precomputed in different segments therefore stay comparable,
+and base scores never change. Terms missing from the frozen vocabulary are not
+indexed until the next full rebuild. The write segment and tombstones live in
+the writing process: other processes with the same directory open (API
+workers) would not see them, so writes need the directory to themselves.
+"""
+
+import os
+import json
+import math
+import time
+import shutil
+import uuid
+import fcntl
+import threading
+import numpy as np
+
+from models.bm25_index import BM25Index, select_top_k
+
+SEGMENTS_DIR = "segments"
+SEGMENTS_FILE = "segments.json"
+SEGMENTS_VERSION = 1
+BASE_SEGMENT = "base"
+# segments/.open/<pid>.<session>.lock, flock-ed while a process has the index open
+OPEN_DIR = ".open"
+
+
+class WriteSegment:
+    """ Small mutable in-memory segment, scored exhaustively """
+
+    def __init__(self, base):
+        self.base = base
+        self.product_ids = []
+        self.doc_terms = []
+        self.doc_len = []
+        self.deleted = []
+        self.postings = {}
+        self.created_at = time.time()
+
+    def __len__(self):
+        return len(self.product_ids)
+
+    def add(self, product_id, term_ids, doc_len):
+        doc = len(self.product_ids)
+        tf = {}
+        for t in term_ids:
+            tf[t] = tf.get(t, 0) + 1
+
+        self.product_ids.append(product_id)
+        self.doc_terms.append(tf)
+        self.doc_len.append(doc_len)
+        self.deleted.append(False)
+
+        base = self.base
+        for t, freq in tf.items():
+            weight = BM25Index._term_weights(base.idf[t], freq, doc_len, base.k1, base.b, base.avgdl)
+            self.postings.setdefault(t, []).append((doc, float(weight)))
+
+        return doc
+
+    def search_terms(self, term_ids):
+        """ (local docs, scores) of live documents, summed in query term order """
+        scores = {}
+        for t in term_ids:
+            for doc, weight in self.postings.get(t, ()):
+                scores[doc] = scores.get(doc, 0.0) + weight
+
+        docs = [d for d in scores if not self.deleted[d]]
+        return (np.array(docs, dtype=np.int32),
+                np.array([scores[d] for d in docs], dtype=np.float64))
+
+    def product_ids_of(self, docs):
+        return [self.product_ids[d] for d in docs]
+
+    def live_docs(self):
+        return [d for d in range(len(self)) if not self.deleted[d]]
+
+    def to_segment(self):
+        """ Freeze the live documents into a BM25Index scored with the base statistics """
+        docs = self.live_docs()
+
+        post_term, post_doc, tf = [], [], []
+        for new_doc, doc in enumerate(docs):
+            for t, freq in self.doc_terms[doc].items():
+                post_term.append(t)
+                post_doc.append(new_doc)
+                tf.append(freq)
+
+        post_term = np.asarray(post_term, dtype=np.int64)
+        post_doc = np.asarray(post_doc, dtype=np.int64)
+        tf = np.asarray(tf, dtype=np.int64)
+        order = np.lexsort((post_doc, post_term))
+
+        base = self.base
+        segment = BM25Index.from_postings(
+            post_term[order], post_doc[order], tf[order],
+            [self.doc_len[d] for d in docs], base.vocab,
+            [self.product_ids[d] for d in docs],
+            k1=base.k1, b=base.b, epsilon=base.epsilon,
+            idf=base.idf, avgdl=base.avgdl, analyzer=base.analyzer,
+        )
+        return segment, docs
+
+
+class SegmentedBM25Index:
+    """
+    Keyword index made of immutable segments plus a write segment.
+
+    Segments are (name, BM25Index, live mask). The segment list is replaced,
+    never mutated, so searches work on a consistent snapshot while flushes
+    and merges run in the background.
+    """
+
+    def __init__(self, path, base, segments, flush_docs=1000, flush_interval=5.0,
+                 merge_factor=8, expunge_ratio=0.3):
+        self.path = path
+        self.base = base
+        self.analyzer = base.analyzer
+        self.index_id = base.index_id
+
+        self.flush_docs = flush_docs
+        self.flush_interval = flush_interval
+        self.merge_factor = merge_factor
+        self.expunge_ratio = expunge_ratio
+
+        self._segments = segments
+        self._write = WriteSegment(base)
+        self._flushing = []
+        self._locations = None
+        self._dirty = False
+        self._generation = 0
+        # Version of the search results: the committed state this process
+        # opened, or a process-local id once it has applied updates
+        self._state_id = BASE_SEGMENT
+        self._session = uuid.uuid4().hex[:12]
+        self._updates = 0
+
+        self._lock = threading.RLock()
+        self._maintenance_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._open_file = None
+
+        self.flushes = 0
+        self.merges = 0
+
+    # OPEN
+    @classmethod
+    def open(cls, path, mmap: bool = True, background: bool = True, **policy):
+        """
+        Open the base index at path plus any segments recorded in
+        path/segments/segments.json. Segments left over from a previous base
+        build (different index_id) are ignored.
+        """
+        base = BM25Index.load(path, mmap=mmap)
+        segments = [(BASE_SEGMENT, base, np.ones(base.num_docs, dtype=bool))]
+        generation = 0
+        state_id = BASE_SEGMENT
+
+        state_path = os.path.join(path, SEGMENTS_DIR, SEGMENTS_FILE)
+        if os.path.exists(state_path):
+            with open(state_path) as f:
+                state = json.load(f)
+
+            if state.get("base_index_id") != base.index_id:
+                print(f"Dropping BM25 segments built for another base index ({state.get('base_index_id')})")
+                shutil.rmtree(os.path.join(path, SEGMENTS_DIR), ignore_errors=True)
+            else:
+                generation = state["generation"]
+                # Written before state ids existed: not shareable
+                state_id = state.get("state_id") or uuid.uuid4().hex
+                segments = []
+                for entry in state["segments"]:
+                    name = entry["name"]
+                    if name == BASE_SEGMENT:
+                        segment = base
+                    else:
+                        segment = BM25Index.load(os.path.join(path, SEGMENTS_DIR, name), mmap=mmap)
+
+                    live = np.ones(segment.num_docs, dtype=bool)
+                    if entry.get("tombstones"):
+                        live[np.load(os.path.join(path, SEGMENTS_DIR, entry["tombstones"]))] = False
+                    segments.append((name, segment, live))
+
+        index = cls(path, base, segments, **policy)
+        index._generation = generation
+        index._state_id = state_id
+        index._register()
+        if background:
+            index.start_background()
+        return index
+
+    # SEARCH
+    @property
+    def num_docs(self):
+        """ Live documents across all segments """
+        with self._lock:
+            live = sum(int(live.sum()) for _, _, live in self._segments)
+            buffered = [self._write] + [w for w, _ in self._flushing]
+            return live + sum(len(w.live_docs()) for w in buffered)
+
+    @property
+    def num_segments(self):
+        return len(self._segments)
+
+    @property
+    def version(self):
+        """
+        Changes whenever search results can change. Every process that opens
+        the same committed state reports the same version; after its own
+        adds / deletes a process reports a version nobody else uses.
+        """
+        if self._updates == 0:
+            return f"{self.index_id}.{self._state_id}"
+        return f"{self.index_id}.{self._session}.{self._updates}"
+
+    def search_terms(self, term_ids, top_k: int = 50, mode: str = "exhaustive", doc_filter=None, point_ids=None):
+        """
+        Top-k across all segments.
+        doc_filter: optional BoundFilter (models/product_filter.py); only its
+        eligible documents compete for the top-k.
+        point_ids: optional PointIdMap (models/point_ids.py); results are then
+        int32 Qdrant point ids, and products without one are excluded before
+        the top-k (they never take a slot).
+        Returns (product_ids, scores) sorted by descending score; ties are
+        broken by segment order, then doc index.
+        """
+        if not term_ids:
+            return self._no_hits(point_ids)
+
+        segments, buffers = self._snapshot([term_ids], doc_filter, point_ids)
+        hits = [
+            (segment, *segment.search_terms(term_ids, top_k, mode,
+                                            mask=self._segment_mask(segment, live, doc_filter, point_ids)))
+            for _, segment, live in segments
+        ]
+        hits += [(source, *found[0]) for source, found in buffers]
+        return self._merge_hits(hits, top_k, point_ids)
+
+    def search_batch(self, queries, top_k: int = 50, mode: str = "exhaustive", doc_filter=None, point_ids=None):
+        """
+        search_terms() for many queries (lists of term ids) at once: one
+        snapshot and one mask per segment for the whole batch, and product
+        ids decoded in one gather when only the base segment exists.
+        Returns a list of (product_ids, scores), one per query.
+        """
+        segments, buffers = self._snapshot(queries, doc_filter, point_ids)
+        per_segment = [
+            (segment, segment.search_batch(queries, top_k, mode,
+                                           mask=self._segment_mask(segment, live, doc_filter, point_ids)))
+            for _, segment, live in segments
+        ]
+
+        if len(per_segment) == 1 and not buffers:
+            # Only the base segment: decode every query's product ids in one gather
+            segment, found = per_segment[0]
+            if not found:
+                return []
+            if point_ids is not None:
+                return [self._known(point_ids.segment(segment)[docs], scores) for docs, scores in found]
+            product_ids = segment.product_ids_of(np.concatenate([docs for docs, _ in found]))
+            bounds = np.cumsum([0] + [len(docs) for docs, _ in found]).tolist()
+            return [(product_ids[bounds[i]:bounds[i + 1]], scores) for i, (_, scores) in enumerate(found)]
+
+        results = []
+        for i in range(len(queries)):
+            hits = [(segment, *found[i]) for segment, found in per_segment]
+            hits += [(source, *found[i]) for source, found in buffers]
+            results.append(self._merge_hits(hits, top_k, point_ids))
+        return results
+
+    def _snapshot(self, queries, doc_filter=None, point_ids=None):
+        """
+        Consistent view for a search: the immutable segment list plus the
+        buffered (write / flushing) segments' hits for every query (eligible
+        ones, and with point_ids only products that have a point id).
+        """
+        with self._lock:
+            buffers = [w for w, _ in self._flushing] + [self._write]
+            found = [(w, [w.search_terms(q) for q in queries]) for w in buffers if len(w)]
+            segments = self._segments
+
+        if doc_filter is not None:
+            found = [(w, [self._filter_hits(w, docs, scores, doc_filter) for docs, scores in hits])
+                     for w, hits in found]
+        if point_ids is not None:
+            found = [(w, [self._point_hits(w, docs, scores, point_ids) for docs, scores in hits])
+                     for w, hits in found]
+        return segments, found
+
+    @staticmethod
+    def _segment_mask(segment, live, doc_filter, point_ids=None):
+        """
+        Live (and, with a filter, eligible; with point_ids, having a point id)
+        documents of a segment; None = all
+        """
+        mask = None if live.all() else live
+        if doc_filter is not None:
+            eligible = doc_filter.mask(segment)
+            mask = eligible if mask is None else eligible & mask
+        if point_ids is not None:
+            known = point_ids.known(segment)
+            if known is not None:
+                mask = known if mask is None else known & mask
+        return mask
+
+    @staticmethod
+    def _point_hits(source, docs, scores, point_ids):
+        if not len(docs):
+            return docs, scores
+        keep = point_ids.of(source.product_ids_of(docs.tolist())) >= 0
+        return docs[keep], scores[keep]
+
+    @staticmethod
+    def _filter_hits(source, docs, scores, doc_filter):
+        if not len(docs):
+            return docs, scores
+        keep = doc_filter.allows(source.product_ids_of(docs.tolist()))
+        return docs[keep], scores[keep]
+
+    @staticmethod
+    def _no_hits(point_ids=None):
+        ids = [] if point_ids is None else np.empty(0, dtype=np.int32)
+        return ids, np.empty(0, dtype=np.float64)
+
+    @staticmethod
+    def _known(points, scores):
+        """ (int32 point ids, scores) without the products that have no point id """
+        keep = points >= 0
+        if keep.all():
+            return points.astype(np.int32), scores
+        return points[keep].astype(np.int32), scores[keep]
+
+    @classmethod
+    def _merge_hits(cls, hits, top_k, point_ids=None):
+        """ [(source, docs, scores)] in segment order -> (product_ids or point ids, scores) """
+        hits = [h for h in hits if len(h[1])]
+        if not hits:
+            return cls._no_hits(point_ids)
+
+        # Common case: one segment matched and its hits are already a sorted top-k
+        if len(hits) == 1 and isinstance(hits[0][0], BM25Index):
+            source, docs, scores = hits[0]
+            if point_ids is not None:
+                return cls._known(point_ids.segment(source)[docs], scores)
+            return source.product_ids_of(docs), scores
+
+        keys = np.concatenate([i * 2 ** 32 + docs.astype(np.int64) for i, (_, docs, _) in enumerate(hits)])
+        top_keys, top_scores = select_top_k(keys, np.concatenate([h[2] for h in hits]), top_k)
+
+        if point_ids is None:
+            product_ids = [hits[key >> 32][0].product_ids_of([key & 0xFFFFFFFF])[0] for key in top_keys.tolist()]
+            return product_ids, top_scores
+
+        sources, docs = top_keys >> 32, top_keys & 0xFFFFFFFF
+        points = np.empty(len(top_keys), dtype=np.int64)
+        for i in np.unique(sources).tolist():
+            selected = sources == i
+            source = hits[i][0]
+            if isinstance(source, BM25Index):
+                points[selected] = point_ids.segment(source)[docs[selected]]
+            else:
+                points[selected] = point_ids.of(source.product_ids_of(docs[selected].tolist()))
+        return cls._known(points, top_scores)
+
+    # SHARED DIRECTORY
+    def _register(self):
+        """ Hold a lock file in segments/.open for as long as this process runs """
+        open_dir = os.path.join(self.path, SEGMENTS_DIR, OPEN_DIR)
+        os.makedirs(open_dir, exist_ok=True)
+        name = f"{os.getpid()}.{self._session}"
+        # Locked before it gets its .lock name, so it is never taken for stale
+        tmp = os.path.join(open_dir, f".{name}")
+        self._open_file = open(tmp, "w")
+        fcntl.flock(self._open_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        os.replace(tmp, os.path.join(open_dir, f"{name}.lock"))
+
+    def other_processes(self) -> int:
+        """ Live processes other than this one with the index directory open """
+        open_dir = os.path.join(self.path, SEGMENTS_DIR, OPEN_DIR)
+        if not os.path.isdir(open_dir):
+            return 0
+
+        others = 0
+        for filename in os.listdir(open_dir):
+            if not filename.endswith(".lock") or filename == f"{os.getpid()}.{self._session}.lock":
+                continue
+            lock_path = os.path.join(open_dir, filename)
+            try:
+                with open(lock_path, "a") as f:
+                    fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    # Not held: left by a process that exited
+                    os.remove(lock_path)
+            except BlockingIOError:
+                others += 1
+            except FileNotFoundError:
+                pass
+        return others
+
+    def check_writable(self):
+        """
+        Raise RuntimeError when other processes have the directory open: their
+        searches would never see this process's write segment or tombstones.
+        """
+        others = self.other_processes()
+        if others:
+            raise RuntimeError(
+                f"{others} other process(es) have {self.path} open (API workers?): an update would only "
+                f"reach this one. Index incrementally with a single API process, or rebuild the index"
+            )
+
+    # WRITES
+    def _build_locations(self):
+        """ product_id -> (segment, doc) for live documents (built on first write) """
+        if self._locations is None:
+            locations = {}
+            for _, segment, live in self._segments:
+                for doc in np.flatnonzero(live).tolist():
+                    locations[segment.product_id(doc)] = (segment, doc)
+            self._locations = locations
+        return self._locations
+
+    def add(self, product_id: str, term_ids, doc_len: int):
+        """
+        Index a product; an existing document with the same id is replaced.
+        Callers check check_writable() first (once per batch of writes).
+        """
+        with self._lock:
+            self._delete_locked(product_id)
+            doc = self._write.add(product_id, term_ids, doc_len)
+            self._locations[product_id] = (self._write, doc)
+            self._updates += 1
+
+    def delete(self, product_id: str) -> bool:
+        with self._lock:
+            deleted = self._delete_locked(product_id)
+            if deleted:
+                self._updates += 1
+            return deleted
+
+    def _delete_locked(self, product_id):
+        location = self._build_locations().pop(product_id, None)
+        if location is None:
+            return False
+
+        source, doc = location
+        if isinstance(source, WriteSegment):
+            source.deleted[doc] = True
+        else:
+            for _, segment, live in self._segments:
+                if segment is source:
+                    live[doc] = False
+            self._dirty = True
+        return True
+
+    # FLUSH / MERGE
+    def flush(self):
+        """ Turn the write segment into an immutable on-disk segment """
+        with self._maintenance_lock:
+            with self._lock:
+                if len(self._write) == 0:
+                    return
+                frozen = self._write
+                self._write = WriteSegment(self.base)
+                self._generation += 1
+                name = f"seg_{self._generation:06d}"
+                self._flushing.append((frozen, name))
+
+            segment, origin = frozen.to_segment() if frozen.live_docs() else (None, [])
+            if segment is not None:
+                segment = self._persist(segment, name)
+
+            with self._lock:
+                self._flushing = [(w, n) for w, n in self._flushing if w is not frozen]
+                if segment is not None:
+                    # Deletes that raced with the flush
+                    live = np.array([not frozen.deleted[d] for d in origin], dtype=bool)
+                    self._segments = self._segments + [(name, segment, live)]
+                    self._relocate(segment, [(frozen, d) for d in origin], live)
+                self._commit()
+                self.flushes += 1
+
+    def maybe_merge(self):
+        """
+        Merge policy:
+        - expunge: a segment with at least expunge_ratio deleted docs is rewritten
+        - tiered: merge_factor segments of the same size tier are merged into one
+        """
+        with self._lock:
+            segments = self._segments
+
+        for name, segment, live in segments:
+            if segment.num_docs and 1 - live.mean() >= self.expunge_ratio:
+                return self._merge([name])
+
+        tiers = {}
+        for name, segment, live in segments:
+            tier = int(math.log(max(segment.num_docs, 1), self.merge_factor))
+            tiers.setdefault(tier, []).append(name)
+
+        for tier in sorted(tiers):
+            if len(tiers[tier]) >= self.merge_factor:
+                return self._merge(tiers[tier][:self.merge_factor])
+
+    def _merge(self, names):
+        with self._maintenance_lock:
+            with self._lock:
+                chosen = [s for s in self._segments if s[0] in names]
+                self._generation += 1
+                name = f"seg_{self._generation:06d}"
+
+            tables, doc_len, product_ids, origin = [], [], [], []
+            offset = 0
+            for _, segment, live in chosen:
+                docs = np.flatnonzero(live)
+                renumber = np.full(segment.num_docs, -1, dtype=np.int64)
+                renumber[docs] = offset + np.arange(len(docs))
+
+                post_term, post_doc, tf = segment.postings_table()
+                keep = renumber[post_doc] >= 0
+                tables.append((post_term[keep], renumber[post_doc[keep]], tf[keep]))
+
+                doc_len.append(np.asarray(segment.doc_len)[docs])
+                product_ids.append(np.asarray(segment.product_ids)[docs])
+                origin.extend((segment, d) for d in docs.tolist())
+                offset += len(docs)
+
+            merged = None
+            if offset:
+                post_term = np.concatenate([t[0] for t in tables])
+                post_doc = np.concatenate([t[1] for t in tables])
+                tf = np.concatenate([t[2] for t in tables])
+                order = np.lexsort((post_doc, post_term))
+
+                base = self.base
+                merged = BM25Index.from_postings(
+                    post_term[order], post_doc[order], tf[order],
+                    np.concatenate(doc_len), base.vocab, np.concatenate(product_ids),
+                    k1=base.k1, b=base.b, epsilon=base.epsilon,
+                    idf=base.idf, avgdl=base.avgdl, analyzer=base.analyzer,
+                )
+                merged = self._persist(merged, name)
+
+            with self._lock:
+                remaining = [s for s in self._segments if s[0] not in names]
+                if merged is not None:
+                    # Deletes that raced with the merge
+                    current = {id(s[1]): s[2] for s in chosen}
+                    live = np.array([current[id(seg)][d] for seg, d in origin], dtype=bool)
+                    # The merged segment takes the place of the first one it replaces
+                    position = [s[0] for s in self._segments].index(chosen[0][0])
+                    remaining.insert(position, (name, merged, live))
+                    self._relocate(merged, origin, live)
+                self._segments = remaining
+                self._commit()
+                self.merges += 1
+
+            for old_name, _, _ in chosen:
+                if old_name != BASE_SEGMENT:
+                    shutil.rmtree(os.path.join(self.path, SEGMENTS_DIR, old_name), ignore_errors=True)
+
+    def _relocate(self, segment, origin, live):
+        """ Point moved documents at their new segment """
+        if self._locations is None:
+            return
+        for new_doc, (source, doc) in enumerate(origin):
+            if live[new_doc]:
+                pid = source.product_ids[doc] if isinstance(source, WriteSegment) else source.product_id(doc)
+                if self._locations.get(pid) == (source, doc):
+                    self._locations[pid] = (segment, new_doc)
+
+    def _persist(self, segment, name):
+        path = os.path.join(self.path, SEGMENTS_DIR, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        segment.save(path)
+        return BM25Index.load(path, mmap=True)
+
+    def _commit(self):
+        """ Write segments.json (and tombstones) atomically; caller holds the lock """
+        seg_dir = os.path.join(self.path, SEGMENTS_DIR)
+        os.makedirs(seg_dir, exist_ok=True)
+
+        entries = []
+        for name, _, live in self._segments:
+            tombstones = None
+            if not live.all():
+                tombstones = f"{name}.{self._generation:06d}.tombstones.npy"
+                tmp = os.path.join(seg_dir, f".{tombstones}")
+                with open(tmp, "wb") as f:
+                    np.save(f, np.flatnonzero(~live).astype(np.int32))
+                os.replace(tmp, os.path.join(seg_dir, tombstones))
+            entries.append({"name": name, "num_docs": int(live.size), "tombstones": tombstones})
+
+        state = {
+            "version": SEGMENTS_VERSION,
+            "base_index_id": self.index_id,
+            "generation": self._generation,
+            "state_id": uuid.uuid4().hex,
+            "segments": entries,
+        }
+        tmp = os.path.join(seg_dir, f".{SEGMENTS_FILE}")
+        with open(tmp, "w") as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp, os.path.join(seg_dir, SEGMENTS_FILE))
+
+        # Drop tombstone files of earlier generations
+        current = {e["tombstones"] for e in entries}
+        for filename in os.listdir(seg_dir):
+            if filename.endswith(".tombstones.npy") and filename not in current:
+                os.remove(os.path.join(seg_dir, filename))
+
+        self._dirty = False
+
+    # BACKGROUND MAINTENANCE
+    def start_background(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._maintenance_loop, daemon=True)
+            self._thread.start()
+
+    def stop_background(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _maintenance_loop(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.maintain()
+            except Exception as e:
+                print(f"✗ BM25 segment maintenance failed: {e}")
+
+    def maintain(self):
+        """ One maintenance pass: flush when due, persist deletes, merge """
+        write = self._write
+        if len(write) and (len(write) >= self.flush_docs or
+                           time.time() - write.created_at >= self.flush_interval):
+            self.flush()
+        elif self._dirty:
+            with self._lock:
+                self._commit()
+        # Other processes merging the same segments would overwrite each other's
+        if not self.other_processes():
+            self.maybe_merge()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "segments": self.num_segments,
+                "buffered_docs": len(self._write),
+                "live_docs": self.num_docs,
+                "flushes": self.flushes,
+                "merges": self.merges,
+            }
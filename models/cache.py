@@ -0,0 +1,167 @@
+"""
+CACHE MODULE
+Bounded in-memory (L1) caches of the search engine
+Includes:
+- LRUCache: least-recently-used eviction (a hit moves the entry to the front)
+- Budgets per cache: entry count and approximate bytes (arrays, strings,
+  result dicts are measured when stored)
+- Optional TTL per cache (expired entries count as misses and are dropped)
+- Lock striping: keys hash to one of N shards, each with its own lock, LRU
+  order and 1/N of the budgets, so concurrent requests rarely contend
+- Hit / miss / eviction / expiry counters
+Recency is tracked per shard, so eviction is LRU within a shard (exact LRU
+with shards=1).
+"""
+
+import sys
+import time
+import threading
+from collections import OrderedDict
+import numpy as np
+
+_ARRAY_OVERHEAD = sys.getsizeof(np.empty(0))
+
+
+def sizeof(value):
+    """ Approximate bytes held by a cached value (shared objects counted each time) """
+    if isinstance(value, np.ndarray):
+        return _ARRAY_OVERHEAD + value.nbytes
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(sizeof(k) + sizeof(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(sizeof(v) for v in value)
+    return sys.getsizeof(value)
+
+
+class _Shard:
+    def __init__(self):
+        self.lock = threading.Lock()
+        # key -> (value, bytes, expires_at or None)
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expired = 0
+        self.rejected = 0
+
+
+class LRUCache:
+    """
+    Thread-safe LRU cache with entry / byte budgets and an optional TTL.
+    max_bytes=None / ttl=None disable the byte budget / expiry.
+    """
+
+    def __init__(self, name: str, max_entries: int = 1000, max_bytes: int = None,
+                 ttl: float = None, shards: int = 8):
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._shards = [_Shard() for _ in range(max(1, min(shards, max_entries)))]
+        self._shard_entries = -(-max_entries // len(self._shards))
+        self._shard_bytes = None if max_bytes is None else max_bytes // len(self._shards)
+
+    def _shard(self, key):
+        return self._shards[hash(key) % len(self._shards)]
+
+    def _live(self, shard, key):
+        """ (value, bytes, expires_at) of a live entry, or None; caller holds the lock """
+        entry = shard.entries.get(key)
+        if entry is not None and entry[2] is not None and entry[2] <= time.monotonic():
+            self._drop(shard, key)
+            shard.expired += 1
+            return None
+        return entry
+
+    @staticmethod
+    def _drop(shard, key):
+        shard.bytes -= shard.entries.pop(key)[1]
+
+    # LOOKUP
+    def get(self, key, default=None):
+        """ Cached value (now most recently used), or default (counted as a miss) """
+        shard = self._shard(key)
+        with shard.lock:
+            entry = self._live(shard, key)
+            if entry is None:
+                shard.misses += 1
+                return default
+            shard.entries.move_to_end(key)
+            shard.hits += 1
+            return entry[0]
+
+    def __getitem__(self, key):
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key):
+        """ Membership only: no recency update, not counted """
+        shard = self._shard(key)
+        with shard.lock:
+            return self._live(shard, key) is not None
+
+    def __len__(self):
+        return sum(len(shard.entries) for shard in self._shards)
+
+    # UPDATE
+    def put(self, key, value):
+        """ Store value, evicting least recently used entries over the shard's budgets """
+        size = sizeof(value) + sizeof(key)
+        shard = self._shard(key)
+        with shard.lock:
+            if key in shard.entries:
+                self._drop(shard, key)
+            if self._shard_bytes is not None and size > self._shard_bytes:
+                # Larger than the whole shard budget: would evict everything and still not fit
+                shard.rejected += 1
+                return
+            expires = None if self.ttl is None else time.monotonic() + self.ttl
+            shard.entries[key] = (value, size, expires)
+            shard.bytes += size
+            while len(shard.entries) > self._shard_entries or (
+                self._shard_bytes is not None and shard.bytes > self._shard_bytes
+            ):
+                shard.bytes -= shard.entries.popitem(last=False)[1][1]
+                shard.evictions += 1
+
+    __setitem__ = put
+
+    def pop(self, key, default=None):
+        shard = self._shard(key)
+        with shard.lock:
+            entry = shard.entries.get(key)
+            if entry is None:
+                return default
+            self._drop(shard, key)
+            return entry[0]
+
+    def clear(self):
+        for shard in self._shards:
+            with shard.lock:
+                shard.entries.clear()
+                shard.bytes = 0
+
+    # STATISTICS
+    def stats(self):
+        totals = dict.fromkeys(("entries", "bytes", "hits", "misses", "evictions", "expired", "rejected"), 0)
+        for shard in self._shards:
+            with shard.lock:
+                totals["entries"] += len(shard.entries)
+                totals["bytes"] += shard.bytes
+                totals["hits"] += shard.hits
+                totals["misses"] += shard.misses
+                totals["evictions"] += shard.evictions
+                totals["expired"] += shard.expired
+                totals["rejected"] += shard.rejected
+        lookups = totals["hits"] + totals["misses"]
+        return {
+            **totals,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl,
+            "hit_rate": round(totals["hits"] / lookups, 3) if lookups else 0,
+        }
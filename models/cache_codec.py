@@ -0,0 +1,91 @@
+"""
+CACHE CODEC MODULE
+Byte encoding of the values stored in the shared (L2) query cache
+Includes:
+- Arrays (query embeddings) and tuples of arrays ((point ids, scores) hits):
+  a short dtype / shape header followed by the raw array bytes; decoding is
+  np.frombuffer, no copy and no per-object reconstruction
+- Everything else (hybrid result lists): msgpack when installed, else JSON
+- No pickle: values from a store other processes / hosts write are never
+  executed as code
+Decoded arrays are read-only views, like every other cached value they are
+shared and must not be modified.
+"""
+
+import json
+import math
+import struct
+import numpy as np
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# Changes whenever the byte layout does: part of every L2 version, so values
+# written by another codec simply stop matching
+CODEC_VERSION = "c1"
+
+_ARRAY, _ARRAYS, _MSGPACK, _JSON = b"A", b"T", b"M", b"J"
+# Array header bytes -> [(dtype, shape, element count)]
+_HEADERS = {}
+
+
+def _pack_arrays(arrays):
+    """ uint16 header length, header "dtype:shape;...", then the raw array bytes """
+    header = ";".join(f"{a.dtype.str}:{'x'.join(map(str, a.shape))}" for a in arrays).encode("ascii")
+    return b"".join([struct.pack("<H", len(header)), header] + [np.ascontiguousarray(a).tobytes() for a in arrays])
+
+
+def _parse_header(header):
+    specs = []
+    for part in header.decode("ascii").split(";"):
+        dtype, shape = part.split(":")
+        shape = tuple(int(n) for n in shape.split("x")) if shape else ()
+        specs.append((np.dtype(dtype), shape, math.prod(shape)))
+    return specs
+
+
+def _unpack_arrays(data, offset):
+    (length,) = struct.unpack_from("<H", data, offset)
+    offset += 2
+    header = data[offset:offset + length]
+    # Few distinct headers (dtype / top_k combinations): parse each once
+    specs = _HEADERS.get(header)
+    if specs is None:
+        specs = _HEADERS[header] = _parse_header(header)
+        if len(_HEADERS) > 4096:
+            _HEADERS.clear()
+    offset += length
+
+    arrays = []
+    for dtype, shape, count in specs:
+        arrays.append(np.frombuffer(data, dtype=dtype, count=count, offset=offset).reshape(shape))
+        offset += count * dtype.itemsize
+    return arrays
+
+
+def encode(value) -> bytes:
+    if isinstance(value, np.ndarray):
+        return _ARRAY + _pack_arrays([value])
+    if isinstance(value, tuple) and value and all(isinstance(v, np.ndarray) for v in value):
+        return _ARRAYS + _pack_arrays(list(value))
+    if msgpack is not None:
+        return _MSGPACK + msgpack.packb(value, use_bin_type=True)
+    return _JSON + json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def decode(data: bytes):
+    """ Inverse of encode; ValueError on bytes it did not produce """
+    tag = data[:1]
+    if tag == _ARRAY:
+        return _unpack_arrays(data, 1)[0]
+    if tag == _ARRAYS:
+        return tuple(_unpack_arrays(data, 1))
+    if tag == _MSGPACK:
+        if msgpack is None:
+            raise ValueError("Cached value was written with msgpack, which is not installed")
+        return msgpack.unpackb(data[1:], raw=False)
+    if tag == _JSON:
+        return json.loads(data[1:].decode("utf-8"))
+    raise ValueError(f"Unknown cache value encoding {tag!r}")
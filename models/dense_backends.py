@@ -0,0 +1,483 @@
+"""
+DENSE RETRIEVAL BACKENDS MODULE
+Pluggable dense (vector) search for the hybrid engine
+Includes:
+- DenseIndex: exported embedding matrix (flat .npy arrays + manifest, memory-mapped)
+- QdrantBackend: remote search (query_points network round trip)
+- ExactBackend: in-process exact cosine search (one BLAS matmul + argpartition)
+- Scalar quantization (float16 / int8) with exact float32 rescoring of a shortlist
+- HNSWBackend: in-process approximate search over an HNSW graph (optional hnswlib)
+- Filtered search (BoundFilter from models/product_filter.py): Qdrant payload
+  filter, or a row mask applied before top-k in-process
+Every backend returns (int32 point ids, float32 scores) sorted by descending
+cosine score. DenseIndex row i is Qdrant point id i.
+"""
+
+import os
+import json
+import hashlib
+import shutil
+import uuid
+from datetime import datetime
+import numpy as np
+
+DENSE_FORMAT = "dense-flat"
+DENSE_FORMAT_VERSION = 1
+DENSE_FILES = ("embeddings", "product_ids")
+
+DENSE_BACKENDS = ("qdrant", "exact", "hnsw")
+QUANTIZATION_MODES = ("float16", "int8")
+
+# Rows converted to float32 at a time when scanning a quantized matrix
+SCAN_ROWS = 4096
+
+# Scores (queries x rows) held at once by a query batch: larger batches are
+# scored in chunks of queries (~64 MB of float32 per chunk)
+BATCH_MAX_SCORES = 16_000_000
+
+# Queries per query_batch_points request
+QDRANT_BATCH = 64
+
+# Filters keeping fewer rows than this fraction are scanned exactly over the
+# eligible rows only (cheaper than a full pass, and HNSW degrades there)
+FILTER_SCAN_FRACTION = 0.1
+
+HNSW_GRAPH = "hnsw.bin"
+HNSW_META = "hnsw.json"
+
+
+def normalize_rows(vectors):
+    """ L2-normalize (cosine == dot product afterwards); zero rows stay zero """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def query_chunks(num_queries, num_rows):
+    """ Query slices whose (queries x num_rows) score matrix stays within BATCH_MAX_SCORES """
+    step = max(BATCH_MAX_SCORES // max(num_rows, 1), 1)
+    return [slice(start, start + step) for start in range(0, num_queries, step)]
+
+
+def exact_rows(embeddings, queries, rows, top_k):
+    """ Exact top-k restricted to rows (sorted point ids): (rows, scores) per query """
+    k = min(top_k, len(rows))
+    if k <= 0:
+        return np.empty((len(queries), 0), dtype=np.int64), np.empty((len(queries), 0))
+    vectors = np.asarray(embeddings[rows]).T
+
+    top_rows, top_scores = [], []
+    for chunk in query_chunks(len(queries), len(rows)):
+        scores = queries[chunk] @ vectors
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_rows.append(rows[top])
+        top_scores.append(np.take_along_axis(scores, top, axis=1))
+    return np.concatenate(top_rows), np.concatenate(top_scores)
+
+
+def quantize(embeddings, mode):
+    """
+    Scalar quantization of the embedding matrix.
+    float16: plain cast. int8: symmetric per-dimension scale (max |x| -> 127),
+    so q . (scale * y) approximates x . y.
+    Returns (quantized matrix, scale or None).
+    """
+    if mode not in QUANTIZATION_MODES:
+        raise ValueError(f"Unknown quantization '{mode}', expected one of {QUANTIZATION_MODES}")
+
+    if mode == "float16":
+        return np.asarray(embeddings, dtype=np.float16), None
+
+    max_abs = np.zeros(embeddings.shape[1], dtype=np.float32)
+    for start in range(0, len(embeddings), SCAN_ROWS):
+        np.maximum(max_abs, np.abs(embeddings[start:start + SCAN_ROWS]).max(axis=0), out=max_abs)
+    scale = np.where(max_abs == 0, 1, max_abs / 127).astype(np.float32)
+
+    quantized = np.empty(embeddings.shape, dtype=np.int8)
+    for start in range(0, len(embeddings), SCAN_ROWS):
+        block = np.asarray(embeddings[start:start + SCAN_ROWS]) / scale
+        quantized[start:start + SCAN_ROWS] = np.clip(np.rint(block), -127, 127)
+    return quantized, scale
+
+
+class DenseIndex:
+    """
+    Product embedding matrix exported from the Qdrant collection.
+
+    Row i is Qdrant point id i (same order as the CSV and the BM25 index).
+    embeddings: float32 (num_vectors x dim), L2-normalized
+    product_ids: fixed-width bytes, one per row
+    quantized: optional {mode: (matrix, scale)} copies for the first search pass
+    """
+
+    def __init__(self, embeddings, product_ids, model=None, index_id=None, quantized=None):
+        self.embeddings = embeddings
+        self.quantized = quantized or {}
+
+        if not isinstance(product_ids, np.ndarray):
+            product_ids = np.array([str(p).encode("utf-8") for p in product_ids], dtype=np.bytes_)
+        self.product_ids = product_ids
+
+        self.model = model
+        self.index_id = index_id or uuid.uuid4().hex
+        self.num_vectors, self.dim = embeddings.shape
+
+    @classmethod
+    def from_vectors(cls, vectors, product_ids, model=None, quantization=QUANTIZATION_MODES):
+        embeddings = normalize_rows(vectors)
+        quantized = {mode: quantize(embeddings, mode) for mode in quantization}
+        return cls(embeddings, product_ids, model=model, quantized=quantized)
+
+    def product_ids_of(self, rows):
+        return [p.decode("utf-8") for p in np.asarray(self.product_ids[rows]).tolist()]
+
+    # PERSISTENCE
+    def save(self, path):
+        """ Same layout and atomic swap as BM25Index.save: arrays, then manifest.json """
+        path = path.rstrip("/")
+        tmp_path = f"{path}.tmp-{os.getpid()}"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+
+        for name in DENSE_FILES:
+            np.save(os.path.join(tmp_path, f"{name}.npy"), np.asarray(getattr(self, name)))
+
+        for mode, (matrix, scale) in self.quantized.items():
+            np.save(os.path.join(tmp_path, f"embeddings_{mode}.npy"), np.asarray(matrix))
+            if scale is not None:
+                np.save(os.path.join(tmp_path, f"{mode}_scale.npy"), scale)
+
+        manifest = {
+            "format": DENSE_FORMAT,
+            "version": DENSE_FORMAT_VERSION,
+            "index_id": self.index_id,
+            "created_at": datetime.now().isoformat(),
+            "num_vectors": self.num_vectors,
+            "dim": self.dim,
+            "model": self.model,
+            "distance": "cosine",
+            "quantization": sorted(self.quantized),
+        }
+        with open(os.path.join(tmp_path, "manifest.json"), "w") as f:
+            json.dump(manifest, f, indent=2)
+
+        old_path = f"{path}.old-{os.getpid()}"
+        if os.path.exists(path):
+            os.rename(path, old_path)
+        os.rename(tmp_path, path)
+        shutil.rmtree(old_path, ignore_errors=True)
+
+    @classmethod
+    def load(cls, path, mmap: bool = True):
+        with open(os.path.join(path, "manifest.json")) as f:
+            manifest = json.load(f)
+
+        if manifest.get("format") != DENSE_FORMAT:
+            raise ValueError(f"{path} is not a {DENSE_FORMAT} index")
+        if manifest.get("version") != DENSE_FORMAT_VERSION:
+            raise ValueError(
+                f"{path} has dense format version {manifest.get('version')}, "
+                f"expected {DENSE_FORMAT_VERSION}. Re-export it with scripts/export_embeddings.py"
+            )
+
+        mode = "r" if mmap else None
+        arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mode) for name in DENSE_FILES}
+
+        quantized = {}
+        for qmode in manifest.get("quantization", []):
+            matrix = np.load(os.path.join(path, f"embeddings_{qmode}.npy"), mmap_mode=mode)
+            scale_path = os.path.join(path, f"{qmode}_scale.npy")
+            quantized[qmode] = (matrix, np.load(scale_path) if os.path.exists(scale_path) else None)
+
+        return cls(arrays["embeddings"], arrays["product_ids"],
+                   model=manifest["model"], index_id=manifest["index_id"], quantized=quantized)
+
+
+class QdrantBackend:
+    """
+    Remote search in the Qdrant collection. With an AsyncQdrantClient,
+    search_async awaits the round trip instead of holding a thread.
+    """
+
+    name = "qdrant"
+
+    def __init__(self, qdrant, collection_name, async_qdrant=None):
+        self.qdrant = qdrant
+        self.async_qdrant = async_qdrant
+        self.collection_name = collection_name
+        # Identifies the result set for cache keys: a re-uploaded or reconfigured
+        # collection gets a new version, so persisted results of the old one
+        # are not served after a restart
+        self.version = f"qdrant:{collection_name}:{self._fingerprint()}"
+
+    def _fingerprint(self):
+        """ Hash of the collection's point count and vector / index configuration """
+        try:
+            info = self.qdrant.get_collection(self.collection_name)
+        except Exception as e:
+            print(f"✗ Could not read collection {self.collection_name} ({e}), "
+                  "dense results are only reused within this process")
+            return uuid.uuid4().hex[:12]
+        state = f"{info.points_count}|{info.config.params!r}|{info.config.hnsw_config!r}"
+        return hashlib.sha1(state.encode()).hexdigest()[:12]
+
+    def search(self, vector, top_k: int = 50, filters=None):
+        results = self.qdrant.query_points(
+            collection_name=self.collection_name,
+            query=np.asarray(vector).tolist(),
+            query_filter=self._query_filter(filters),
+            limit=top_k,
+            with_payload=False
+        )
+        return self._parse(results)
+
+    def search_batch(self, vectors, top_k: int = 50, filters=None):
+        """ One query_batch_points round trip per QDRANT_BATCH queries """
+        from qdrant_client.models import QueryRequest
+
+        query_filter = self._query_filter(filters)
+        found = []
+        for start in range(0, len(vectors), QDRANT_BATCH):
+            responses = self.qdrant.query_batch_points(
+                collection_name=self.collection_name,
+                requests=[
+                    QueryRequest(query=np.asarray(v).tolist(), filter=query_filter, limit=top_k,
+                                 with_payload=False)
+                    for v in vectors[start:start + QDRANT_BATCH]
+                ],
+            )
+            found += [self._parse(r) for r in responses]
+        return found
+
+    async def search_async(self, vector, top_k: int = 50, filters=None):
+        if self.async_qdrant is None:
+            raise ValueError("QdrantBackend was created without an async client")
+        results = await self.async_qdrant.query_points(
+            collection_name=self.collection_name,
+            query=np.asarray(vector).tolist(),
+            query_filter=self._query_filter(filters),
+            limit=top_k,
+            with_payload=False
+        )
+        return self._parse(results)
+
+    @staticmethod
+    def _query_filter(filters):
+        """ Payload filter evaluated by Qdrant (indexed fields, see PAYLOAD_INDEXES) """
+        return None if filters is None else filters.filter.to_qdrant()
+
+    @staticmethod
+    def _parse(results):
+        """ Point ids only: no payload crosses the network """
+        return (np.array([r.id for r in results.points], dtype=np.int32),
+                np.array([r.score for r in results.points], dtype=np.float32))
+
+
+class ExactBackend:
+    """
+    Exact cosine search: scores = E @ q over the whole (memory-mapped) matrix.
+
+    With quantization ("float16" / "int8") the first pass scans the smaller
+    quantized matrix instead, keeps top_k * oversample candidates, and
+    rescores them exactly against the float32 rows. Only the shortlisted
+    float32 rows are read, so the resident working set is the quantized
+    matrix (1/2 or 1/4 of float32).
+    """
+
+    name = "exact"
+
+    def __init__(self, index: DenseIndex, quantization=None, oversample: int = 4):
+        if quantization and quantization not in index.quantized:
+            raise ValueError(
+                f"Dense index has no {quantization} matrix (has {sorted(index.quantized)}); "
+                "re-export it with scripts/export_embeddings.py"
+            )
+        self.index = index
+        self.quantization = quantization or None
+        self.oversample = max(oversample, 1)
+        self.version = f"exact:{index.index_id}"
+        if self.quantization:
+            self.version += f":{self.quantization}x{self.oversample}"
+
+    def search(self, vector, top_k: int = 50, filters=None):
+        return self.search_batch([vector], top_k, filters)[0]
+
+    def search_batch(self, vectors, top_k: int = 50, filters=None):
+        """
+        One matmul per chunk of queries: (num_vectors x dim) @ (dim x queries),
+        chunks bounded by BATCH_MAX_SCORES.
+        filters: optional BoundFilter; ineligible rows never enter the top-k.
+        """
+        queries = normalize_rows(np.atleast_2d(vectors))
+
+        eligible = None if filters is None else filters.row_mask(self.index.num_vectors)
+        num_eligible = self.index.num_vectors if eligible is None else int(eligible.sum())
+
+        k = min(top_k, num_eligible)
+        if k <= 0:
+            return [(np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32)) for _ in queries]
+
+        if eligible is not None and num_eligible < self.index.num_vectors * FILTER_SCAN_FRACTION:
+            rows, scores = exact_rows(self.index.embeddings, queries, np.flatnonzero(eligible), k)
+        else:
+            found = [
+                self._scan(queries[chunk], k, eligible, num_eligible)
+                for chunk in query_chunks(len(queries), self.index.num_vectors)
+            ]
+            rows = np.concatenate([r for r, _ in found])
+            scores = np.concatenate([s for _, s in found])
+
+        order = np.lexsort((rows, -scores), axis=1)
+        rows = np.take_along_axis(rows, order, axis=1)
+        scores = np.take_along_axis(scores, order, axis=1).astype(np.float32)
+
+        return [(r.astype(np.int32), s) for r, s in zip(rows, scores)]
+
+    def _scan(self, queries, k, eligible=None, num_eligible=None):
+        """ Top-k rows and scores of every query over the whole matrix """
+        if self.quantization is not None:
+            return self._rescore(queries, k, eligible, num_eligible)
+
+        scores = np.asarray(self.index.embeddings @ queries.T).T
+        if eligible is not None:
+            scores[:, ~eligible] = -np.inf
+        rows = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        return rows, np.take_along_axis(scores, rows, axis=1)
+
+    def _rescore(self, queries, k, eligible=None, num_eligible=None):
+        """ Quantized first pass -> shortlist -> exact float32 scores of the shortlist """
+        matrix, scale = self.index.quantized[self.quantization]
+        scaled = queries if scale is None else queries * scale
+
+        approx = np.empty((len(queries), self.index.num_vectors), dtype=np.float32)
+        for start in range(0, self.index.num_vectors, SCAN_ROWS):
+            block = np.asarray(matrix[start:start + SCAN_ROWS], dtype=np.float32)
+            approx[:, start:start + len(block)] = scaled @ block.T
+        if eligible is not None:
+            approx[:, ~eligible] = -np.inf
+
+        m = min(k * self.oversample, num_eligible or self.index.num_vectors)
+        shortlist = np.argpartition(-approx, m - 1, axis=1)[:, :m]
+
+        # Sorted row ids: shortlisted float32 rows are read in file order
+        shortlist.sort(axis=1)
+        exact = np.einsum("qmd,qd->qm", self.index.embeddings[shortlist], queries)
+
+        top = np.argpartition(-exact, k - 1, axis=1)[:, :k]
+        return np.take_along_axis(shortlist, top, axis=1), np.take_along_axis(exact, top, axis=1)
+
+
+class HNSWBackend:
+    """
+    Approximate search over an HNSW graph (hnswlib, inner product on the
+    normalized rows). The graph is built on first use and saved next to the
+    exported matrix; it is rebuilt when the matrix or parameters change.
+    """
+
+    name = "hnsw"
+
+    def __init__(self, index: DenseIndex, path, M: int = 16, ef_construction: int = 200, ef_search: int = 128):
+        try:
+            import hnswlib
+        except ImportError:
+            raise ImportError("DENSE_BACKEND=hnsw needs hnswlib: pip install hnswlib")
+
+        self.index = index
+        params = {"index_id": index.index_id, "M": M, "ef_construction": ef_construction}
+        graph_path = os.path.join(path, HNSW_GRAPH)
+        meta_path = os.path.join(path, HNSW_META)
+
+        self.graph = hnswlib.Index(space="ip", dim=index.dim)
+
+        saved = None
+        if os.path.exists(meta_path) and os.path.exists(graph_path):
+            with open(meta_path) as f:
+                saved = json.load(f)
+
+        if saved == params:
+            self.graph.load_index(graph_path, max_elements=index.num_vectors)
+        else:
+            print(f"Building HNSW graph (M={M}, ef_construction={ef_construction}) "
+                  f"over {index.num_vectors:,} vectors")
+            self.graph.init_index(max_elements=index.num_vectors, M=M,
+                                  ef_construction=ef_construction, random_seed=42)
+            self.graph.add_items(np.asarray(index.embeddings), np.arange(index.num_vectors))
+
+            tmp_path = f"{graph_path}.tmp-{os.getpid()}"
+            self.graph.save_index(tmp_path)
+            os.replace(tmp_path, graph_path)
+            with open(meta_path, "w") as f:
+                json.dump(params, f)
+
+        self.graph.set_ef(max(ef_search, 1))
+        self.version = f"hnsw:{index.index_id}:{M}:{ef_construction}:{ef_search}"
+
+    def search(self, vector, top_k: int = 50, filters=None):
+        return self.search_batch([vector], top_k, filters)[0]
+
+    def search_batch(self, vectors, top_k: int = 50, filters=None):
+        queries = normalize_rows(np.atleast_2d(vectors))
+        if filters is not None:
+            return self._search_filtered(queries, top_k, filters.row_mask(self.index.num_vectors))
+
+        k = min(top_k, self.index.num_vectors)
+        if k <= 0:
+            return [(np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32)) for _ in queries]
+
+        # hnswlib "ip" distance is 1 - dot product
+        labels, distances = self.graph.knn_query(queries, k=k)
+        return [
+            (rows, (1.0 - dist).astype(np.float32))
+            for rows, dist in zip(labels.astype(np.int32), distances)
+        ]
+
+    def _search_filtered(self, queries, top_k, eligible):
+        """
+        Graph search that only admits eligible labels. Selective filters (or a
+        graph that cannot find k eligible neighbours) scan the eligible rows exactly.
+        """
+        eligible_rows = np.flatnonzero(eligible)
+        k = min(top_k, len(eligible_rows))
+        if k <= 0:
+            return [(np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32)) for _ in queries]
+
+        rows = None
+        if len(eligible_rows) >= self.index.num_vectors * FILTER_SCAN_FRACTION:
+            try:
+                labels, distances = self.graph.knn_query(
+                    queries, k=k, num_threads=1, filter=lambda label: bool(eligible[label])
+                )
+                rows, scores = labels.astype(np.int64), 1.0 - distances
+            except RuntimeError:
+                rows = None
+        if rows is None:
+            rows, scores = exact_rows(self.index.embeddings, queries, eligible_rows, k)
+
+        order = np.lexsort((rows, -scores), axis=1)
+        rows = np.take_along_axis(rows, order, axis=1)
+        scores = np.take_along_axis(scores, order, axis=1).astype(np.float32)
+        return [(r.astype(np.int32), s) for r, s in zip(rows, scores)]
+
+
+def create_dense_backend(kind: str, qdrant=None, collection_name=None, path=None, async_qdrant=None):
+    """ Build the backend named by kind (one of DENSE_BACKENDS) """
+    if kind not in DENSE_BACKENDS:
+        raise ValueError(f"Unknown dense backend '{kind}', expected one of {DENSE_BACKENDS}")
+
+    if kind == "qdrant":
+        return QdrantBackend(qdrant, collection_name, async_qdrant=async_qdrant)
+
+    index = DenseIndex.load(path, mmap=True)
+    if kind == "exact":
+        return ExactBackend(
+            index,
+            quantization=os.getenv("DENSE_QUANTIZATION") or None,
+            oversample=int(os.getenv("DENSE_OVERSAMPLE", "4")),
+        )
+
+    return HNSWBackend(
+        index, path,
+        M=int(os.getenv("HNSW_M", "16")),
+        ef_construction=int(os.getenv("HNSW_EF_CONSTRUCTION", "200")),
+        ef_search=int(os.getenv("HNSW_EF_SEARCH", "128")),
+    )
@@ -0,0 +1,121 @@
+"""
+DOCUMENT TOKENS MODULE
+Reranker token ids of every product's rerank text, computed at index build
+Includes:
+- Flat layout: int32 token ids of all products + int64 offsets (row i is
+  Qdrant point id i, like the payload store)
+- Built from the payload store with the ONNX export's tokenizer
+  (PairTokenizer), each document cut at a token budget
+- Memory-mapped: a rerank reads k slices instead of tokenizing k documents
+- Same manifest.json + atomic directory swap as the index artifacts; the
+  manifest names the tokenizer and payload store it was built from
+Written by scripts/build_doc_tokens.py.
+"""
+
+import os
+import json
+import uuid
+import shutil
+from datetime import datetime
+import numpy as np
+
+from models.rerankers import rerank_text
+
+DOC_TOKENS_FORMAT = "doc-tokens"
+DOC_TOKENS_FORMAT_VERSION = 1
+
+# Products tokenized per encode_batch call while building
+BUILD_CHUNK = 1024
+
+
+class DocTokenStore:
+    def __init__(self, ids, offsets, tokenizer_id, budget, payload_index_id, index_id=None):
+        self.ids = ids
+        self.offsets = offsets
+        self.tokenizer_id = tokenizer_id
+        self.budget = budget
+        self.payload_index_id = payload_index_id
+        self.index_id = index_id or uuid.uuid4().hex
+        self.num_rows = len(offsets) - 1
+
+    @classmethod
+    def build(cls, payloads, tokenizer, budget: int = None):
+        """ Token ids of rerank_text(product) for every payload store row """
+        budget = min(budget or tokenizer.budget, tokenizer.budget)
+        titles = payloads.column("title")
+        summaries = payloads.column("abstracted_summary")
+
+        chunks, lengths = [], []
+        for start in range(0, payloads.num_rows, BUILD_CHUNK):
+            rows = range(start, min(start + BUILD_CHUNK, payloads.num_rows))
+            docs = [rerank_text({"title": titles[i], "abstracted_summary": summaries[i]}) for i in rows]
+            encoded = tokenizer.encode_docs(docs, budget)
+            chunks += encoded
+            lengths += [len(e) for e in encoded]
+
+        offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        ids = np.concatenate(chunks) if chunks else np.empty(0, dtype=np.int32)
+        return cls(ids, offsets, tokenizer.tokenizer_id, budget, payloads.index_id)
+
+    def get(self, rows):
+        """ int32 token ids per point id, in order """
+        offsets = self.offsets
+        return [np.asarray(self.ids[offsets[r]:offsets[r + 1]]) for r in rows]
+
+    def matches(self, tokenizer, payloads):
+        """ Built with this tokenizer from this payload store """
+        return (payloads is not None and self.tokenizer_id == tokenizer.tokenizer_id
+                and self.payload_index_id == payloads.index_id)
+
+    # PERSISTENCE
+    def save(self, path):
+        """ Same layout and atomic swap as PayloadStore.save: arrays, then manifest.json """
+        path = path.rstrip("/")
+        tmp_path = f"{path}.tmp-{os.getpid()}"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+
+        np.save(os.path.join(tmp_path, "ids.npy"), np.asarray(self.ids, dtype=np.int32))
+        np.save(os.path.join(tmp_path, "offsets.npy"), np.asarray(self.offsets, dtype=np.int64))
+
+        manifest = {
+            "format": DOC_TOKENS_FORMAT,
+            "version": DOC_TOKENS_FORMAT_VERSION,
+            "index_id": self.index_id,
+            "created_at": datetime.now().isoformat(),
+            "num_rows": self.num_rows,
+            "num_tokens": int(self.offsets[-1]),
+            "budget": self.budget,
+            "tokenizer_id": self.tokenizer_id,
+            "payload_index_id": self.payload_index_id,
+        }
+        with open(os.path.join(tmp_path, "manifest.json"), "w") as f:
+            json.dump(manifest, f, indent=2)
+
+        old_path = f"{path}.old-{os.getpid()}"
+        if os.path.exists(path):
+            os.rename(path, old_path)
+        os.rename(tmp_path, path)
+        shutil.rmtree(old_path, ignore_errors=True)
+
+    @classmethod
+    def load(cls, path, mmap: bool = True):
+        with open(os.path.join(path, "manifest.json")) as f:
+            manifest = json.load(f)
+
+        if manifest.get("format") != DOC_TOKENS_FORMAT:
+            raise ValueError(f"{path} is not a {DOC_TOKENS_FORMAT} store")
+        if manifest.get("version") != DOC_TOKENS_FORMAT_VERSION:
+            raise ValueError(
+                f"{path} has document token format version {manifest.get('version')}, "
+                f"expected {DOC_TOKENS_FORMAT_VERSION}. Re-run scripts/build_doc_tokens.py"
+            )
+
+        mode = "r" if mmap else None
+        return cls(
+            np.load(os.path.join(path, "ids.npy"), mmap_mode=mode),
+            np.load(os.path.join(path, "offsets.npy")),
+            manifest["tokenizer_id"], manifest["budget"], manifest["payload_index_id"],
+            index_id=manifest["index_id"],
+        )
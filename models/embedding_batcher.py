@@ -0,0 +1,144 @@
+"""
+EMBEDDING BATCHER MODULE
+Micro-batching front end for the query embedder
+Includes:
+- Concurrent embed() calls queued and coalesced into one model call
+- Batch closes after max_wait_ms (from the first queued query) or max_batch queries
+- Duplicate queries in a batch embedded once
+- Bulk jobs (/search/batch, warmup replay): a caller's uncached queries
+  embedded in batch_size chunks on the worker thread, between micro-batches
+- Batch-size histogram for /stats
+Each request thread blocks on its own future; a single worker thread owns the
+model, so the ONNX session runs one batch at a time.
+"""
+
+import time
+import queue
+import threading
+from concurrent.futures import Future
+import numpy as np
+
+
+class _Bulk:
+    __slots__ = ("texts", "batch_size", "future")
+
+    def __init__(self, texts, batch_size):
+        self.texts = texts
+        self.batch_size = batch_size
+        self.future = Future()
+
+
+class EmbeddingBatcher:
+    def __init__(self, embedder, max_batch: int = 32, max_wait_ms: float = 2.0):
+        self.embedder = embedder
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait_ms / 1000
+
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._worker_loop, daemon=True)
+        self._thread.start()
+
+        # batch size -> number of model calls
+        self._histogram = {}
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.queries = 0
+        self.model_time = 0.0
+        self.bulk_jobs = 0
+        self.bulk_queries = 0
+        self.bulk_time = 0.0
+
+    def embed(self, text: str) -> np.ndarray:
+        """ Embedding of one query; blocks until its batch has run """
+        future = Future()
+        self._queue.put((text, future))
+        return future.result()
+
+    def embed_many(self, texts, batch_size: int = 256):
+        """ Embeddings of many queries as one bulk job; blocks until it has run """
+        bulk = _Bulk(list(texts), batch_size)
+        if not bulk.texts:
+            return []
+        self._queue.put(bulk)
+        return bulk.future.result()
+
+    def _worker_loop(self):
+        while True:
+            item = self._queue.get()
+            if isinstance(item, _Bulk):
+                self._run_bulk(item)
+                continue
+
+            batch, bulk = [item], None
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if isinstance(item, _Bulk):
+                    # Close the micro-batch; the bulk job runs right after it
+                    bulk = item
+                    break
+                batch.append(item)
+            self._run(batch)
+            if bulk is not None:
+                self._run_bulk(bulk)
+
+    def _run_bulk(self, bulk):
+        start = time.perf_counter()
+        try:
+            vectors = list(self.embedder.embed(bulk.texts, batch_size=bulk.batch_size))
+        except Exception as e:
+            bulk.future.set_exception(e)
+            return
+        bulk.future.set_result(vectors)
+
+        with self._lock:
+            self.bulk_jobs += 1
+            self.bulk_queries += len(bulk.texts)
+            self.bulk_time += time.perf_counter() - start
+
+    def _run(self, batch):
+        texts = list(dict.fromkeys(text for text, _ in batch))
+        start = time.perf_counter()
+        try:
+            vectors = dict(zip(texts, self.embedder.embed(texts, batch_size=len(texts))))
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        elapsed = time.perf_counter() - start
+
+        for text, future in batch:
+            future.set_result(vectors[text])
+
+        with self._lock:
+            self._histogram[len(batch)] = self._histogram.get(len(batch), 0) + 1
+            self.batches += 1
+            self.queries += len(batch)
+            self.model_time += elapsed
+
+    def stats(self):
+        with self._lock:
+            # Power-of-two buckets: "1", "2", "3-4", "5-8", ...
+            buckets = {}
+            for size, count in sorted(self._histogram.items()):
+                upper = 1 << (size - 1).bit_length()
+                label = str(upper) if upper <= 2 else f"{upper // 2 + 1}-{upper}"
+                buckets[label] = buckets.get(label, 0) + count
+
+            return {
+                "max_batch": self.max_batch,
+                "max_wait_ms": self.max_wait * 1000,
+                "batches": self.batches,
+                "queries": self.queries,
+                "avg_batch_size": round(self.queries / self.batches, 2) if self.batches else 0,
+                "avg_model_ms": round(self.model_time / self.batches * 1000, 2) if self.batches else 0,
+                "batch_size_histogram": buckets,
+                "bulk": {"jobs": self.bulk_jobs, "queries": self.bulk_queries,
+                         "model_seconds": round(self.bulk_time, 3)},
+            }
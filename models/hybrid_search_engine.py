@@ -2,25 +2,76 @@
 HYBRID SEARCH ENGINE MODULE
 Hybrid = Dense Search (Qdrant) + BM25 Keyword Search + BGE-Reranker
 Includes:
-- Local caching (embeddings, dense results, bm25 results, hybrid results)
-- Product ID mapping (string → numeric Qdrant ID)
-- Qdrant dense retrieval
-- BM25 keyword scoring
-- BGE Reranker for final ranking (optional but recommended)
+- Local caching (embeddings, dense results, bm25 results, hybrid results):
+  thread-safe LRU tiers with entry / byte budgets, TTL and hit / miss counters
+- Shared cache under the in-memory ones (SQLite per host or Redis; survives
+  restarts, shared by workers)
+- Semantic cache: near-duplicate queries reuse hybrid / reranked results
+- Reranker score cache: CrossEncoder scores per (query, product, document text);
+  only uncached pairs of a candidate list run the model
+- Single flight: concurrent identical queries compute each stage once
+- Local payload store: results hydrated without a Qdrant retrieve
+- Micro-batched query embedding (concurrent requests share one model call)
+- Dynamic reranker batching: pairs of concurrent requests scored together in
+  fixed-size batches grouped by length
+- Precomputed document token ids (ONNX reranker): only the query is tokenized
+  per rerank
+- Product ID mapping (string → numeric Qdrant ID): every retriever returns
+  (int32 point ids, float32 scores) arrays, fused with NumPy
+- Dense retrieval: in-process (exact matmul / HNSW) or Qdrant, via DENSE_BACKEND
+- BM25 keyword scoring (native CSR posting-list index)
+- Incremental BM25 updates (segments: add / delete products without a rebuild)
+- BGE Reranker for final ranking (optional but recommended): sentence-transformers
+  or an ONNX Runtime int8 export, via RERANKER_BACKEND
+- Async path: embedding + dense and BM25 retrieval run concurrently
+- Filtered search: price / brand / rating / category predicates applied inside
+  dense and BM25 retrieval (before top-k), not to the final results
+- Adaptive depth (RETRIEVAL_DEPTH=adaptive): shallow retrieval deepened only
+  when the rankers disagree; the reranker is skipped for decisive top-k
+- Batch search: many queries through each stage at once (one embed, one
+  dense / BM25 pass, one payload hydration, large reranker batches)
 """
 
 import os
+import time
+import hashlib
 import pickle
+import asyncio
+import threading
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-from qdrant_client import QdrantClient
+from qdrant_client import QdrantClient, AsyncQdrantClient
 from fastembed import TextEmbedding
-from rank_bm25 import BM25Okapi
-from sentence_transformers import CrossEncoder
 from google.cloud import storage
 
+from models.bm25_segments import SegmentedBM25Index
+from models.text_analyzer import document_text
+from models.dense_backends import create_dense_backend
+from models.rerankers import create_reranker, rerank_text
+from models.doc_tokens import DocTokenStore
+from models.embedding_batcher import EmbeddingBatcher
+from models.rerank_batcher import RerankBatcher
+from models.cache import LRUCache
+from models.single_flight import SingleFlight
+from models.query_cache import create_query_cache, normalize_query
+from models.semantic_cache import SemanticCache
+from models.payload_store import PayloadStore
+from models.product_filter import FilterIndex
+from models.point_ids import PointIdMap
+
 load_dotenv()
 
+
+class SemanticHit:
+    """ Results served by the semantic tier: returned, but not stored under the exact L1 key """
+
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+
 class HybridSearchEngine:
     def __init__(self):
         print("Initializing Hybrid Search Engine")
@@ -30,34 +81,86 @@ class HybridSearchEngine:
             url=os.getenv("QDRANT_URL"),
             api_key=os.getenv("QDRANT_API_KEY"),
         )
+        # Async client for hybrid_search_async (keeps a pool of HTTP connections)
+        self.async_qdrant = AsyncQdrantClient(
+            url=os.getenv("QDRANT_URL"),
+            api_key=os.getenv("QDRANT_API_KEY"),
+        )
         self.collection_name = "amazon-products"
 
+        # CPU stages of the async path (embedding, BM25, in-process dense search)
+        self.executor = ThreadPoolExecutor(max_workers=int(os.getenv("SEARCH_WORKERS", "8")))
+
         # EMBEDDING MODEL
         print("Loading embedder (BGE-small)")
-        self.embedder = TextEmbedding("BAAI/bge-small-en-v1.5")
+        self.embedding_model = "BAAI/bge-small-en-v1.5"
+        self.embedder = TextEmbedding(self.embedding_model)
+        # Concurrent get_embedding calls are coalesced into one embed() call
+        self.embedding_batcher = EmbeddingBatcher(
+            self.embedder,
+            max_batch=int(os.getenv("EMBED_MAX_BATCH", "32")),
+            max_wait_ms=float(os.getenv("EMBED_MAX_WAIT_MS", "2")),
+        )
+
+        # DENSE BACKEND
+        # exact (in-process matmul) | hnsw (in-process graph) | qdrant (network round trip)
+        print("Loading dense backend")
+        dense_kind = os.getenv("DENSE_BACKEND", "exact")
+        dense_path = "cache/dense_index"
+
+        if dense_kind != "qdrant" and not os.path.exists(os.path.join(dense_path, "manifest.json")):
+            if self._is_cloud_environment():
+                print("Dense index not found locally, downloading from GCS")
+                self._download_dir_from_gcs("dense_index")
+            else:
+                print(f"{dense_path}/manifest.json not found, falling back to Qdrant search.\n"
+                      "Run: python scripts/export_embeddings.py")
+                dense_kind = "qdrant"
+
+        self.dense = create_dense_backend(
+            dense_kind, qdrant=self.qdrant, collection_name=self.collection_name, path=dense_path,
+            async_qdrant=self.async_qdrant,
+        )
+        print(f"Dense backend: {self.dense.name}")
 
         # BM25 INDEX
         print("Loading BM25 index")
-        bm25_path = "cache/bm25_index.pkl"
+        bm25_path = "cache/bm25_index"
 
-        if os.path.exists(bm25_path):
+        if os.path.exists(os.path.join(bm25_path, "manifest.json")):
             print(f"Loading BM25 from local cache: {bm25_path}")
         else:
             # Only try GCS if we're in cloud environment
             if self._is_cloud_environment():
                 print("BM25 not found locally, downloading from GCS")
-                self._download_from_gcs("bm25_index.pkl")
+                self._download_dir_from_gcs("bm25_index")
             else:
                 raise FileNotFoundError(
-                    f"{bm25_path} not found!\n"
+                    f"{bm25_path}/manifest.json not found!\n"
                     "For local development, please ensure cache files exist locally.\n"
                     "Run: python scripts/create_bm25_index.py"
                 )
-        
-        with open(bm25_path, "rb") as f:
-            data = pickle.load(f)
-            self.bm25 = data["bm25"]
-            self.bm25_product_ids = data["product_ids"]
+
+        # Memory-mapped: near constant-time open, page cache shared across workers.
+        # Base index + incremental segments; a background thread flushes and merges.
+        self.bm25 = SegmentedBM25Index.open(
+            bm25_path,
+            mmap=True,
+            flush_docs=int(os.getenv("BM25_FLUSH_DOCS", "1000")),
+            flush_interval=float(os.getenv("BM25_FLUSH_INTERVAL", "5")),
+        )
+        # exhaustive | bmw (Block-Max WAND pruning, same top-k) | auto
+        self.bm25_mode = os.getenv("BM25_SEARCH_MODE", "auto")
+
+        # Same analyzer (normalization, stopwords, frozen vocabulary) as the index build
+        if self.bm25.analyzer is None:
+            raise ValueError(
+                f"{bm25_path} was built without a text analyzer.\n"
+                "Run: python scripts/create_bm25_index.py"
+            )
+        self.analyzer = self.bm25.analyzer
+        print(f"BM25 index {self.bm25.index_id}: {self.bm25.num_docs:,} docs, "
+              f"{self.bm25.base.num_terms:,} terms, {self.bm25.num_segments} segments")
 
      
         # PRODUCT ID -> NUMERIC ID MAPPING
@@ -81,18 +184,131 @@ class HybridSearchEngine:
         
         with open(mapping_path, "rb") as f:
             self.product_id_to_idx = pickle.load(f)
+        # BM25 hits are translated to point ids once per segment, not per result
+        self.point_ids = PointIdMap(self.product_id_to_idx)
+
+        # PAYLOAD STORE
+        # Local copy of the Qdrant payloads (row = point id); Qdrant retrieve
+        # serves products the store does not have
+        print("Loading payload store")
+        payload_path = "cache/payload_store"
+        if not os.path.exists(os.path.join(payload_path, "manifest.json")) and self._is_cloud_environment():
+            print("Payload store not found locally, downloading from GCS")
+            self._download_dir_from_gcs("payload_store")
+
+        self.payloads = None
+        # Points re-uploaded by add_products: their store rows are stale
+        self._reuploaded_points = set()
+        if os.path.exists(os.path.join(payload_path, "manifest.json")):
+            self.payloads = PayloadStore.load(payload_path, mmap=True)
+            print(f"Payload store: {self.payloads.num_rows:,} products")
+        else:
+            print(f"{payload_path}/manifest.json not found, hydrating results from Qdrant.\n"
+                  "Run: python scripts/export_embeddings.py --payloads")
+
+        # Filter masks are computed from the payload store columns
+        self.filter_index = None
+        if self.payloads is not None:
+            self.filter_index = FilterIndex(self.payloads, self.point_ids)
 
         # RERANKER MODEL
+        # torch (sentence-transformers CrossEncoder) | onnx (exported model, int8 by default)
         print("Loading BGE CrossEncoder Reranker")
-        self.reranker = CrossEncoder("BAAI/bge-reranker-base", max_length=512, local_files_only=True)
+        self.reranker_model = "BAAI/bge-reranker-base"
+        reranker_kind = os.getenv("RERANKER_BACKEND", "torch")
+        reranker_path = "cache/reranker_onnx"
+
+        if reranker_kind == "onnx" and not os.path.exists(os.path.join(reranker_path, "manifest.json")):
+            if self._is_cloud_environment():
+                print("ONNX reranker not found locally, downloading from GCS")
+                self._download_dir_from_gcs("reranker_onnx")
+            else:
+                print(f"{reranker_path}/manifest.json not found, falling back to the PyTorch reranker.\n"
+                      "Run: python scripts/export_reranker_onnx.py")
+                reranker_kind = "torch"
+
+        self.reranker = create_reranker(reranker_kind, self.reranker_model, path=reranker_path)
+        print(f"Reranker backend: {self.reranker.name}")
+        # Pairs of concurrent rerank calls share CrossEncoder batches of similar length
+        self.rerank_batcher = RerankBatcher(
+            self.reranker,
+            batch_size=int(os.getenv("RERANK_MAX_BATCH", "32")),
+            max_wait_ms=float(os.getenv("RERANK_MAX_WAIT_MS", "5")),
+            buckets=[int(b) for b in os.getenv("RERANK_LENGTH_BUCKETS", "64,128,256,512").split(",")],
+        )
+
+        # Token ids of every product's rerank text, from the index build (ONNX reranker only)
+        self.doc_tokens = None
+        tokens_path = "cache/rerank_doc_tokens"
+        if hasattr(self.reranker, "predict_encoded"):
+            if not os.path.exists(os.path.join(tokens_path, "manifest.json")) and self._is_cloud_environment():
+                print("Document tokens not found locally, downloading from GCS")
+                self._download_dir_from_gcs("rerank_doc_tokens")
+            if os.path.exists(os.path.join(tokens_path, "manifest.json")):
+                store = DocTokenStore.load(tokens_path, mmap=True)
+                if store.matches(self.reranker.tokenizer, self.payloads):
+                    self.doc_tokens = store
+                    print(f"Document tokens: {store.num_rows:,} products (budget {store.budget})")
+                else:
+                    print(f"{tokens_path} was built for another tokenizer or payload store, "
+                          "tokenizing documents per rerank.\nRun: python scripts/build_doc_tokens.py")
+
+        # CANDIDATE DEPTH
+        # fixed: 50 dense + 50 BM25 candidates, always reranked
+        # adaptive: start at ADAPTIVE_MIN_DEPTH and double (up to ADAPTIVE_MAX_DEPTH)
+        # while the rankers disagree; skip the reranker when the fused top-k
+        # leads the next candidate by RERANK_SKIP_MARGIN
+        self.adaptive = os.getenv("RETRIEVAL_DEPTH", "fixed") == "adaptive"
+        self.min_depth = int(os.getenv("ADAPTIVE_MIN_DEPTH", "20"))
+        self.max_depth = int(os.getenv("ADAPTIVE_MAX_DEPTH", "50"))
+        self.min_overlap = float(os.getenv("ADAPTIVE_MIN_OVERLAP", "0.5"))
+        self.rerank_skip_margin = float(os.getenv("RERANK_SKIP_MARGIN", "0.15"))
+        self.adaptive_stats = {"searches": 0, "deepened": 0, "depth_total": 0, "reranks": 0, "rerank_skipped": 0}
+        self._adaptive_lock = threading.Lock()
 
         # CACHES
-        self._embedding_cache = {}
-        self._dense_cache = {}
-        self._bm25_cache = {}
-        self._hybrid_cache = {}
+        # L1: in-process LRU per tier, bounded by entries and bytes (models/cache.py).
+        # Embeddings never go stale; results expire after CACHE_TTL_SECONDS (0 = never)
+        max_entries = int(os.getenv("CACHE_MAX_ENTRIES", "1000"))
+        ttl = float(os.getenv("CACHE_TTL_SECONDS", "0")) or None
+        def budget(tier, mb):
+            return int(float(os.getenv(f"{tier.upper()}_CACHE_MB", mb)) * 2**20)
 
-        self.max_cache_size = 1000  # LRU-like capacity
+        self._embedding_cache = LRUCache("embedding", max_entries, budget("embedding", 8))
+        self._dense_cache = LRUCache("dense", max_entries, budget("dense", 16), ttl)
+        self._bm25_cache = LRUCache("bm25", max_entries, budget("bm25", 16), ttl)
+        self._hybrid_cache = LRUCache("hybrid", max_entries, budget("hybrid", 64), ttl)
+        # One float per (query, candidate) pair: many more entries than the other tiers.
+        # Scores only change with the document text, which is part of the key
+        self._rerank_cache = LRUCache("rerank", int(os.getenv("RERANK_CACHE_ENTRIES", "50000")),
+                                      budget("rerank", 16))
+        # Identical in-flight work per stage is computed once (models/single_flight.py)
+        self._flights = {stage: SingleFlight(stage) for stage in ("embedding", "dense", "bm25", "hybrid", "rerank")}
+
+        # L2: cache shared by all workers, keyed by normalized query + index version.
+        # sqlite: one file per host (QUERY_CACHE_PATH, "" disables); redis: QUERY_CACHE_URL
+        self.query_cache = create_query_cache(
+            os.getenv("QUERY_CACHE_BACKEND", "sqlite"),
+            path=os.getenv("QUERY_CACHE_PATH", "cache/query_cache.db"),
+            url=os.getenv("QUERY_CACHE_URL", "redis://localhost:6379/0"),
+            max_entries=int(os.getenv("QUERY_CACHE_MAX_ENTRIES", "200000")),
+        )
+        if self.query_cache is not None:
+            self.query_cache.prune(self._cache_versions())
+
+        # Semantic cache: results of a prior query whose embedding is at least
+        # this cosine-similar are reused. Off ("") until a threshold is measured
+        # with scripts/tune_semantic_cache.py
+        threshold = os.getenv("SEMANTIC_CACHE_THRESHOLD", "")
+        self.semantic_caches = {}
+        if threshold:
+            for kind in ("hybrid", "rerank"):
+                self.semantic_caches[kind] = SemanticCache(
+                    dim=384,
+                    capacity=int(os.getenv("SEMANTIC_CACHE_SIZE", "5000")),
+                    threshold=float(threshold),
+                    audit_rate=float(os.getenv("SEMANTIC_CACHE_AUDIT_RATE", "0.05")),
+                )
 
         print("Ready with Hybrid Search + Reranker!\n")
 
@@ -125,138 +341,628 @@ class HybridSearchEngine:
             print(f"✗ Failed to download {filename}: {e}")
             raise
 
-    # CACHED EMBEDDING
-    def get_embedding(self, query: str):
-        if query not in self._embedding_cache:
-            emb = list(self.embedder.embed([query]))[0]
-            self._embedding_cache[query] = emb
+    def _download_dir_from_gcs(self, dirname):
+        """Download every file under cache/<dirname>/ from GCS (only in cloud environment)"""
+        try:
+            from google.cloud import storage
 
-            # Limit cache size
-            if len(self._embedding_cache) > self.max_cache_size:
-                oldest = next(iter(self._embedding_cache))
-                del self._embedding_cache[oldest]
+            bucket_name = os.getenv("GCS_BUCKET_NAME")
+            storage_client = storage.Client()
+            bucket = storage_client.bucket(bucket_name)
 
-        return self._embedding_cache[query]
+            os.makedirs(f"cache/{dirname}", exist_ok=True)
+            blobs = bucket.list_blobs(prefix=f"cache/{dirname}/")
+            # manifest.json last so a partial download is never taken as complete
+            for blob in sorted(blobs, key=lambda b: b.name.endswith("manifest.json")):
+                if blob.name.endswith("/"):
+                    continue
+                blob.download_to_filename(os.path.join("cache", dirname, os.path.basename(blob.name)))
 
-    # DENSE SEARCH (QDRANT)
-    def dense_search(self, query: str, top_k: int = 50):
-        cache_key = f"dense::{query}::{top_k}"
+            print(f"✓ Downloaded {dirname}/ from GCS")
+        except Exception as e:
+            print(f"✗ Failed to download {dirname}/: {e}")
+            raise
+
+    # PERSISTENT (L2) CACHE
+    def _cache_versions(self):
+        """ Index version per cache namespace: results are only reused within a version """
+        dense = self.dense.version
+        if self.dense.name == "qdrant" and self.payloads is not None:
+            # Written by the upload that filled the collection (scripts/upload_to_qdrant.py)
+            dense = f"{dense}|{self.payloads.index_id}"
+        return {
+            "embedding": self.embedding_model,
+            # (point ids, scores) arrays
+            "dense": f"{dense}|ids",
+            "bm25": f"{self.bm25.version}|ids",
+            "hybrid": f"{self.dense.version}|{self.bm25.version}|"
+                      f"{self.payloads.index_id if self.payloads is not None else 'qdrant'}",
+        }
+
+    def _disk_get(self, namespace, query, params=()):
+        if self.query_cache is None:
+            return None
+        return self.query_cache.get(namespace, self._cache_versions()[namespace], query, params)
 
-        if cache_key not in self._dense_cache:
-            vector = self.get_embedding(query)
+    def _disk_set(self, namespace, query, value, params=()):
+        if self.query_cache is not None:
+            self.query_cache.set(namespace, self._cache_versions()[namespace], query, value, params)
 
-            results = self.qdrant.query_points(
-                collection_name=self.collection_name,
-                query=vector.tolist(),
-                limit=top_k
+    # FILTERS
+    def _bind_filters(self, filters):
+        """ ProductFilter -> BoundFilter resolved on the local data (None = unfiltered) """
+        if filters is None or filters.is_empty:
+            return None
+        if self.filter_index is None:
+            raise ValueError(
+                "Filtered search needs the local payload store (cache/payload_store).\n"
+                "Run: python scripts/export_embeddings.py --payloads"
             )
+        return self.filter_index.bind(filters)
+
+    @staticmethod
+    def _filter_key(flt):
+        """ Cache key suffix of filtered results ("" keeps unfiltered keys unchanged) """
+        return "" if flt is None else f"::{flt.key}"
+
+    @staticmethod
+    def _filter_params(flt):
+        return () if flt is None else (flt.key,)
+
+    def _depth_params(self):
+        """ Adaptive results differ from fixed-depth ones: part of their cache keys """
+        if not self.adaptive:
+            return ()
+        return (f"adaptive:{self.min_depth}-{self.max_depth}-{self.min_overlap}-{self.rerank_skip_margin}",)
+
+    def _hybrid_key(self, query, top_k, alpha, flt):
+        """ (L1 cache key, L2 / semantic params) of hybrid results """
+        tags = self._filter_params(flt) + self._depth_params()
+        return f"hybrid::{query}::{top_k}::{alpha}" + "".join(f"::{t}" for t in tags), (top_k, alpha) + tags
+
+    @staticmethod
+    def _candidates_param(results):
+        """ Rerank cache parameter naming the candidates: reranked results only apply to the same list """
+        digest = hashlib.sha1("\n".join(r["product_id"] for r in results).encode()).hexdigest()[:16]
+        return f"candidates:{digest}"
+
+    def hybrid_cache_key(self, query: str, top_k: int = 20, alpha: float = 0.65, filters=None):
+        return self._hybrid_key(query, top_k, alpha, self._bind_filters(filters))[0]
+
+    # SEMANTIC CACHE
+    def _semantic_version(self, kind):
+        version = self._cache_versions()["hybrid"]
+        # int8 scores differ slightly from torch ones: reranked results are per backend
+        return f"{version}|{self.reranker_model}|{self.reranker.name}" if kind == "rerank" else version
+
+    def _semantic_get(self, kind, query, params):
+        """ Cached results of the same normalized query, else of a near-duplicate one """
+        cache = self.semantic_caches.get(kind)
+        if cache is None:
+            return None
+        version = self._semantic_version(kind)
+        value = cache.get(query, params, version)
+        if value is None:
+            value = cache.nearest(query, self.get_embedding(query), params, version)
+        return value
+
+    def _semantic_put(self, kind, query, params, value):
+        cache = self.semantic_caches.get(kind)
+        if cache is not None:
+            cache.put(query, self.get_embedding(query), params, value, self._semantic_version(kind))
+
+    # SINGLE FLIGHT
+    def _cached(self, stage, cache, key, compute):
+        """
+        cache[key], else compute() run once for all concurrent callers of key
+        (the first caller computes and caches, the others wait for its result).
+        A SemanticHit from compute() is returned without being cached: a
+        similarity match is not an exact hit for key.
+        """
+        value = cache.get(key)
+        if value is None:
+            def lead():
+                value = compute()
+                if isinstance(value, SemanticHit):
+                    return value.value
+                cache.put(key, value)
+                return value
+            value = self._flights[stage].do(key, lead)
+        return value
+
+    async def _cached_async(self, stage, cache, key, compute):
+        """ _cached() for the async path: compute is an async function """
+        value = cache.get(key)
+        if value is None:
+            async def lead():
+                value = await compute()
+                if isinstance(value, SemanticHit):
+                    return value.value
+                cache.put(key, value)
+                return value
+            value = await self._flights[stage].do_async(key, lead)
+        return value
+
+    # CACHED EMBEDDING
+    def get_embedding(self, query: str):
+        def compute():
+            emb = self._disk_get("embedding", query)
+            if emb is None:
+                emb = self.embedding_batcher.embed(query)
+                self._disk_set("embedding", query, emb)
+            return emb
 
-            scores = {}
-            for r in results.points:
-                scores[r.payload["product_id"]] = r.score
+        return self._cached("embedding", self._embedding_cache, query, compute)
 
-            # Cache
-            self._dense_cache[cache_key] = scores
+    # DENSE SEARCH
+    def dense_search(self, query: str, top_k: int = 50, filters=None):
+        """ (int32 point ids, float32 cosine scores), best first """
+        flt = self._bind_filters(filters)
+        cache_key = f"dense::{query}::{top_k}{self._filter_key(flt)}"
+        params = (top_k,) + self._filter_params(flt)
 
-            if len(self._dense_cache) > self.max_cache_size:
-                oldest = next(iter(self._dense_cache))
-                del self._dense_cache[oldest]
+        def compute():
+            hits = self._disk_get("dense", query, params)
+            if hits is None:
+                vector = self.get_embedding(query)
+                hits = self.dense.search(vector, top_k, filters=flt)
+                self._disk_set("dense", query, hits, params)
+            return hits
 
-        return self._dense_cache[cache_key]
+        return self._cached("dense", self._dense_cache, cache_key, compute)
 
     # BM25 SEARCH
-    def bm25_search(self, query: str, top_k: int = 50):
-        cache_key = f"bm25::{query}::{top_k}"
+    def bm25_search(self, query: str, top_k: int = 50, filters=None):
+        """ (int32 point ids, float32 scores / best score), best first """
+        flt = self._bind_filters(filters)
+        cache_key = f"bm25::{query}::{top_k}{self._filter_key(flt)}"
+        params = (top_k,) + self._filter_params(flt)
 
-        if cache_key not in self._bm25_cache:
-            tokens = query.lower().split()
-            bm25_scores = self.bm25.get_scores(tokens)
+        def compute():
+            hits = self._disk_get("bm25", query, params)
+            if hits is None:
+                term_ids = self.analyzer.term_ids(query)
+                hits = self._normalize_bm25(*self.bm25.search_terms(
+                    term_ids, top_k, mode=self.bm25_mode, doc_filter=flt, point_ids=self.point_ids
+                ))
+                self._disk_set("bm25", query, hits, params)
+            return hits
 
-            top_idx = np.argsort(bm25_scores)[-top_k:][::-1]
-            max_score = bm25_scores[top_idx[0]] if len(top_idx) else 1.0
+        return self._cached("bm25", self._bm25_cache, cache_key, compute)
 
-            scores = {}
-            for idx in top_idx:
-                pid = self.bm25_product_ids[idx]
-                scores[pid] = float(bm25_scores[idx] / max_score)
+    def bm25_search_batch(self, queries: list, top_k: int = 50, filters=None):
+        """
+        bm25_search() for many queries in one pass: cache lookups, the segment
+        snapshot, product id decode and normalization are shared by the batch.
+        Returns one (point ids, scores) pair per query, in order.
+        """
+        flt = self._bind_filters(filters)
+        suffix, params = self._filter_key(flt), (top_k,) + self._filter_params(flt)
+
+        found = {}
+        for query in queries:
+            cached = self._bm25_cache.get(f"bm25::{query}::{top_k}{suffix}")
+            if cached is not None:
+                found[query] = cached
+
+        missing = [q for q in dict.fromkeys(queries) if q not in found]
+        if missing and self.query_cache is not None:
+            version = self.bm25.version
+            for query, scores in zip(missing, self.query_cache.get_many("bm25", version, missing, params)):
+                if scores is not None:
+                    found[query] = scores
+                    self._bm25_cache.put(f"bm25::{query}::{top_k}{suffix}", scores)
+            missing = [q for q in missing if q not in found]
+
+        if missing:
+            version = self.bm25.version
+            batch = self.bm25.search_batch([self.analyzer.term_ids(q) for q in missing], top_k,
+                                           mode=self.bm25_mode, doc_filter=flt, point_ids=self.point_ids)
+
+            for query, (top_ids, top_scores) in zip(missing, batch):
+                found[query] = self._normalize_bm25(top_ids, top_scores)
 
-            # Cache
-            self._bm25_cache[cache_key] = scores
+                # Cache
+                self._bm25_cache.put(f"bm25::{query}::{top_k}{suffix}", found[query])
 
-            if len(self._bm25_cache) > self.max_cache_size:
-                oldest = next(iter(self._bm25_cache))
-                del self._bm25_cache[oldest]
+            if self.query_cache is not None:
+                self.query_cache.set_many("bm25", version, {q: found[q] for q in missing}, params)
+
+        return [found[q] for q in queries]
+
+    @staticmethod
+    def _normalize_bm25(top_ids, top_scores):
+        """ (point ids, score / best score) """
+        max_score = top_scores[0] if len(top_scores) else 1.0
+        return top_ids, (top_scores / max_score).astype(np.float32)
+
+    # INCREMENTAL BM25 UPDATES
+    def add_products(self, products: list):
+        """
+        Index new or changed products in BM25 (searchable immediately).
+        products: dicts with product_id, title, abstracted_summary, description
+        and optionally point_id (numeric Qdrant ID of the uploaded point).
+        Raises RuntimeError when other processes (API workers) share the index.
+        """
+        self.bm25.check_writable()
+        for product in products:
+            pid = str(product["product_id"])
+            tokens = self.analyzer.tokenize(document_text(product))
+            self.bm25.add(pid, self.analyzer.encode(tokens), len(tokens))
 
-        return self._bm25_cache[cache_key]
+            if product.get("point_id") is not None:
+                self.product_id_to_idx[pid] = product["point_id"]
+                self._reuploaded_points.add(int(product["point_id"]))
+
+        # Cached results no longer reflect the index
+        self._bm25_cache.clear()
+        self._hybrid_cache.clear()
+        return len(products)
+
+    def delete_products(self, product_ids: list):
+        """ Remove products from BM25; returns how many were indexed (see add_products) """
+        self.bm25.check_writable()
+        deleted = sum(self.bm25.delete(str(pid)) for pid in product_ids)
+
+        self._bm25_cache.clear()
+        self._hybrid_cache.clear()
+        return deleted
 
     # HYBRID SEARCH (BM25 + DENSE)
-    def hybrid_search(self, query: str, top_k: int = 20, alpha: float = 0.65):
+    def hybrid_search(self, query: str, top_k: int = 20, alpha: float = 0.65, filters=None):
         """
         alpha = weight for dense search
         (1 - alpha) = weight for BM25
+        filters: optional ProductFilter; both retrievers only return eligible products
+        The dense and BM25 score arrays are cached without alpha / top_k, so
+        another alpha or top_k only re-runs fusion and hydration.
         """
-        cache_key = f"hybrid::{query}::{top_k}::{alpha}"
-
-        if cache_key not in self._hybrid_cache:
-            dense = self.dense_search(query, 50)
-            bm25 = self.bm25_search(query, 50)
-
-            all_ids = set(dense.keys()) | set(bm25.keys())
-
-            hybrid_scores = {}
-            for pid in all_ids:
-                hybrid_scores[pid] = alpha * dense.get(pid, 0) + (1 - alpha) * bm25.get(pid, 0)
-
-            ranked = sorted(hybrid_scores.items(), key=lambda x: x[1], reverse=True)[:top_k]
-
-            # Convert product IDs → numeric Qdrant IDs
-            numeric_ids = [
-                self.product_id_to_idx[pid]
-                for pid, _ in ranked
-                if pid in self.product_id_to_idx
-            ]
-
-            points = self.qdrant.retrieve(self.collection_name, ids=numeric_ids)
-
-            results = []
-            for point in points:
-                p = point.payload
-                results.append({
-                    "product_id": p["product_id"],
-                    "hybrid_score": hybrid_scores[p["product_id"]],
-                    "title": p["title"],
-                    "brand": p["brand"],
-                    "price": p["price"],
-                    "avg_rating": p["avg_rating"],
-                    "review_count": p["review_count"],
-                    "sentiment_score": p["sentiment_score"],
-                    "abstracted_summary": p["abstracted_summary"],
-                    "aspects": p["aspects"],
-                })
-
-            results.sort(key=lambda x: x["hybrid_score"], reverse=True)
-            self._hybrid_cache[cache_key] = results
-
-            if len(self._hybrid_cache) > self.max_cache_size:
-                oldest = next(iter(self._hybrid_cache))
-                del self._hybrid_cache[oldest]
-
-        return self._hybrid_cache[cache_key]
+        flt = self._bind_filters(filters)
+        cache_key, params = self._hybrid_key(query, top_k, alpha, flt)
+
+        def compute():
+            results = self._disk_get("hybrid", query, params)
+            if results is None:
+                results = self._semantic_get("hybrid", query, params)
+                if results is not None:
+                    return SemanticHit(results)
+            if results is None:
+                dense, bm25 = self._retrieve(query, top_k, alpha, filters)
+
+                ids, scores = self._fuse(dense, bm25, top_k, alpha)
+                results = self._to_results(ids, scores, self.get_payloads(ids), flt)
+                self._disk_set("hybrid", query, results, params)
+                self._semantic_put("hybrid", query, params, results)
+            return results
+
+        return self._cached("hybrid", self._hybrid_cache, cache_key, compute)
+
+    # ADAPTIVE DEPTH
+    def _retrieve(self, query, top_k, alpha, filters=None):
+        """ Dense and BM25 candidates: 50 each, or adaptive depth """
+        if not self.adaptive:
+            return self.dense_search(query, 50, filters), self.bm25_search(query, 50, filters)
+
+        depth = self.min_depth
+        while True:
+            dense = self.dense_search(query, depth, filters)
+            bm25 = self.bm25_search(query, depth, filters)
+            if depth >= self.max_depth or self._rankers_agree(dense, bm25, depth, top_k, alpha):
+                self._record_depth(depth)
+                return dense, bm25
+            depth = min(depth * 2, self.max_depth)
+
+    def _rankers_agree(self, dense, bm25, depth, top_k, alpha):
+        """
+        Deeper retrieval is unlikely to change the fused top_k when either
+        - the two top_k lists overlap by at least ADAPTIVE_MIN_OVERLAP, or
+        - the fused top_k-th score beats the best score a product missing from
+          both lists could reach (alpha * last dense + (1 - alpha) * last BM25).
+        A list shorter than depth is exhausted: its unseen products score 0.
+        """
+        (dense_ids, dense_scores), (bm25_ids, bm25_scores) = dense, bm25
+        k = min(top_k, depth)
+
+        shared = len(np.intersect1d(dense_ids[:k], bm25_ids[:k], assume_unique=True))
+        if shared >= self.min_overlap * k:
+            return True
+
+        _, fused = self._fuse(dense, bm25, top_k, alpha)
+        unseen = (alpha * (dense_scores[-1] if len(dense_ids) >= depth else 0.0)
+                  + (1 - alpha) * (bm25_scores[-1] if len(bm25_ids) >= depth else 0.0))
+        return len(fused) == top_k and fused[-1] >= unseen
+
+    def _count_adaptive(self, **increments):
+        """ Add to adaptive_stats (updated from request and executor threads) """
+        with self._adaptive_lock:
+            for name, n in increments.items():
+                self.adaptive_stats[name] += n
+
+    def _record_depth(self, depth):
+        self._count_adaptive(searches=1, depth_total=depth, deepened=int(depth > self.min_depth))
+
+    def _is_decisive(self, results, top_k):
+        """ The fused top_k leads the next candidate by RERANK_SKIP_MARGIN """
+        if not self.adaptive or len(results) <= top_k:
+            return False
+        return results[top_k - 1]["hybrid_score"] - results[top_k]["hybrid_score"] >= self.rerank_skip_margin
+
+    def get_adaptive_stats(self):
+        with self._adaptive_lock:
+            stats = dict(self.adaptive_stats)
+        return {
+            "mode": "adaptive" if self.adaptive else "fixed",
+            "searches": stats["searches"],
+            "deepened_rate": stats["deepened"] / stats["searches"] if stats["searches"] else 0.0,
+            "mean_depth": stats["depth_total"] / stats["searches"] if stats["searches"] else 50,
+            "rerank_skip_rate": stats["rerank_skipped"] / stats["reranks"] if stats["reranks"] else 0.0,
+        }
+
+    # PAYLOADS
+    def get_payloads(self, point_ids):
+        """
+        {point id: Qdrant payload}, from the local payload store when it has
+        the point (O(k) memory-mapped reads), else one Qdrant retrieve.
+        """
+        payloads, remote = self._local_payloads(point_ids)
+        if remote:
+            points = self.qdrant.retrieve(self.collection_name, ids=remote)
+            payloads.update((point.id, point.payload) for point in points)
+        return payloads
+
+    async def get_payloads_async(self, point_ids):
+        payloads, remote = self._local_payloads(point_ids)
+        if remote:
+            points = await self.async_qdrant.retrieve(self.collection_name, ids=remote)
+            payloads.update((point.id, point.payload) for point in points)
+        return payloads
+
+    def _local_payloads(self, point_ids):
+        """ ({point id: payload} from the payload store, point ids to retrieve from Qdrant) """
+        point_ids = [int(p) for p in point_ids]
+        if self.payloads is None:
+            return {}, point_ids
+
+        local = [p for p in point_ids if p < self.payloads.num_rows and p not in self._reuploaded_points]
+        payloads = dict(zip(local, self.payloads.get(local)))
+        return payloads, [p for p in point_ids if p not in payloads]
+
+    @staticmethod
+    def _fuse(dense, bm25, top_k, alpha):
+        """
+        alpha * dense + (1 - alpha) * bm25 over the union of both candidate
+        lists (a product missing from one list scores 0 there).
+        Returns the top_k (point ids, hybrid scores), best first; ties go to
+        the lower point id.
+        """
+        (dense_ids, dense_scores), (bm25_ids, bm25_scores) = dense, bm25
+
+        ids, slots = np.unique(np.concatenate([dense_ids, bm25_ids]), return_inverse=True)
+        weights = np.concatenate([alpha * dense_scores.astype(np.float64),
+                                  (1 - alpha) * bm25_scores.astype(np.float64)])
+        hybrid = np.bincount(slots.ravel(), weights=weights, minlength=len(ids))
+
+        top = np.argsort(-hybrid, kind="stable")[:top_k]
+        return ids[top], hybrid[top]
+
+    @staticmethod
+    def _to_results(ids, scores, payloads, flt=None):
+        """ Result dicts in fused order; points without a payload are skipped """
+        results = []
+        for point, score in zip(ids.tolist(), scores.tolist()):
+            p = payloads.get(point)
+            # Payloads fetched from Qdrant (products newer than the store) are checked here
+            if p is None or (flt is not None and not flt.filter.allows(p)):
+                continue
+            results.append({
+                "product_id": p["product_id"],
+                "hybrid_score": score,
+                "title": p["title"],
+                "brand": p["brand"],
+                "price": p["price"],
+                "avg_rating": p["avg_rating"],
+                "review_count": p["review_count"],
+                "sentiment_score": p["sentiment_score"],
+                "abstracted_summary": p["abstracted_summary"],
+                "aspects": p["aspects"],
+            })
+        return results
+
+    # ASYNC HYBRID SEARCH
+    async def _run(self, fn, *args):
+        """ Run blocking work in the engine's executor """
+        return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+
+    async def _dense_search_async(self, query, top_k, timings, filters=None):
+        """ dense_search() for the async path; the query embedding is already cached """
+        start = time.perf_counter()
+        flt = self._bind_filters(filters)
+        cache_key = f"dense::{query}::{top_k}{self._filter_key(flt)}"
+        params = (top_k,) + self._filter_params(flt)
+        if cache_key in self._dense_cache or not hasattr(self.dense, "search_async"):
+            # In-process backend: CPU work, same as the sync path
+            hits = await self._run(self.dense_search, query, top_k, filters)
+        else:
+            # Qdrant backend: await the network round trip on the event loop
+            async def compute():
+                hits = await self._run(self._disk_get, "dense", query, params)
+                if hits is None:
+                    hits = await self.dense.search_async(self.get_embedding(query), top_k, filters=flt)
+                    await self._run(self._disk_set, "dense", query, hits, params)
+                return hits
+
+            hits = await self._cached_async("dense", self._dense_cache, cache_key, compute)
+        timings["dense"] = timings.get("dense", 0) + time.perf_counter() - start
+        return hits
+
+    async def _bm25_search_async(self, query, top_k, timings, filters=None):
+        start = time.perf_counter()
+        hits = await self._run(self.bm25_search, query, top_k, filters)
+        timings["bm25"] = timings.get("bm25", 0) + time.perf_counter() - start
+        return hits
+
+    async def hybrid_search_async(self, query: str, top_k: int = 20, alpha: float = 0.65, timings: dict = None,
+                                  filters=None):
+        """
+        hybrid_search() with the retrieval stages overlapped: embedding + dense
+        retrieval and BM25 run concurrently (CPU work in the executor, Qdrant
+        calls on the async client), so latency is the slowest stage instead of
+        the sum. Same caches and results as hybrid_search.
+        timings, if given, receives seconds per stage (embedding, dense, bm25, fusion).
+        """
+        timings = {} if timings is None else timings
+        flt = self._bind_filters(filters)
+        cache_key, params = self._hybrid_key(query, top_k, alpha, flt)
+
+        async def compute():
+            results = await self._run(self._disk_get, "hybrid", query, params)
+            if results is None:
+                # BM25 runs while the query is embedded and searched densely
+                depth = self.min_depth if self.adaptive else 50
+                bm25_task = asyncio.ensure_future(self._bm25_search_async(query, depth, timings, filters))
+                try:
+                    start = time.perf_counter()
+                    await self._run(self.get_embedding, query)
+                    timings["embedding"] = time.perf_counter() - start
+
+                    results = await self._run(self._semantic_get, "hybrid", query, params)
+                    if results is None:
+                        dense = await self._dense_search_async(query, depth, timings, filters)
+                        bm25 = await bm25_task
+
+                        while self.adaptive:
+                            if depth >= self.max_depth or self._rankers_agree(dense, bm25, depth, top_k, alpha):
+                                self._record_depth(depth)
+                                break
+                            depth = min(depth * 2, self.max_depth)
+                            dense, bm25 = await asyncio.gather(
+                                self._dense_search_async(query, depth, timings, filters),
+                                self._bm25_search_async(query, depth, timings, filters),
+                            )
+                finally:
+                    # Semantic hit or a failed stage: BM25 is not awaited. Cancel it
+                    # (the executor thread still finishes and caches it), or mark a
+                    # finished task's exception as retrieved
+                    if not bm25_task.done():
+                        bm25_task.cancel()
+                    elif not bm25_task.cancelled():
+                        bm25_task.exception()
+                if results is not None:
+                    return SemanticHit(results)
+
+            if results is None:
+                start = time.perf_counter()
+                ids, scores = self._fuse(dense, bm25, top_k, alpha)
+                results = self._to_results(ids, scores, await self.get_payloads_async(ids), flt)
+                timings["fusion"] = time.perf_counter() - start
+
+                await self._run(self._disk_set, "hybrid", query, results, params)
+                await self._run(self._semantic_put, "hybrid", query, params, results)
+            return results
+
+        return await self._cached_async("hybrid", self._hybrid_cache, cache_key, compute)
+
+    # RERANKER SCORE CACHE
+    def _score_pairs(self, items, batch_size: int = None):
+        """
+        CrossEncoder scores of (query, candidate) items. Scores are cached per
+        (normalized query, product id, document text hash), so a repeated query,
+        another top_k or an overlapping candidate list only scores the new pairs.
+        Uncached pairs go through the rerank batcher: shared with concurrent
+        requests, or as one bulk job in batch_size chunks when given.
+        Returns (float32 scores, bool mask of the pairs served from cache).
+        """
+        scores = np.empty(len(items), dtype=np.float32)
+        cached = np.ones(len(items), dtype=bool)
+        missing, keys, pairs = [], [], []
+        for i, (query, r) in enumerate(items):
+            doc = rerank_text(r)
+            key = (normalize_query(query), r["product_id"], hash(doc))
+            score = self._rerank_cache.get(key)
+            if score is not None:
+                scores[i] = score
+                continue
+            missing.append(i)
+            keys.append(key)
+            pairs.append([query, doc])
+
+        if pairs:
+            inputs = pairs
+            if self.doc_tokens is not None:
+                inputs = self._encode_pairs(pairs, [items[i][1] for i in missing])
+            # The batcher's worker thread is the only caller of the model
+            computed = self.rerank_batcher.score(inputs, batch_size=batch_size)
+            for i, key, score in zip(missing, keys, computed):
+                scores[i] = score
+                self._rerank_cache.put(key, float(score))
+            cached[missing] = False
+        return scores, cached
+
+    def _encode_pairs(self, pairs, results):
+        """
+        Reranker inputs of [query, doc] pairs from the precomputed document tokens:
+        each query is tokenized once. Products the store does not cover (re-uploaded
+        or added since the build) are tokenized from their text.
+        """
+        tokenizer = self.reranker.tokenizer
+        rows = self.point_ids.of([r["product_id"] for r in results])
+        covered = [0 <= row < self.doc_tokens.num_rows and row not in self._reuploaded_points for row in rows]
+        stored = iter(self.doc_tokens.get([row for row, ok in zip(rows, covered) if ok]))
+        fresh = iter(tokenizer.encode_docs([doc for (_, doc), ok in zip(pairs, covered) if not ok],
+                                           self.doc_tokens.budget))
+        doc_ids = [next(stored) if ok else next(fresh) for ok in covered]
+
+        by_query = {}
+        for i, (query, _) in enumerate(pairs):
+            by_query.setdefault(query, []).append(i)
+        inputs = [None] * len(pairs)
+        for query, positions in by_query.items():
+            for i, encoded in zip(positions, tokenizer.encode_pairs(query, [doc_ids[i] for i in positions])):
+                inputs[i] = encoded
+        return inputs
 
     # RERANKING (CrossEncoder)
-    def rerank(self, query: str, results: list, top_k: int = 3):
-        """ Apply the CrossEncoder BGE-Reranker """
+    def rerank(self, query: str, results: list, top_k: int = 3, filters=None, stats=None):
+        """
+        Apply the CrossEncoder BGE-Reranker
+        filters: the ProductFilter the candidates were retrieved with (part of the cache key)
+        stats: optional dict, filled with the pairs scored and how many came from
+        the score cache (left empty when no pair was scored)
+        In adaptive mode a decisive fused top_k is returned in fused order
+        without running the CrossEncoder (no rerank_score).
+        """
         if not results:
             return []
 
-        pairs = []
-        for r in results:
-            doc = f"{r['title']} {r['abstracted_summary']}"
-            pairs.append([query, doc])
+        decisive = self._is_decisive(results, top_k)
+        self._count_adaptive(reranks=1, rerank_skipped=int(decisive))
+        if decisive:
+            return self._rank_fused(results, top_k)
+
+        # Reranked results of the same or a near-duplicate query, over the same candidates
+        params = ((top_k,) + self._filter_params(self._bind_filters(filters)) + self._depth_params()
+                  + (self._candidates_param(results),))
+        cached = self._semantic_get("rerank", query, params)
+        if cached is not None:
+            return cached
+
+        def compute():
+            rerank_scores, cached = self._score_pairs([(query, r) for r in results])
+            print(f"  Reranked {len(results)} candidates with BGE-Reranker ({int(cached.sum())} cached)")
+            if stats is not None:
+                stats.update(pairs=len(results), cached=int(cached.sum()))
 
-        print(f"  Reranking {len(pairs)} candidates with BGE-Reranker...")
-        rerank_scores = self.reranker.predict(pairs)
+            final = self._rank_reranked(results, rerank_scores, top_k)
+            self._semantic_put("rerank", query, params, final)
+            return final
 
+        # Concurrent reranks of the same query and candidates run the CrossEncoder once
+        key = (query, params)
+        return self._flights["rerank"].do(key, compute)
+
+    @staticmethod
+    def _rank_reranked(results, rerank_scores, top_k):
+        """ Combine CrossEncoder scores with sentiment and popularity; top_k with ranks (copies: the candidates are cached) """
         combined = []
         for i, r in enumerate(results):
             combined_score = (
@@ -268,33 +974,243 @@ class HybridSearchEngine:
 
         combined.sort(key=lambda x: x[0], reverse=True)
 
-        final = []
-        for i, (score, r) in enumerate(combined[:top_k], 1):
-            r["rerank_score"] = score
-            r["rank"] = i
-            final.append(r)
+        return [dict(r, rerank_score=score, rank=i) for i, (score, r) in enumerate(combined[:top_k], 1)]
 
-        return final
+    @staticmethod
+    def _rank_fused(results, top_k):
+        """ Top_k in hybrid order with ranks (copies: the candidates are cached) """
+        return [dict(r, rank=i) for i, r in enumerate(results[:top_k], 1)]
 
     # FINAL SEARCH PIPELINE
-    def search(self, query: str, top_k: int = 3, use_reranker: bool = True):
+    def search(self, query: str, top_k: int = 3, use_reranker: bool = True, filters=None):
         """
         Unified search interface:
-        1. Hybrid Retrieval (20 candidates)
+        1. Hybrid Retrieval (20 candidates, optionally filtered)
         2. Optional Reranking (CrossEncoder)
         """
-        candidates = self.hybrid_search(query, top_k=20, alpha=0.65)
+        candidates = self.hybrid_search(query, top_k=20, alpha=0.65, filters=filters)
 
         if use_reranker:
-            return self.rerank(query, candidates, top_k=top_k)
+            return self.rerank(query, candidates, top_k=top_k, filters=filters)
 
         return candidates[:top_k]
 
+    # BATCH SEARCH
+    def get_embeddings(self, queries: list):
+        """ get_embedding() for many queries: uncached ones are embedded in one model call """
+        vectors = {}
+        for query in dict.fromkeys(queries):
+            emb = self._embedding_cache.get(query)
+            if emb is not None:
+                vectors[query] = emb
+
+        missing = [q for q in dict.fromkeys(queries) if q not in vectors]
+        if missing and self.query_cache is not None:
+            for query, emb in zip(missing, self.query_cache.get_many("embedding", self.embedding_model, missing)):
+                if emb is not None:
+                    vectors[query] = emb
+            missing = [q for q in missing if q not in vectors]
+
+        if missing:
+            # A bulk job on the batcher's worker thread, the only caller of the model
+            embedded = self.embedding_batcher.embed_many(missing, batch_size=int(os.getenv("EMBED_BATCH_SIZE", "256")))
+            vectors.update(zip(missing, embedded))
+            if self.query_cache is not None:
+                self.query_cache.set_many("embedding", self.embedding_model, dict(zip(missing, embedded)))
+
+        for query in dict.fromkeys(queries):
+            self._embedding_cache.put(query, vectors[query])
+        return [vectors[q] for q in queries]
+
+    def dense_search_batch(self, queries: list, top_k: int = 50, filters=None):
+        """
+        dense_search() for many queries: uncached ones go through the backend's
+        search_batch (a matmul per chunk of queries, or one Qdrant
+        query_batch_points call per 64).
+        """
+        flt = self._bind_filters(filters)
+        suffix, params = self._filter_key(flt), (top_k,) + self._filter_params(flt)
+
+        found = {}
+        for query in queries:
+            cached = self._dense_cache.get(f"dense::{query}::{top_k}{suffix}")
+            if cached is not None:
+                found[query] = cached
+
+        missing = [q for q in dict.fromkeys(queries) if q not in found]
+        if missing and self.query_cache is not None:
+            version = self.dense.version
+            for query, scores in zip(missing, self.query_cache.get_many("dense", version, missing, params)):
+                if scores is not None:
+                    found[query] = scores
+            missing = [q for q in missing if q not in found]
+
+        if missing:
+            batch = self.dense.search_batch(self.get_embeddings(missing), top_k, filters=flt)
+            computed = dict(zip(missing, batch))
+            found.update(computed)
+            if self.query_cache is not None:
+                self.query_cache.set_many("dense", self.dense.version, computed, params)
+
+        for query in dict.fromkeys(queries):
+            self._dense_cache.put(f"dense::{query}::{top_k}{suffix}", found[query])
+        return [found[q] for q in queries]
+
+    def search_batch(self, queries: list, top_k: int = 3, use_reranker: bool = True, filters=None,
+                     rerank_stats=None):
+        """
+        search() for many queries, each stage run once for the whole batch:
+        embedding, dense retrieval, BM25, payload hydration (deduplicated union
+        of candidates) and one CrossEncoder pass over every (query, candidate)
+        pair. Returns (results per query, seconds per stage per query); a
+        batched stage's time is split over the queries that used it (by pair
+        count for the reranker). filters (a ProductFilter) applies to every query.
+        In adaptive mode only the queries whose rankers disagree are retrieved
+        again deeper, and decisive queries skip the reranker.
+        rerank_stats: optional dict, filled with {query: rerank() stats} for the
+        queries whose pairs were scored.
+        """
+        alpha, num_candidates = 0.65, 20
+        flt = self._bind_filters(filters)
+        keys = {q: self._hybrid_key(q, num_candidates, alpha, flt)[0] for q in queries}
+        params = self._hybrid_key("", num_candidates, alpha, flt)[1]
+        unique = list(dict.fromkeys(queries))
+        timings = {q: {"embedding": 0.0, "dense": 0.0, "bm25": 0.0, "fusion": 0.0, "reranker": 0.0}
+                   for q in unique}
+
+        # Hybrid candidates: exact caches first
+        candidates = {}
+        for query in unique:
+            cached = self._hybrid_cache.get(keys[query])
+            if cached is not None:
+                candidates[query] = cached
+        pending = [q for q in unique if q not in candidates]
+        if pending and self.query_cache is not None:
+            version = self._cache_versions()["hybrid"]
+            for query, results in zip(pending, self.query_cache.get_many("hybrid", version, pending, params)):
+                if results is not None:
+                    candidates[query] = results
+            pending = [q for q in pending if q not in candidates]
+
+        def attribute(stage, elapsed, weights):
+            total = sum(weights.values())
+            for query, weight in weights.items():
+                timings[query][stage] += elapsed * weight / total if total else 0.0
+
+        if pending:
+            even = dict.fromkeys(pending, 1)
+
+            start = time.perf_counter()
+            self.get_embeddings(pending)
+            attribute("embedding", time.perf_counter() - start, even)
+
+            # One round at fixed depth; adaptive rounds re-run the disagreeing queries deeper
+            retrieved, active = {}, pending
+            depth = self.min_depth if self.adaptive else 50
+            while active:
+                start = time.perf_counter()
+                dense = self.dense_search_batch(active, depth, filters)
+                attribute("dense", time.perf_counter() - start, dict.fromkeys(active, 1))
+
+                start = time.perf_counter()
+                bm25 = self.bm25_search_batch(active, depth, filters)
+                attribute("bm25", time.perf_counter() - start, dict.fromkeys(active, 1))
+
+                deeper = []
+                for query, d, b in zip(active, dense, bm25):
+                    retrieved[query] = (d, b)
+                    if not self.adaptive:
+                        continue
+                    if depth < self.max_depth and not self._rankers_agree(d, b, depth, num_candidates, alpha):
+                        deeper.append(query)
+                    else:
+                        self._record_depth(depth)
+                active, depth = deeper, min(depth * 2, self.max_depth)
+
+            start = time.perf_counter()
+            fused = [self._fuse(*retrieved[q], num_candidates, alpha) for q in pending]
+            payloads = self.get_payloads(np.unique(np.concatenate([ids for ids, _ in fused])))
+
+            computed = {}
+            for query, (ids, scores) in zip(pending, fused):
+                results = self._to_results(ids, scores, payloads, flt)
+                computed[query] = results
+                self._hybrid_cache.put(keys[query], results)
+            candidates.update(computed)
+            if self.query_cache is not None:
+                self.query_cache.set_many("hybrid", self._cache_versions()["hybrid"], computed, params)
+            attribute("fusion", time.perf_counter() - start, even)
+
+        if not use_reranker:
+            final = {q: candidates[q][:top_k] for q in unique}
+        else:
+            # Every uncached (query, candidate) pair in one CrossEncoder call, in large batches
+            items, spans, final = [], {}, {}
+            for query in unique:
+                decisive = self._is_decisive(candidates[query], top_k)
+                self._count_adaptive(reranks=int(bool(candidates[query])), rerank_skipped=int(decisive))
+                if decisive:
+                    final[query] = self._rank_fused(candidates[query], top_k)
+                    continue
+                spans[query] = (len(items), len(items) + len(candidates[query]))
+                items += [(query, r) for r in candidates[query]]
+
+            start = time.perf_counter()
+            if items:
+                scores, cached = self._score_pairs(items, batch_size=int(os.getenv("RERANK_BATCH_SIZE", "128")))
+                print(f"  Reranked {len(items)} pairs for {len(unique)} queries with BGE-Reranker "
+                      f"({int(cached.sum())} cached)")
+                if rerank_stats is not None:
+                    rerank_stats.update({q: {"pairs": e - s, "cached": int(cached[s:e].sum())}
+                                         for q, (s, e) in spans.items() if e > s})
+            # Model time goes to the queries whose pairs were not cached
+            attribute("reranker", time.perf_counter() - start,
+                      {q: e - s - int(cached[s:e].sum()) for q, (s, e) in spans.items()} if items else {})
+
+            final.update({
+                q: self._rank_reranked(candidates[q], scores[s:e], top_k) if e > s else []
+                for q, (s, e) in spans.items()
+            })
+            # Same semantic tier as rerank(), so /search of these queries is a cache hit
+            rerank_params = (top_k,) + self._filter_params(flt) + self._depth_params()
+            for query, (s, e) in spans.items():
+                if e > s:
+                    self._semantic_put("rerank", query, rerank_params + (self._candidates_param(candidates[query]),),
+                                       final[query])
+
+        return [final[q] for q in queries], [timings[q] for q in queries]
+
+    # WARMUP
+    def warmup_models(self):
+        """
+        Dummy inferences so the first requests do not pay for cold ONNX / torch
+        sessions and first-touch reads of the memory-mapped indexes.
+        Nothing is cached. Returns the seconds taken.
+        """
+        start = time.perf_counter()
+        query = "wireless bluetooth earbuds"
+
+        # Single-query and batched embedding shapes (on the batchers' worker threads,
+        # which own the models)
+        vector = self.embedding_batcher.embed_many([query], batch_size=1)[0]
+        self.embedding_batcher.embed_many([query] * 32, batch_size=32)
+
+        # One reranking's worth of pairs
+        pairs = [[query, "Wireless earbuds with charging case. Good sound and battery."]] * 20
+        self.rerank_batcher.score(pairs, batch_size=len(pairs))
+
+        self.dense.search(vector, 10)
+        self.bm25.search_terms(self.analyzer.term_ids(query), 10, mode=self.bm25_mode, point_ids=self.point_ids)
+        return time.perf_counter() - start
+
     # CACHE STATISTICS
     def get_cache_stats(self):
-        return {
-            "embedding_cache": len(self._embedding_cache),
-            "dense_cache": len(self._dense_cache),
-            "bm25_cache": len(self._bm25_cache),
-            "hybrid_cache": len(self._hybrid_cache),
-        }
+        tiers = (self._embedding_cache, self._dense_cache, self._bm25_cache, self._hybrid_cache, self._rerank_cache)
+        stats = {f"{cache.name}_cache": len(cache) for cache in tiers}
+        stats["tiers"] = {cache.name: cache.stats() for cache in tiers}
+        stats["single_flight"] = {stage: flight.stats() for stage, flight in self._flights.items()}
+        if self.query_cache is not None:
+            stats["disk_cache"] = self.query_cache.stats()
+        for kind, cache in self.semantic_caches.items():
+            stats[f"semantic_{kind}_cache"] = cache.stats()
+        return stats
@@ -0,0 +1,156 @@
+"""
+PAYLOAD STORE MODULE
+Local, read-only copy of the Qdrant product payloads
+Includes:
+- Columnar layout: one .npy per numeric field, offsets + UTF-8 heap per text field
+- Row = Qdrant point id (same numbering as the BM25 and dense indexes)
+- Memory-mapped: hydrating k results reads k slices, no network round trip
+- Same manifest.json + atomic directory swap as the index artifacts
+- Whole-column access for filter masks (models/product_filter.py)
+Written by scripts/upload_to_qdrant.py (or scripts/export_embeddings.py --payloads).
+"""
+
+import os
+import json
+import uuid
+import shutil
+from datetime import datetime
+import numpy as np
+
+PAYLOAD_FORMAT = "payload-columns"
+PAYLOAD_FORMAT_VERSION = 1
+
+# Payload fields written by scripts/upload_to_qdrant.py
+TEXT_FIELDS = ("product_id", "title", "brand", "categories", "abstracted_summary", "description")
+NUMERIC_FIELDS = {
+    "avg_rating": np.float64,
+    "review_count": np.int64,
+    "sentiment_score": np.float64,
+    "price": np.float64,
+}
+# Stored as JSON text
+JSON_FIELDS = ("aspects",)
+
+
+def _encode_heap(values):
+    """ Strings -> (int64 offsets of length n + 1, uint8 UTF-8 heap) """
+    encoded = [v.encode("utf-8") for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(e) for e in encoded], out=offsets[1:])
+    heap = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+    return offsets, heap
+
+
+class PayloadStore:
+    """
+    columns: {field: array} for numeric fields, {field: (offsets, heap)} for
+    text and JSON fields.
+    """
+
+    def __init__(self, columns, num_rows, index_id=None):
+        self.columns = columns
+        self.num_rows = num_rows
+        self.index_id = index_id or uuid.uuid4().hex
+        self._decoded = {}
+
+    @classmethod
+    def from_payloads(cls, payloads):
+        """ payloads: one Qdrant payload dict per point id, in point id order """
+        columns = {}
+        for field in TEXT_FIELDS:
+            columns[field] = _encode_heap([str(p.get(field, "") or "") for p in payloads])
+        for field in JSON_FIELDS:
+            columns[field] = _encode_heap([json.dumps(p.get(field, [])) for p in payloads])
+        for field, dtype in NUMERIC_FIELDS.items():
+            columns[field] = np.array([p.get(field, 0) or 0 for p in payloads], dtype=dtype)
+        return cls(columns, len(payloads))
+
+    # LOOKUP
+    def _text(self, field, row):
+        offsets, heap = self.columns[field]
+        return bytes(heap[offsets[row]:offsets[row + 1]]).decode("utf-8")
+
+    def column(self, field):
+        """ A whole text column as an object array of str (decoded once, for filters) """
+        if field not in self._decoded:
+            offsets, heap = self.columns[field]
+            offsets = np.asarray(offsets).tolist()
+            data = np.asarray(heap).tobytes()
+            values = np.empty(self.num_rows, dtype=object)
+            values[:] = [data[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(self.num_rows)]
+            self._decoded[field] = values
+        return self._decoded[field]
+
+    def get(self, rows):
+        """ Payload dicts (same fields as Qdrant) for point ids, in order """
+        rows = [int(r) for r in rows]
+        numeric = {field: np.asarray(self.columns[field][rows]).tolist() for field in NUMERIC_FIELDS}
+
+        payloads = []
+        for i, row in enumerate(rows):
+            payload = {field: self._text(field, row) for field in TEXT_FIELDS}
+            for field in JSON_FIELDS:
+                payload[field] = json.loads(self._text(field, row))
+            for field in NUMERIC_FIELDS:
+                payload[field] = numeric[field][i]
+            payloads.append(payload)
+        return payloads
+
+    # PERSISTENCE
+    def save(self, path):
+        """ Same layout and atomic swap as BM25Index.save: arrays, then manifest.json """
+        path = path.rstrip("/")
+        tmp_path = f"{path}.tmp-{os.getpid()}"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+
+        for field, column in self.columns.items():
+            if isinstance(column, tuple):
+                np.save(os.path.join(tmp_path, f"{field}.offsets.npy"), column[0])
+                np.save(os.path.join(tmp_path, f"{field}.heap.npy"), column[1])
+            else:
+                np.save(os.path.join(tmp_path, f"{field}.npy"), column)
+
+        manifest = {
+            "format": PAYLOAD_FORMAT,
+            "version": PAYLOAD_FORMAT_VERSION,
+            "index_id": self.index_id,
+            "created_at": datetime.now().isoformat(),
+            "num_rows": self.num_rows,
+            "text_fields": list(TEXT_FIELDS),
+            "json_fields": list(JSON_FIELDS),
+            "numeric_fields": list(NUMERIC_FIELDS),
+        }
+        with open(os.path.join(tmp_path, "manifest.json"), "w") as f:
+            json.dump(manifest, f, indent=2)
+
+        old_path = f"{path}.old-{os.getpid()}"
+        if os.path.exists(path):
+            os.rename(path, old_path)
+        os.rename(tmp_path, path)
+        shutil.rmtree(old_path, ignore_errors=True)
+
+    @classmethod
+    def load(cls, path, mmap: bool = True):
+        with open(os.path.join(path, "manifest.json")) as f:
+            manifest = json.load(f)
+
+        if manifest.get("format") != PAYLOAD_FORMAT:
+            raise ValueError(f"{path} is not a {PAYLOAD_FORMAT} store")
+        if manifest.get("version") != PAYLOAD_FORMAT_VERSION:
+            raise ValueError(
+                f"{path} has payload format version {manifest.get('version')}, "
+                f"expected {PAYLOAD_FORMAT_VERSION}. Re-run scripts/upload_to_qdrant.py"
+            )
+
+        mode = "r" if mmap else None
+        columns = {}
+        for field in manifest["text_fields"] + manifest["json_fields"]:
+            columns[field] = (
+                np.load(os.path.join(path, f"{field}.offsets.npy"), mmap_mode=mode),
+                np.load(os.path.join(path, f"{field}.heap.npy"), mmap_mode=mode),
+            )
+        for field in manifest["numeric_fields"]:
+            columns[field] = np.load(os.path.join(path, f"{field}.npy"), mmap_mode=mode)
+
+        return cls(columns, manifest["num_rows"], index_id=manifest["index_id"])
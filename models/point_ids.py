@@ -0,0 +1,40 @@
+"""
+POINT ID MODULE
+One integer id space for every retriever: the Qdrant point id
+Includes:
+- PointIdMap: product_id -> point id (cache/product_id_mapping.pkl)
+- Point id of every BM25 segment document, computed once per segment
+- -1 marks products without a point id (never returned as results); a
+  per-segment mask of the others lets searches skip them before top-k
+Dense rows, payload store rows and Qdrant points already use this numbering.
+"""
+
+import weakref
+import numpy as np
+
+
+class PointIdMap:
+    def __init__(self, product_id_to_idx):
+        self.product_id_to_idx = product_id_to_idx
+        self._segments = weakref.WeakKeyDictionary()
+        self._known = weakref.WeakKeyDictionary()
+
+    def of(self, product_ids):
+        """ int64 point ids of product ids (-1 = unknown) """
+        get = self.product_id_to_idx.get
+        return np.fromiter((get(pid, -1) for pid in product_ids), dtype=np.int64, count=len(product_ids))
+
+    def segment(self, segment):
+        """ Point id per document of a (frozen) BM25Index segment """
+        points = self._segments.get(segment)
+        if points is None:
+            points = self.of(segment.product_ids_of(np.arange(segment.num_docs)))
+            self._segments[segment] = points
+        return points
+
+    def known(self, segment):
+        """ Bool mask of the segment's documents that have a point id; None when all do """
+        if segment not in self._known:
+            points = self.segment(segment)
+            self._known[segment] = None if (points >= 0).all() else points >= 0
+        return self._known[segment]
@@ -0,0 +1,174 @@
+"""
+PRODUCT FILTER MODULE
+Price / brand / rating / review count / category predicates for search
+Includes:
+- ProductFilter: the predicates of one request
+- Dense side: Qdrant payload Filter (uses the payload indexes created by
+  scripts/upload_to_qdrant.py), or a row mask for in-process backends
+- Keyword side: per-segment document masks applied before BM25 top-k
+- Masks computed from the local payload store and cached per filter
+Brands match exactly (Qdrant keyword match). A category matches when all of
+its words appear in the product's categories (Qdrant full-text match).
+"""
+
+import re
+import numpy as np
+
+from models.cache import LRUCache
+
+# Qdrant payload indexes backing the filters (field -> schema type)
+PAYLOAD_INDEXES = {
+    "price": "float",
+    "avg_rating": "float",
+    "review_count": "integer",
+    "brand": "keyword",
+    "categories": "text",
+}
+
+
+def create_payload_indexes(qdrant, collection_name):
+    """ Index the filtered payload fields so Qdrant filters without a full scan """
+    from qdrant_client import models
+
+    for field, schema in PAYLOAD_INDEXES.items():
+        qdrant.create_payload_index(
+            collection_name=collection_name,
+            field_name=field,
+            field_schema=models.PayloadSchemaType(schema),
+        )
+
+
+def _words(text):
+    return re.findall(r"\w+", text.lower())
+
+
+class ProductFilter:
+    def __init__(self, min_price=None, max_price=None, brands=None, min_rating=None,
+                 min_reviews=None, category=None):
+        self.min_price = min_price
+        self.max_price = max_price
+        self.brands = tuple(sorted(set(brands))) if brands else ()
+        self.min_rating = min_rating
+        self.min_reviews = min_reviews
+        self.category = category or None
+
+    @property
+    def is_empty(self):
+        return not (self.brands or self.category or any(
+            v is not None for v in (self.min_price, self.max_price, self.min_rating, self.min_reviews)
+        ))
+
+    @property
+    def key(self):
+        """ Stable text form, part of every cache key of filtered results """
+        parts = [
+            ("price>=", self.min_price), ("price<=", self.max_price), ("rating>=", self.min_rating),
+            ("reviews>=", self.min_reviews), ("brand=", "|".join(self.brands) or None),
+            ("category=", self.category),
+        ]
+        return ",".join(f"{name}{value}" for name, value in parts if value is not None)
+
+    # QDRANT (dense side)
+    def to_qdrant(self):
+        from qdrant_client import models
+
+        must = []
+        if self.min_price is not None or self.max_price is not None:
+            must.append(models.FieldCondition(key="price", range=models.Range(gte=self.min_price, lte=self.max_price)))
+        if self.min_rating is not None:
+            must.append(models.FieldCondition(key="avg_rating", range=models.Range(gte=self.min_rating)))
+        if self.min_reviews is not None:
+            must.append(models.FieldCondition(key="review_count", range=models.Range(gte=self.min_reviews)))
+        if self.brands:
+            must.append(models.FieldCondition(key="brand", match=models.MatchAny(any=list(self.brands))))
+        if self.category:
+            must.append(models.FieldCondition(key="categories", match=models.MatchText(text=self.category)))
+        return models.Filter(must=must)
+
+    # LOCAL (payload store rows / hydrated payloads)
+    def row_mask(self, store):
+        """ Eligible rows (Qdrant point ids) of a PayloadStore """
+        mask = np.ones(store.num_rows, dtype=bool)
+        if self.min_price is not None:
+            mask &= np.asarray(store.columns["price"]) >= self.min_price
+        if self.max_price is not None:
+            mask &= np.asarray(store.columns["price"]) <= self.max_price
+        if self.min_rating is not None:
+            mask &= np.asarray(store.columns["avg_rating"]) >= self.min_rating
+        if self.min_reviews is not None:
+            mask &= np.asarray(store.columns["review_count"]) >= self.min_reviews
+        if self.brands:
+            mask &= np.isin(store.column("brand"), self.brands)
+        if self.category:
+            words = set(_words(self.category))
+            mask &= np.fromiter(
+                (words <= set(_words(c)) for c in store.column("categories")), dtype=bool, count=store.num_rows
+            )
+        return mask
+
+    def allows(self, payload):
+        """ Same predicates on one payload dict """
+        price = payload.get("price", 0) or 0
+        return (
+            (self.min_price is None or price >= self.min_price)
+            and (self.max_price is None or price <= self.max_price)
+            and (self.min_rating is None or (payload.get("avg_rating", 0) or 0) >= self.min_rating)
+            and (self.min_reviews is None or (payload.get("review_count", 0) or 0) >= self.min_reviews)
+            and (not self.brands or payload.get("brand") in self.brands)
+            and (not self.category or set(_words(self.category)) <= set(_words(payload.get("categories") or "")))
+        )
+
+
+class BoundFilter:
+    """
+    A ProductFilter resolved against the local data.
+    rows: eligible Qdrant point ids (bool mask); points(point_ids), mask(segment)
+    and allows(product_ids) give the same eligibility for other id forms.
+    """
+
+    def __init__(self, product_filter, rows, filter_index):
+        self.filter = product_filter
+        self.key = product_filter.key
+        self.rows = rows
+        # One always-false slot at the end: index -1 = product without a payload row
+        self._padded = np.append(rows, False)
+        self._index = filter_index
+
+    def row_mask(self, num_rows):
+        """ rows resized to a matrix of num_rows (rows the store lacks are ineligible) """
+        if len(self.rows) >= num_rows:
+            return self.rows[:num_rows]
+        return np.concatenate([self.rows, np.zeros(num_rows - len(self.rows), dtype=bool)])
+
+    def points(self, point_ids):
+        """ Eligible point ids; -1 and rows past the store hit the always-false slot """
+        return self._padded[np.minimum(point_ids, len(self.rows))]
+
+    def mask(self, segment):
+        """ Eligible documents of a BM25Index segment """
+        return self.points(self._index.point_ids.segment(segment))
+
+    def allows(self, product_ids):
+        """ Eligible product ids (products the payload store does not know are not) """
+        return self.points(self._index.point_ids.of(product_ids))
+
+
+class FilterIndex:
+    """
+    Caches row masks per filter (point_ids: PointIdMap of the engine).
+    bind() runs concurrently from request threads: the masks live in a
+    thread-safe LRUCache.
+    """
+
+    def __init__(self, store, point_ids, max_masks: int = 256):
+        self.store = store
+        self.point_ids = point_ids
+        self.max_masks = max_masks
+        self._masks = LRUCache("filter_masks", max_masks)
+
+    def bind(self, product_filter):
+        rows = self._masks.get(product_filter.key)
+        if rows is None:
+            rows = product_filter.row_mask(self.store)
+            self._masks.put(product_filter.key, rows)
+        return BoundFilter(product_filter, rows, self)
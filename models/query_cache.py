@@ -0,0 +1,271 @@
+"""
+QUERY CACHE MODULE
+Shared (L2) cache under the engine's in-memory caches
+Includes:
+- Pluggable store (QUERY_CACHE_BACKEND):
+  - sqlite: file in WAL mode, survives restarts, shared by every worker on the host
+  - redis: any Redis-protocol server, shared by every worker on every host
+- Keys: hash of (namespace, index version, normalized query, parameters)
+- Values: compact arrays / msgpack or JSON (models/cache_codec.py), no pickle
+- Size cap: oldest-first eviction (sqlite), per-key TTL + server maxmemory (redis)
+A new index version simply stops matching old keys; stale rows are pruned at
+startup and age out through eviction.
+"""
+
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+
+from models import cache_codec
+
+QUERY_CACHE_BACKENDS = ("sqlite", "redis")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    namespace TEXT NOT NULL,
+    version TEXT NOT NULL,
+    value BLOB NOT NULL,
+    created REAL NOT NULL
+)
+"""
+# Rows inserted between eviction checks
+EVICT_EVERY = 1000
+
+
+def normalize_query(query: str) -> str:
+    """ Case and whitespace do not change embeddings (uncased model) or BM25 tokens """
+    return " ".join(query.lower().split())
+
+
+# STORES
+class SQLiteStore:
+    """ Rows (key, namespace, version, value, created) in one SQLite file """
+
+    errors = (sqlite3.Error,)
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+        # One connection per thread (FastAPI runs sync endpoints in a pool)
+        self._local = threading.local()
+
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(SCHEMA)
+        conn.execute("CREATE INDEX IF NOT EXISTS entries_created ON entries (created)")
+        conn.commit()
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            # WAL: readers never block the writer; NORMAL: no fsync per commit
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get_many(self, namespace, keys):
+        found = {}
+        conn = self._connect()
+        # SQLite limits bound parameters per statement
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            rows = conn.execute(
+                f"SELECT key, value FROM entries WHERE key IN ({','.join('?' * len(chunk))})", chunk
+            ).fetchall()
+            found.update(rows)
+        return found
+
+    def set_many(self, namespace, version, items):
+        now = time.time()
+        conn = self._connect()
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)",
+                [(key, namespace, version, value, now) for key, value in items],
+            )
+
+    def evict(self, max_entries):
+        conn = self._connect()
+        with conn:
+            count = conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            if count > max_entries:
+                conn.execute(
+                    "DELETE FROM entries WHERE key IN "
+                    "(SELECT key FROM entries ORDER BY created LIMIT ?)",
+                    (count - max_entries,),
+                )
+
+    def prune(self, versions):
+        conn = self._connect()
+        with conn:
+            for namespace, version in versions.items():
+                conn.execute("DELETE FROM entries WHERE namespace = ? AND version != ?", (namespace, version))
+
+    def stats(self):
+        rows = self._connect().execute("SELECT namespace, COUNT(*) FROM entries GROUP BY namespace").fetchall()
+        return {"backend": "sqlite", "path": self.path, "entries": dict(rows)}
+
+
+class RedisStore:
+    """
+    Values under "{prefix}{namespace}:{key}" on a Redis-protocol server.
+    Every key expires after ttl seconds; size is bounded by the server's
+    maxmemory policy (use allkeys-lru). client: any redis-py compatible
+    client (e.g. a local stand-in), instead of connecting to url.
+    """
+
+    def __init__(self, url: str, ttl: float = 7 * 86400, timeout: float = 0.1,
+                 prefix: str = "qc:", client=None):
+        try:
+            import redis
+            self.errors = (redis.RedisError, OSError)
+        except ImportError:
+            if client is None:
+                raise ImportError("QUERY_CACHE_BACKEND=redis needs redis-py: pip install redis")
+            self.errors = (OSError,)
+
+        self.url = url
+        self.ttl = ttl
+        self.prefix = prefix
+        # A slow or unreachable cache must not stall searches: short socket timeouts
+        self.client = client or redis.Redis.from_url(url, socket_timeout=timeout, socket_connect_timeout=timeout)
+
+    def _key(self, namespace, key):
+        return f"{self.prefix}{namespace}:{key}"
+
+    def get_many(self, namespace, keys):
+        values = self.client.mget([self._key(namespace, k) for k in keys])
+        return {k: v for k, v in zip(keys, values) if v is not None}
+
+    def set_many(self, namespace, version, items):
+        pipe = self.client.pipeline(transaction=False)
+        for key, value in items:
+            pipe.set(self._key(namespace, key), value, ex=int(self.ttl))
+        pipe.execute()
+
+    def evict(self, max_entries):
+        """ The server evicts (maxmemory policy) and expires (TTL) """
+
+    def prune(self, versions):
+        """ Keys hash the version: stale entries never match and expire by TTL """
+
+    def stats(self):
+        return {"backend": "redis", "url": self.url, "keys": self.client.dbsize()}
+
+
+# CACHE
+class QueryCache:
+    def __init__(self, store, max_entries: int = 200_000):
+        self.store = store
+        self.max_entries = max_entries
+
+        self._lock = threading.Lock()
+        self._inserts = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _version(version: str) -> str:
+        """ Index version + value encoding """
+        return f"{version}|{cache_codec.CODEC_VERSION}"
+
+    @staticmethod
+    def make_key(namespace: str, version: str, query: str, params=()) -> str:
+        raw = "\x1f".join([namespace, version, normalize_query(query), *map(str, params)])
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def get(self, namespace: str, version: str, query: str, params=()):
+        """ Cached value or None """
+        return self.get_many(namespace, version, [query], params)[0]
+
+    def get_many(self, namespace: str, version: str, queries, params=()):
+        """ Cached values (None when missing), in the order of queries """
+        version = self._version(version)
+        keys = [self.make_key(namespace, version, q, params) for q in queries]
+        try:
+            found = self.store.get_many(namespace, keys)
+        except self.store.errors as e:
+            print(f"✗ Query cache read failed: {e}")
+            found = {}
+
+        values = []
+        for key in keys:
+            value = None
+            if key in found:
+                try:
+                    value = cache_codec.decode(found[key])
+                except ValueError as e:
+                    print(f"✗ Query cache value unreadable: {e}")
+            values.append(value)
+
+        hits = sum(v is not None for v in values)
+        with self._lock:
+            self.hits += hits
+            self.misses += len(keys) - hits
+        return values
+
+    def set(self, namespace: str, version: str, query: str, value, params=()):
+        self.set_many(namespace, version, {query: value}, params)
+
+    def set_many(self, namespace: str, version: str, values: dict, params=()):
+        """ Store {query: value} in one transaction / pipeline """
+        version = self._version(version)
+        items = [(self.make_key(namespace, version, q, params), cache_codec.encode(v)) for q, v in values.items()]
+        try:
+            self.store.set_many(namespace, version, items)
+        except self.store.errors as e:
+            print(f"✗ Query cache write failed: {e}")
+            return
+
+        with self._lock:
+            self._inserts += len(items)
+            evict = self._inserts >= EVICT_EVERY
+            if evict:
+                self._inserts = 0
+        if evict:
+            self.evict()
+
+    def evict(self):
+        """ Drop the oldest rows beyond max_entries """
+        try:
+            self.store.evict(self.max_entries)
+        except self.store.errors as e:
+            print(f"✗ Query cache eviction failed: {e}")
+
+    def prune(self, versions: dict):
+        """ Delete rows of each namespace whose version is not versions[namespace] """
+        try:
+            self.store.prune({namespace: self._version(v) for namespace, v in versions.items()})
+        except self.store.errors as e:
+            print(f"✗ Query cache prune failed: {e}")
+
+    def stats(self):
+        try:
+            stats = self.store.stats()
+        except self.store.errors:
+            stats = {}
+        with self._lock:
+            return {**stats, "hits": self.hits, "misses": self.misses}
+
+
+def create_query_cache(kind: str, path: str = None, url: str = None, max_entries: int = 200_000):
+    """ QueryCache on the store named by kind (one of QUERY_CACHE_BACKENDS), or None when disabled """
+    if kind not in QUERY_CACHE_BACKENDS:
+        raise ValueError(f"Unknown query cache backend '{kind}', expected one of {QUERY_CACHE_BACKENDS}")
+
+    if kind == "redis":
+        store = RedisStore(
+            url,
+            ttl=float(os.getenv("QUERY_CACHE_TTL", str(7 * 86400))),
+            timeout=float(os.getenv("QUERY_CACHE_TIMEOUT", "0.1")),
+        )
+    elif path:
+        store = SQLiteStore(path)
+    else:
+        return None
+    return QueryCache(store, max_entries=max_entries)
@@ -0,0 +1,209 @@
+"""
+RERANK BATCHER MODULE
+Cross-request dynamic batching for the CrossEncoder reranker
+Includes:
+- Concurrent score() calls (one per /search request, ~20 pairs each) queued
+  together and routed back to their request when scored
+- Length buckets: pairs grouped by token length (exact for pairs encoded
+  from precomputed document tokens, estimated for text), so a batch pads to a
+  similar length instead of to the longest document of the request
+- Fixed-size batches run as soon as a bucket fills; a bucket whose oldest
+  pair has waited max_wait_ms runs what it has
+- Bulk jobs (/search/batch, warmup replay): a caller's pairs run as their own
+  batch_size batches on the worker thread, between bucket batches
+- Batch statistics per bucket for /stats
+Each request thread blocks on its own future; a single worker thread owns the
+model, so one batch runs at a time with all intra-op threads.
+"""
+
+import time
+import queue
+import threading
+from concurrent.futures import Future
+import numpy as np
+
+# Upper bounds of the length buckets, in tokens (the CrossEncoder truncates at 512)
+DEFAULT_BUCKETS = (64, 128, 256, 512)
+
+# Characters per token of English product text (BPE / SentencePiece), plus the
+# special tokens of a pair; only used to pick a bucket
+CHARS_PER_TOKEN = 4
+SPECIAL_TOKENS = 4
+
+
+def estimate_tokens(query: str, doc: str) -> int:
+    return (len(query) + len(doc)) // CHARS_PER_TOKEN + SPECIAL_TOKENS
+
+
+def pair_tokens(pair) -> int:
+    """ Length of a [query, doc] text pair (estimated) or an encoded pair (exact) """
+    if isinstance(pair, np.ndarray):
+        return pair.shape[-1]
+    return estimate_tokens(*pair)
+
+
+class _Request:
+    """ Scores of one score() call, filled in by the batches its pairs land in """
+
+    __slots__ = ("scores", "remaining", "future")
+
+    def __init__(self, num_pairs):
+        self.scores = np.empty(num_pairs, dtype=np.float32)
+        self.remaining = num_pairs
+        self.future = Future()
+
+
+class RerankBatcher:
+    def __init__(self, reranker, batch_size: int = 32, max_wait_ms: float = 5.0, buckets=DEFAULT_BUCKETS):
+        self.reranker = reranker
+        self.batch_size = max(1, batch_size)
+        self.max_wait = max_wait_ms / 1000
+        self.buckets = tuple(sorted(buckets))
+
+        self._queue = queue.Queue()
+        # bucket -> [(tokens, pair, request, index)], and when its oldest pair arrived
+        self._pending = {bucket: [] for bucket in self.buckets}
+        self._oldest = {}
+        self._thread = threading.Thread(target=self._worker_loop, daemon=True)
+        self._thread.start()
+
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.batches = 0
+        self.pairs = 0
+        self.model_time = 0.0
+        self.bulk_jobs = 0
+        self.bulk_pairs = 0
+        self.bulk_time = 0.0
+        # bucket -> (batches, pairs)
+        self._bucket_counts = {bucket: [0, 0] for bucket in self.buckets}
+
+    def score(self, pairs, batch_size: int = None) -> np.ndarray:
+        """
+        CrossEncoder scores of [query, doc] pairs, or of pairs encoded by the
+        reranker's PairTokenizer; blocks until every pair has run.
+        batch_size: run the pairs as one bulk job in batches of this size
+        instead of sharing the length buckets
+        """
+        request = _Request(len(pairs))
+        if not pairs:
+            return request.scores
+        self._queue.put((pairs, request, batch_size))
+        return request.future.result()
+
+    def _bucket(self, tokens):
+        for bucket in self.buckets:
+            if tokens <= bucket:
+                return bucket
+        return self.buckets[-1]
+
+    def _add(self, pairs, request, batch_size):
+        if batch_size is not None:
+            return self._run_bulk(pairs, request, batch_size)
+        now = time.perf_counter()
+        for i, pair in enumerate(pairs):
+            tokens = pair_tokens(pair)
+            bucket = self._bucket(tokens)
+            if not self._pending[bucket]:
+                self._oldest[bucket] = now
+            self._pending[bucket].append((tokens, pair, request, i))
+
+    def _worker_loop(self):
+        while True:
+            # Sleep until new pairs arrive or the oldest waiting bucket is due
+            due = min(self._oldest.values(), default=None)
+            try:
+                if due is None:
+                    self._add(*self._queue.get())
+                else:
+                    self._add(*self._queue.get(timeout=max(0.0, due + self.max_wait - time.perf_counter())))
+                while True:
+                    self._add(*self._queue.get_nowait())
+            except queue.Empty:
+                pass
+
+            now = time.perf_counter()
+            for bucket in self.buckets:
+                pending = self._pending[bucket]
+                if not pending:
+                    continue
+                # Full batches now; the rest once its oldest pair has waited max_wait
+                flush = now - self._oldest[bucket] >= self.max_wait
+                size = len(pending) if flush else len(pending) - len(pending) % self.batch_size
+                if size == 0:
+                    continue
+                run, self._pending[bucket] = pending[:size], pending[size:]
+                if self._pending[bucket]:
+                    self._oldest[bucket] = now
+                else:
+                    del self._oldest[bucket]
+
+                # Similar lengths side by side: each batch pads to its own longest pair
+                run.sort(key=lambda item: item[0])
+                for start in range(0, len(run), self.batch_size):
+                    self._run(bucket, run[start:start + self.batch_size])
+
+    def _predict(self, pairs, batch_size):
+        if isinstance(pairs[0], np.ndarray):
+            return self.reranker.predict_encoded(pairs, batch_size=batch_size)
+        return self.reranker.predict(pairs, batch_size=batch_size)
+
+    def _run_bulk(self, pairs, request, batch_size):
+        start = time.perf_counter()
+        try:
+            request.scores[:] = self._predict(pairs, batch_size)
+        except Exception as e:
+            request.future.set_exception(e)
+            return
+        request.future.set_result(request.scores)
+
+        with self._lock:
+            self.bulk_jobs += 1
+            self.bulk_pairs += len(pairs)
+            self.bulk_time += time.perf_counter() - start
+
+    def _run(self, bucket, batch):
+        pairs = [pair for _, pair, _, _ in batch]
+        start = time.perf_counter()
+        try:
+            scores = self._predict(pairs, len(pairs))
+        except Exception as e:
+            for _, _, request, _ in batch:
+                if not request.future.done():
+                    request.future.set_exception(e)
+            return
+        elapsed = time.perf_counter() - start
+
+        finished = 0
+        for (_, _, request, i), score in zip(batch, scores):
+            request.scores[i] = score
+            request.remaining -= 1
+            if request.remaining == 0 and not request.future.done():
+                request.future.set_result(request.scores)
+                finished += 1
+
+        with self._lock:
+            self.requests += finished
+            self.batches += 1
+            self.pairs += len(batch)
+            self.model_time += elapsed
+            self._bucket_counts[bucket][0] += 1
+            self._bucket_counts[bucket][1] += len(batch)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "batch_size": self.batch_size,
+                "max_wait_ms": self.max_wait * 1000,
+                "requests": self.requests,
+                "batches": self.batches,
+                "pairs": self.pairs,
+                "avg_batch_size": round(self.pairs / self.batches, 2) if self.batches else 0,
+                "avg_model_ms": round(self.model_time / self.batches * 1000, 2) if self.batches else 0,
+                "buckets": {
+                    f"<={bucket}": {"batches": batches, "pairs": pairs}
+                    for bucket, (batches, pairs) in self._bucket_counts.items()
+                },
+                "bulk": {"jobs": self.bulk_jobs, "pairs": self.bulk_pairs,
+                         "model_seconds": round(self.bulk_time, 3)},
+            }
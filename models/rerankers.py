@@ -0,0 +1,316 @@
+"""
+RERANKER BACKENDS MODULE
+Pluggable CrossEncoder scoring for the hybrid engine
+Includes:
+- TorchReranker: sentence-transformers CrossEncoder on PyTorch
+- export_onnx: one-time ONNX export of the CrossEncoder (fast tokenizer +
+  manifest, same atomic swap as the dense index), with a dynamically
+  quantized int8 copy of the weights (onnxruntime.quantization)
+- ONNXReranker: onnxruntime CPU session over the export (int8 or float32),
+  intra-op threads set by RERANKER_THREADS, tokenization with the fast
+  tokenizer (tokenizers): no torch needed to serve
+- PairTokenizer: the export's tokenizer; builds model inputs from the query
+  and pre-tokenized documents (models/doc_tokens.py) with the same
+  longest_first truncation, so only the query is tokenized per rerank
+Every backend scores [query, document] pairs like CrossEncoder.predict:
+float32 sigmoid relevance scores, one per pair.
+"""
+
+import os
+import json
+import shutil
+import hashlib
+from datetime import datetime
+import numpy as np
+
+RERANKER_FORMAT = "reranker-onnx"
+RERANKER_FORMAT_VERSION = 1
+
+RERANKER_BACKENDS = ("torch", "onnx")
+ONNX_PRECISIONS = ("int8", "float32")
+ONNX_FILES = {"float32": "model.onnx", "int8": "model_int8.onnx"}
+TOKENIZER_FILE = "tokenizer.json"
+
+
+def rerank_text(product):
+    """ Document side of a (query, product) reranker pair """
+    return f"{product['title']} {product['abstracted_summary']}"
+
+
+def sigmoid(logits):
+    """ CrossEncoder's default activation for single-label models """
+    return (1 / (1 + np.exp(-logits.astype(np.float64)))).astype(np.float32)
+
+
+class TorchReranker:
+    """ sentence-transformers CrossEncoder (the reference scores) """
+
+    name = "torch"
+
+    def __init__(self, model: str, max_length: int = 512):
+        from sentence_transformers import CrossEncoder
+
+        self.model = model
+        self.cross_encoder = CrossEncoder(model, max_length=max_length, local_files_only=True)
+
+    def predict(self, pairs, batch_size: int = 32):
+        return self.cross_encoder.predict(pairs, batch_size=batch_size)
+
+
+def export_onnx(model: str, path, max_length: int = 512, opset: int = 14, quantize: bool = True):
+    """
+    Export a sequence classification model (CrossEncoder) to ONNX under path:
+    model.onnx (float32), model_int8.onnx (dynamic int8 weights, MatMul / Gemm),
+    tokenizer.json and manifest.json, written last. Needs torch and transformers
+    (and onnxruntime to quantize); serving only needs onnxruntime and tokenizers.
+    """
+    import torch
+    from transformers import AutoTokenizer, AutoModelForSequenceClassification
+
+    path = path.rstrip("/")
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+
+    tokenizer = AutoTokenizer.from_pretrained(model)
+    network = AutoModelForSequenceClassification.from_pretrained(model).eval()
+    if network.config.num_labels != 1:
+        raise ValueError(f"{model} has {network.config.num_labels} labels, expected a single relevance logit")
+
+    # Same truncation as CrossEncoder: pairs cut longest first to max_length tokens
+    tokenizer.backend_tokenizer.save(os.path.join(tmp_path, TOKENIZER_FILE))
+
+    inputs = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in tokenizer.model_input_names]
+    sample = tokenizer([["query", "a product title and summary"]] * 2, padding=True, return_tensors="pt")
+    axes = {name: {0: "batch", 1: "sequence"} for name in inputs}
+    with torch.no_grad():
+        torch.onnx.export(
+            network, tuple(sample[name] for name in inputs), os.path.join(tmp_path, ONNX_FILES["float32"]),
+            input_names=inputs, output_names=["logits"], dynamic_axes={**axes, "logits": {0: "batch"}},
+            opset_version=opset, do_constant_folding=True,
+        )
+
+    precisions = ["float32"]
+    if quantize:
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+
+        quantize_dynamic(
+            os.path.join(tmp_path, ONNX_FILES["float32"]), os.path.join(tmp_path, ONNX_FILES["int8"]),
+            weight_type=QuantType.QInt8,
+        )
+        precisions.append("int8")
+
+    manifest = {
+        "format": RERANKER_FORMAT,
+        "version": RERANKER_FORMAT_VERSION,
+        "created_at": datetime.now().isoformat(),
+        "model": model,
+        "max_length": max_length,
+        "inputs": inputs,
+        "pad_token_id": tokenizer.pad_token_id,
+        "pad_token": tokenizer.pad_token,
+        "precisions": precisions,
+        "opset": opset,
+    }
+    with open(os.path.join(tmp_path, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    old_path = f"{path}.old-{os.getpid()}"
+    if os.path.exists(path):
+        os.rename(path, old_path)
+    os.rename(tmp_path, path)
+    shutil.rmtree(old_path, ignore_errors=True)
+    return manifest
+
+
+def load_manifest(path):
+    """ manifest.json of an export_onnx directory, checked """
+    with open(os.path.join(path, "manifest.json")) as f:
+        manifest = json.load(f)
+    if manifest.get("format") != RERANKER_FORMAT:
+        raise ValueError(f"{path} is not a {RERANKER_FORMAT} export")
+    if manifest.get("version") != RERANKER_FORMAT_VERSION:
+        raise ValueError(
+            f"{path} has reranker format version {manifest.get('version')}, "
+            f"expected {RERANKER_FORMAT_VERSION}. Re-export it with scripts/export_reranker_onnx.py"
+        )
+    return manifest
+
+
+def truncate_longest_first(query_len: int, doc_len: int, budget: int):
+    """
+    Kept (query, document) token counts, exactly as the tokenizer's
+    longest_first pair truncation: trim the longer side down to the shorter,
+    then both evenly (the originally longer side, or the document on a tie,
+    keeps the odd token).
+    """
+    remove = query_len + doc_len - budget
+    if remove <= 0:
+        return query_len, doc_len
+    diff = min(abs(query_len - doc_len), remove)
+    remove -= diff
+    if query_len > doc_len:
+        return query_len - diff - remove // 2, doc_len - (remove - remove // 2)
+    return query_len - (remove - remove // 2), doc_len - diff - remove // 2
+
+
+class PairTokenizer:
+    """
+    Fast tokenizer of an export_onnx directory (tokenizers only, no model).
+    Tokenizes text pairs like CrossEncoder, and builds the same input ids from
+    a query and pre-tokenized documents: only the query is tokenized per call.
+    An encoded pair is an int32 (2, length) array: input ids, token type ids.
+    """
+
+    def __init__(self, path, manifest=None):
+        from tokenizers import Tokenizer
+
+        manifest = manifest or load_manifest(path)
+        self.max_length = manifest["max_length"]
+        self.pad_id = manifest["pad_token_id"]
+        with open(os.path.join(path, TOKENIZER_FILE), "rb") as f:
+            self.tokenizer_id = hashlib.sha1(f.read()).hexdigest()[:16]
+
+        # Raw: no special tokens, truncation or padding (query / document pieces)
+        self.raw = Tokenizer.from_file(os.path.join(path, TOKENIZER_FILE))
+        self.raw.no_truncation()
+        self.raw.no_padding()
+        self.pairs = Tokenizer.from_file(os.path.join(path, TOKENIZER_FILE))
+        self.pairs.enable_truncation(max_length=self.max_length, strategy="longest_first")
+        self.pairs.enable_padding(pad_id=self.pad_id, pad_token=manifest["pad_token"])
+
+        # Special tokens around the two sequences, read off one encoded pair
+        query = self.raw.encode("query", add_special_tokens=False)
+        doc = self.raw.encode("document", add_special_tokens=False)
+        pair = self.raw.post_process(query, doc, add_special_tokens=True)
+        pieces = {"prefix": [], "middle": [], "suffix": []}
+        piece, types = "prefix", {}
+        for token, type_id, sequence in zip(pair.ids, pair.type_ids, pair.sequence_ids):
+            if sequence is None:
+                pieces[piece].append((token, type_id))
+            else:
+                types[sequence] = type_id
+                piece = "middle" if sequence == 0 else "suffix"
+        self.template = {name: np.array(tokens, dtype=np.int32).reshape(-1, 2).T for name, tokens in pieces.items()}
+        self.query_type, self.doc_type = types.get(0, 0), types.get(1, 0)
+        # Tokens left for query + document
+        self.budget = self.max_length - sum(piece.shape[1] for piece in self.template.values())
+
+    def encode(self, pairs):
+        """ Padded (input ids, attention mask, token type ids) of text pairs """
+        encodings = self.pairs.encode_batch([(query, doc) for query, doc in pairs])
+        return (np.array([e.ids for e in encodings], dtype=np.int64),
+                np.array([e.attention_mask for e in encodings], dtype=np.int64),
+                np.array([e.type_ids for e in encodings], dtype=np.int64))
+
+    def encode_docs(self, docs, max_tokens: int = None):
+        """ int32 token ids of documents (no special tokens), cut at max_tokens """
+        max_tokens = max_tokens or self.budget
+        return [np.array(e.ids[:max_tokens], dtype=np.int32)
+                for e in self.raw.encode_batch(list(docs), add_special_tokens=False)]
+
+    def encode_pairs(self, query: str, doc_ids):
+        """ Encoded (query, document) pairs from pre-tokenized documents """
+        query_ids = np.array(self.raw.encode(query, add_special_tokens=False).ids, dtype=np.int32)
+        query_part = np.stack([query_ids, np.full(len(query_ids), self.query_type, dtype=np.int32)])
+        encoded = []
+        for ids in doc_ids:
+            keep_query, keep_doc = truncate_longest_first(len(query_ids), len(ids), self.budget)
+            doc_part = np.stack([ids[:keep_doc], np.full(keep_doc, self.doc_type, dtype=np.int32)])
+            encoded.append(np.concatenate([
+                self.template["prefix"], query_part[:, :keep_query], self.template["middle"],
+                doc_part, self.template["suffix"],
+            ], axis=1))
+        return encoded
+
+    def pad(self, encoded):
+        """ Padded (input ids, attention mask, token type ids) of encoded pairs """
+        length = max(e.shape[1] for e in encoded)
+        ids = np.full((len(encoded), length), self.pad_id, dtype=np.int64)
+        mask = np.zeros((len(encoded), length), dtype=np.int64)
+        types = np.zeros((len(encoded), length), dtype=np.int64)
+        for row, e in enumerate(encoded):
+            ids[row, :e.shape[1]] = e[0]
+            mask[row, :e.shape[1]] = 1
+            types[row, :e.shape[1]] = e[1]
+        return ids, mask, types
+
+
+class ONNXReranker:
+    """
+    onnxruntime CPU inference over export_onnx's output.
+    threads: intra-op threads of one predict call (None: onnxruntime's
+    default, one per physical core). Concurrent predict calls share the session.
+    predict_encoded scores pairs built by tokenizer.encode_pairs, sorted by
+    length so each batch pads to similar lengths.
+    """
+
+    def __init__(self, path, precision: str = "int8", threads: int = None):
+        try:
+            import onnxruntime as ort
+            import tokenizers  # noqa: F401
+        except ImportError:
+            raise ImportError("RERANKER_BACKEND=onnx needs onnxruntime and tokenizers: pip install onnxruntime")
+
+        if precision not in ONNX_PRECISIONS:
+            raise ValueError(f"Unknown reranker precision '{precision}', expected one of {ONNX_PRECISIONS}")
+
+        manifest = load_manifest(path)
+        if precision not in manifest["precisions"]:
+            raise ValueError(f"{path} has no {precision} model (exported: {manifest['precisions']})")
+
+        self.model = manifest["model"]
+        self.precision = precision
+        self.name = f"onnx-{precision}"
+        self.inputs = manifest["inputs"]
+        self.tokenizer = PairTokenizer(path, manifest)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.inter_op_num_threads = 1
+        if threads:
+            options.intra_op_num_threads = threads
+        self.threads = threads
+        self.session = ort.InferenceSession(
+            os.path.join(path, ONNX_FILES[precision]), options, providers=["CPUExecutionProvider"],
+        )
+
+    def _run(self, ids, mask, types):
+        columns = {"input_ids": ids, "attention_mask": mask, "token_type_ids": types}
+        logits = self.session.run(["logits"], {name: columns[name] for name in self.inputs})[0]
+        return sigmoid(logits[:, 0])
+
+    def predict(self, pairs, batch_size: int = 32):
+        scores = np.empty(len(pairs), dtype=np.float32)
+        for start in range(0, len(pairs), batch_size):
+            batch = pairs[start:start + batch_size]
+            scores[start:start + len(batch)] = self._run(*self.tokenizer.encode(batch))
+        return scores
+
+    def predict_encoded(self, encoded, batch_size: int = 32):
+        """ predict() for tokenizer.encode_pairs output """
+        scores = np.empty(len(encoded), dtype=np.float32)
+        order = np.argsort([e.shape[1] for e in encoded], kind="stable")
+        for start in range(0, len(encoded), batch_size):
+            rows = order[start:start + batch_size]
+            scores[rows] = self._run(*self.tokenizer.pad([encoded[i] for i in rows]))
+        return scores
+
+
+def create_reranker(kind: str, model: str, path=None):
+    """ Build the reranker named by kind (one of RERANKER_BACKENDS) """
+    if kind not in RERANKER_BACKENDS:
+        raise ValueError(f"Unknown reranker backend '{kind}', expected one of {RERANKER_BACKENDS}")
+
+    if kind == "torch":
+        return TorchReranker(model)
+
+    reranker = ONNXReranker(
+        path,
+        precision=os.getenv("RERANKER_PRECISION", "int8"),
+        threads=int(os.getenv("RERANKER_THREADS", "0")) or None,
+    )
+    if reranker.model != model:
+        raise ValueError(f"{path} is an export of {reranker.model}, expected {model}")
+    return reranker
@@ -0,0 +1,128 @@
+"""
+SEMANTIC CACHE MODULE
+Result cache for near-duplicate queries
+Includes:
+- Exact lookup on the normalized query text (case, whitespace)
+- Nearest prior query by cosine similarity of the query embeddings
+- Hit when similarity >= threshold (and the request parameters match)
+- Hit / miss counters and a sampled audit log of similarity hits
+The "ANN" is a flat scan: capacity is a few thousand vectors, so one matmul
+over the ring buffer is well under a millisecond and exact. Entries are
+dropped when the index version changes. The engine enables it only when
+SEMANTIC_CACHE_THRESHOLD is set (scripts/tune_semantic_cache.py measures one).
+"""
+
+import time
+import random
+import threading
+from collections import deque
+import numpy as np
+
+from models.query_cache import normalize_query
+
+
+class SemanticCache:
+    def __init__(self, dim: int, capacity: int = 5000, threshold: float = 0.95,
+                 audit_rate: float = 0.05, audit_size: int = 200):
+        self.dim = dim
+        self.capacity = capacity
+        self.threshold = threshold
+        self.audit_rate = audit_rate
+
+        self._vectors = np.zeros((capacity, dim), dtype=np.float32)
+        # slot -> (normalized query, params, value)
+        self._entries = [None] * capacity
+        # (normalized query, params) -> slot
+        self._slots = {}
+        self._next = 0
+        self._size = 0
+        self._version = None
+        self._lock = threading.Lock()
+
+        self.exact_hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        self.audit = deque(maxlen=audit_size)
+
+    def _check_version(self, version):
+        """ Caller holds the lock """
+        if version != self._version:
+            self._entries = [None] * self.capacity
+            self._slots = {}
+            self._next = 0
+            self._size = 0
+            self._version = version
+
+    def get(self, query: str, params, version):
+        """ Value cached for the same normalized query, or None (not counted as a miss) """
+        key = (normalize_query(query), params)
+        with self._lock:
+            self._check_version(version)
+            slot = self._slots.get(key)
+            if slot is None:
+                return None
+            self.exact_hits += 1
+            return self._entries[slot][2]
+
+    def nearest(self, query: str, vector, params, version):
+        """
+        Value of the most similar cached query with the same params if its
+        cosine similarity reaches the threshold, else None (a miss).
+        """
+        q = np.asarray(vector, dtype=np.float32)
+        q = q / (np.linalg.norm(q) or 1.0)
+
+        with self._lock:
+            self._check_version(version)
+            if self._size:
+                sims = self._vectors[:self._size] @ q
+                above = np.flatnonzero(sims >= self.threshold)
+                for slot in above[np.argsort(-sims[above])].tolist():
+                    matched, entry_params, value = self._entries[slot]
+                    if entry_params == params:
+                        self.similar_hits += 1
+                        if random.random() < self.audit_rate:
+                            self.audit.append({
+                                "query": query,
+                                "matched_query": matched,
+                                "similarity": round(float(sims[slot]), 4),
+                                "params": list(params),
+                                "timestamp": time.time(),
+                            })
+                        return value
+            self.misses += 1
+            return None
+
+    def put(self, query: str, vector, params, value, version):
+        q = np.asarray(vector, dtype=np.float32)
+        q = q / (np.linalg.norm(q) or 1.0)
+        key = (normalize_query(query), params)
+
+        with self._lock:
+            self._check_version(version)
+            slot = self._slots.get(key)
+            if slot is None:
+                # Ring buffer: overwrite the oldest entry
+                slot = self._next
+                old = self._entries[slot]
+                if old is not None:
+                    del self._slots[(old[0], old[1])]
+                self._next = (self._next + 1) % self.capacity
+                self._size = min(self._size + 1, self.capacity)
+                self._slots[key] = slot
+
+            self._vectors[slot] = q
+            self._entries[slot] = (key[0], params, value)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.exact_hits + self.similar_hits + self.misses
+            return {
+                "entries": self._size,
+                "threshold": self.threshold,
+                "exact_hits": self.exact_hits,
+                "similar_hits": self.similar_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.exact_hits + self.similar_hits) / lookups, 3) if lookups else 0,
+                "audit": list(self.audit),
+            }
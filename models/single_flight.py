@@ -0,0 +1,75 @@
+"""
+SINGLE FLIGHT MODULE
+Coalescing of identical in-flight work
+Includes:
+- SingleFlight: the first caller of a key computes (the leader); callers of
+  the same key arriving before it finishes wait for its result, or its
+  exception, instead of computing again
+- Threads and coroutines share one registry: do() blocks a thread,
+  do_async() awaits without blocking the event loop
+- Counters: computed (leaders), coalesced (followers), in flight
+Nothing is kept once the leader finishes; results live in the caches.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        # key -> Future of the leader's result
+        self._calls = {}
+        self.computed = 0
+        self.coalesced = 0
+
+    def _join(self, key):
+        """ (future, is_leader) """
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future, False
+            future = self._calls[key] = Future()
+            self.computed += 1
+            return future, True
+
+    def _finish(self, key, future, result=None, error=None):
+        with self._lock:
+            del self._calls[key]
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def do(self, key, fn):
+        """ fn() for the first caller of key, its result for concurrent callers """
+        future, leader = self._join(key)
+        if not leader:
+            return future.result()
+        try:
+            result = fn()
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, result)
+        return result
+
+    async def do_async(self, key, fn):
+        """ do() for coroutines: fn is an async function """
+        future, leader = self._join(key)
+        if not leader:
+            return await asyncio.wrap_future(future)
+        try:
+            result = await fn()
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, result)
+        return result
+
+    def stats(self):
+        with self._lock:
+            return {"computed": self.computed, "coalesced": self.coalesced, "in_flight": len(self._calls)}
@@ -0,0 +1,113 @@
+"""
+TEXT ANALYZER MODULE
+One text analyzer shared by index build, query side and upload
+Includes:
+- Compiled normalization rules (same rules as src/preprocess.clean_text)
+- Tokenization with configurable stopword pruning
+- Rare-term pruning (min document frequency) when the vocabulary is built
+- Frozen vocabulary: text -> integer term ids, unknown terms dropped
+"""
+
+import re
+
+ANALYZER_VERSION = 1
+
+HTML_RE = re.compile(r"<.*?>")
+URL_RE = re.compile(r"(http|https)://\S+")
+NON_ALNUM_RE = re.compile(r"[^a-z0-9\s]")
+SPACE_RE = re.compile(r"\s+")
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Function words only: product words ("pro", "plus", "mini") must stay searchable
+DEFAULT_STOPWORDS = frozenset("""
+a an and are as at be been but by can do does for from has have if in into is it its
+of on or so such than that the their them then there these they this those to was
+were will with you your
+""".split())
+
+
+def normalize_text(text) -> str:
+    """ Lowercase, strip HTML / URLs / punctuation, collapse whitespace """
+    if not isinstance(text, str):
+        return ""
+    text = text.lower()
+    text = HTML_RE.sub(" ", text)
+    text = URL_RE.sub(" ", text)
+    text = NON_ALNUM_RE.sub(" ", text)
+    return SPACE_RE.sub(" ", text).strip()
+
+
+def document_text(row) -> str:
+    """ Searchable text of a product row (title + summary + description) """
+    title = str(row.get('title', ''))
+    summary = str(row.get('abstracted_summary', ''))
+    description = str(row.get('description', ''))
+    return f"{title} {summary} {description}"
+
+
+class TextAnalyzer:
+    """
+    text -> tokens -> term ids.
+
+    stopwords: tokens dropped on both index and query side
+    min_df: terms found in fewer documents are left out of the vocabulary
+    vocabulary: frozen term -> id table (dict or Vocabulary), set by fit()
+                or loaded with the index
+    """
+
+    def __init__(self, stopwords=DEFAULT_STOPWORDS, min_df: int = 1, vocabulary=None):
+        self.stopwords = frozenset(stopwords)
+        self.min_df = min_df
+        self.vocabulary = vocabulary
+
+    def tokenize(self, text):
+        """ Normalized tokens with stopwords removed """
+        # Same result as normalize_text(text).split(), without the extra passes
+        if not isinstance(text, str):
+            return []
+        text = URL_RE.sub(" ", HTML_RE.sub(" ", text.lower()))
+        return [t for t in TOKEN_RE.findall(text) if t not in self.stopwords]
+
+    def fit(self, corpus):
+        """
+        Build and freeze the vocabulary from tokenized documents.
+        Term ids follow first-seen order; terms below min_df are pruned.
+        """
+        df = {}
+        for tokens in corpus:
+            for token in dict.fromkeys(tokens):
+                df[token] = df.get(token, 0) + 1
+
+        self.vocabulary = {}
+        for term, count in df.items():
+            if count >= self.min_df:
+                self.vocabulary[term] = len(self.vocabulary)
+
+        return self.vocabulary
+
+    def encode(self, tokens):
+        """ Tokens -> term ids through the frozen vocabulary (unknown tokens dropped) """
+        if self.vocabulary is None:
+            raise RuntimeError("TextAnalyzer has no vocabulary; call fit() or load it with the index")
+        term_ids = [self.vocabulary.get(t) for t in tokens]
+        return [t for t in term_ids if t is not None]
+
+    def term_ids(self, text):
+        return self.encode(self.tokenize(text))
+
+    # CONFIG (stored in the index manifest)
+    def config(self):
+        return {
+            "version": ANALYZER_VERSION,
+            "stopwords": sorted(self.stopwords),
+            "min_df": self.min_df,
+        }
+
+    @classmethod
+    def from_config(cls, config, vocabulary=None):
+        if config.get("version") != ANALYZER_VERSION:
+            raise ValueError(
+                f"Analyzer version {config.get('version')} does not match {ANALYZER_VERSION}; "
+                "rebuild the index with scripts/create_bm25_index.py"
+            )
+        return cls(stopwords=config["stopwords"], min_df=config["min_df"], vocabulary=vocabulary)
@@ -0,0 +1,87 @@
+"""
+VOCABULARY MODULE
+Frozen term -> term id table stored as flat arrays
+Includes:
+- Sorted 64-bit term hashes for O(log V) lookup (binary search)
+- UTF-8 string heap to verify matches and map ids back to terms
+- .npy persistence that can be opened memory-mapped (no dict rebuild at startup)
+"""
+
+import os
+import hashlib
+import numpy as np
+
+VOCAB_FILES = ("vocab_hashes", "vocab_ids", "vocab_offsets", "vocab_strings")
+
+
+def term_hash(term: str) -> int:
+    """ Stable 64-bit hash (Python's hash() is randomized per process) """
+    return int.from_bytes(hashlib.blake2b(term.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class Vocabulary:
+    """
+    Read-only term table.
+
+    vocab_hashes: sorted uint64 hashes of every term
+    vocab_ids:    term id for each entry of vocab_hashes
+    vocab_offsets / vocab_strings: UTF-8 bytes of term id i live in
+                  vocab_strings[vocab_offsets[i]:vocab_offsets[i + 1]]
+    """
+
+    def __init__(self, vocab_hashes, vocab_ids, vocab_offsets, vocab_strings):
+        self.vocab_hashes = vocab_hashes
+        self.vocab_ids = vocab_ids
+        self.vocab_offsets = vocab_offsets
+        self.vocab_strings = vocab_strings
+
+    @classmethod
+    def from_terms(cls, terms):
+        """ terms: iterable of strings in term id order """
+        encoded = [t.encode("utf-8") for t in terms]
+
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(t) for t in encoded], out=offsets[1:])
+        strings = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+        hashes = np.array([term_hash(t) for t in terms], dtype=np.uint64)
+        order = np.argsort(hashes, kind="stable")
+
+        return cls(hashes[order], order.astype(np.int32), offsets, strings)
+
+    def __len__(self):
+        return len(self.vocab_offsets) - 1
+
+    def __contains__(self, term):
+        return self.get(term) is not None
+
+    def term(self, term_id: int) -> str:
+        start, end = self.vocab_offsets[term_id], self.vocab_offsets[term_id + 1]
+        return self.vocab_strings[start:end].tobytes().decode("utf-8")
+
+    def get(self, term: str, default=None):
+        """ Term id of a term, or default if it is not in the vocabulary """
+        h = np.uint64(term_hash(term))
+        i = int(np.searchsorted(self.vocab_hashes, h))
+
+        # Walk the (extremely rare) run of colliding hashes
+        while i < len(self.vocab_hashes) and self.vocab_hashes[i] == h:
+            term_id = int(self.vocab_ids[i])
+            if self.term(term_id) == term:
+                return term_id
+            i += 1
+
+        return default
+
+    def terms(self):
+        return [self.term(i) for i in range(len(self))]
+
+    # PERSISTENCE
+    def save(self, path):
+        for name in VOCAB_FILES:
+            np.save(os.path.join(path, f"{name}.npy"), getattr(self, name))
+
+    @classmethod
+    def load(cls, path, mmap: bool = True):
+        mode = "r" if mmap else None
+        return cls(*[np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mode) for name in VOCAB_FILES])
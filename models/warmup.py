@@ -0,0 +1,104 @@
+"""
+WARMUP MODULE
+Startup warmup of the search engine
+Includes:
+- Model warmup: dummy embedder / CrossEncoder inferences and one retrieval
+  per index (HybridSearchEngine.warmup_models), before the API reports ready
+- Most frequent queries of the query log (logs/queries.db)
+- Background replay of those queries through the batch pipeline, filling the
+  in-memory and shared caches, within a query count and a time budget
+- Progress for /health
+Replay reranks by default (top_k of /search): it fills the CrossEncoder pair
+scores and the semantic rerank tier, the costliest stage to recompute. With
+rerank=False it only fills retrieval, for a shorter replay.
+"""
+
+import time
+import sqlite3
+import threading
+
+
+def top_queries(db_path: str, limit: int):
+    """ Most frequent logged queries, most frequent first ([] without a log) """
+    if limit <= 0:
+        return []
+    try:
+        # Read-only: never creates the log file
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        try:
+            rows = conn.execute(
+                "SELECT query, COUNT(*) AS n FROM queries WHERE length(trim(query)) >= 2 "
+                "GROUP BY query ORDER BY n DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        print(f"✗ Warmup could not read the query log: {e}")
+        return []
+    return [query for query, _ in rows]
+
+
+class Warmup:
+    def __init__(self, engine, db_path: str, max_queries: int = 500, budget: float = 60.0,
+                 batch_size: int = 32, rerank: bool = True, top_k: int = 3):
+        self.engine = engine
+        self.db_path = db_path
+        self.max_queries = max_queries
+        self.budget = budget
+        self.batch_size = batch_size
+        self.rerank = rerank
+        self.top_k = top_k
+
+        self._lock = threading.Lock()
+        self._state = {
+            "status": "pending",
+            "models_seconds": None,
+            "queries_total": 0,
+            "queries_done": 0,
+            "replay_seconds": 0.0,
+        }
+
+    def _update(self, **changes):
+        with self._lock:
+            self._state.update(changes)
+
+    def progress(self):
+        with self._lock:
+            return {**self._state, "budget_seconds": self.budget, "rerank": self.rerank}
+
+    def warm_models(self):
+        """ Blocking: run before serving requests """
+        self._update(status="warming_models")
+        seconds = self.engine.warmup_models()
+        self._update(models_seconds=round(seconds, 3), status="models_ready")
+        print(f"✓ Models warmed up in {seconds:.2f}s")
+
+    def start(self):
+        """ Replay the most frequent logged queries in a background thread """
+        thread = threading.Thread(target=self.replay, name="warmup", daemon=True)
+        thread.start()
+        return thread
+
+    def replay(self):
+        queries = top_queries(self.db_path, self.max_queries)
+        self._update(status="replaying", queries_total=len(queries))
+
+        start = time.perf_counter()
+        done = 0
+        try:
+            for i in range(0, len(queries), self.batch_size):
+                if time.perf_counter() - start > self.budget:
+                    print(f"  Warmup budget of {self.budget:.0f}s reached after {done} queries")
+                    break
+                batch = queries[i:i + self.batch_size]
+                self.engine.search_batch(batch, top_k=self.top_k, use_reranker=self.rerank)
+                done += len(batch)
+                self._update(queries_done=done, replay_seconds=round(time.perf_counter() - start, 2))
+        except Exception as e:
+            self._update(status="failed", error=str(e))
+            print(f"✗ Warmup replay failed: {e}")
+            return
+
+        self._update(status="done", replay_seconds=round(time.perf_counter() - start, 2))
+        print(f"✓ Warmup replayed {done}/{len(queries)} logged queries in {time.perf_counter() - start:.1f}s")
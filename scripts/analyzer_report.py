@@ -0,0 +1,63 @@
+"""
+ANALYZER REPORT
+Effect of the shared text analyzer on the BM25 index:
+baseline (text.lower().split()) vs TextAnalyzer (normalization, stopwords,
+rare-term pruning). Reports vocabulary size, postings, index bytes and the
+postings each evaluation query touches.
+
+Usage:
+    python scripts/analyzer_report.py
+"""
+
+import sys
+import os
+sys.path.append(os.path.abspath("."))
+
+import polars as pl
+import numpy as np
+
+from models.bm25_index import BM25Index, INDEX_FILES
+from models.text_analyzer import TextAnalyzer, document_text
+from data.evaluation_queries import EVALUATION_QUERIES
+
+MIN_DF = int(os.getenv("BM25_MIN_DF", "2"))
+
+
+def index_bytes(index):
+    return sum(np.asarray(getattr(index, name)).nbytes for name in INDEX_FILES)
+
+
+print("ANALYZER REPORT")
+
+df = pl.read_csv("output_with_aspects_LATEST.csv")
+rows = list(df.iter_rows(named=True))
+product_ids = [str(r['product_id']) for r in rows]
+texts = [document_text(r) for r in rows]
+print(f"Loaded {len(rows):,} products")
+
+baseline = BM25Index.from_corpus([t.lower().split() for t in texts], product_ids)
+
+analyzer = TextAnalyzer(min_df=MIN_DF)
+analyzed = BM25Index.from_corpus([analyzer.tokenize(t) for t in texts], product_ids, analyzer=analyzer)
+
+print(f"\n{'':24s}{'baseline':>14s}{'analyzer':>14s}{'change':>10s}")
+for label, before, after in [
+    ("vocabulary terms", baseline.num_terms, analyzed.num_terms),
+    ("postings", len(baseline.doc_ids), len(analyzed.doc_ids)),
+    ("index MB", index_bytes(baseline) / 1024 / 1024, index_bytes(analyzed) / 1024 / 1024),
+]:
+    print(f"{label:24s}{before:14,.1f}{after:14,.1f}{(after - before) / before:+10.1%}")
+
+print(f"\nPostings touched per query (min_df={MIN_DF}, {len(analyzer.stopwords)} stopwords)")
+touched_before, touched_after = [], []
+for test in EVALUATION_QUERIES:
+    query = test['query']
+    before = baseline.postings_touched(baseline.lookup(query.lower().split()))
+    after = analyzed.postings_touched(analyzer.term_ids(query))
+    touched_before.append(before)
+    touched_after.append(after)
+    print(f"  {query:45s}{before:10,d} -> {after:10,d}")
+
+mean_before, mean_after = np.mean(touched_before), np.mean(touched_after)
+print(f"\n  {'mean':45s}{mean_before:10,.0f} -> {mean_after:10,.0f} "
+      f"({(mean_after - mean_before) / mean_before:+.1%})")
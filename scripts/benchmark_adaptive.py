@@ -0,0 +1,88 @@
+"""
+ADAPTIVE DEPTH BENCHMARK
+Fixed depth (50 + 50 candidates, always reranked) vs adaptive depth
+(RETRIEVAL_DEPTH=adaptive) on EVALUATION_QUERIES, cold: retrieval and reranker
+score caches are cleared before every query, embeddings stay cached (their
+cost does not depend on depth). For each configuration:
+- p50 / p95 latency of engine.search (retrieval + rerank)
+- mean candidate depth and share of queries retrieved deeper than the minimum
+- share of queries that skipped the reranker
+- NDCG@10 against the ground truth
+Pick the largest RERANK_SKIP_MARGIN whose NDCG matches the fixed baseline.
+
+Usage:
+    python scripts/benchmark_adaptive.py
+    python scripts/benchmark_adaptive.py --margins 0.1 0.2 --min-depth 10
+"""
+
+import sys
+import os
+sys.path.append(os.path.abspath("."))
+
+import time
+import argparse
+import numpy as np
+
+# Fresh results only: no persistent or semantic cache while measuring
+os.environ["QUERY_CACHE_BACKEND"] = "sqlite"
+os.environ["QUERY_CACHE_PATH"] = ""
+os.environ["SEMANTIC_CACHE_THRESHOLD"] = ""
+
+from models.hybrid_search_engine import HybridSearchEngine
+from models.evaluation_metrics import ndcg_at_k
+from data.evaluation_queries import EVALUATION_QUERIES
+
+
+def run(engine, tests, top_k, repeats):
+    """ Latencies (ms), mean NDCG@top_k and adaptive stats of one configuration """
+    engine.adaptive_stats = dict.fromkeys(engine.adaptive_stats, 0)
+    latencies, ndcg = [], []
+    for _ in range(repeats):
+        for test in tests:
+            for cache in (engine._dense_cache, engine._bm25_cache, engine._hybrid_cache, engine._rerank_cache):
+                cache.clear()
+            start = time.perf_counter()
+            results = engine.search(test["query"], top_k=top_k, use_reranker=True)
+            latencies.append((time.perf_counter() - start) * 1000)
+            ndcg.append(ndcg_at_k(test["ground_truth"], [r["product_id"] for r in results], top_k))
+    return latencies, float(np.mean(ndcg)), engine.get_adaptive_stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark adaptive candidate depth")
+    parser.add_argument("--margins", type=float, nargs="+", default=[0.05, 0.1, 0.15, 0.2, 0.3])
+    parser.add_argument("--min-depth", type=int, default=None)
+    parser.add_argument("--max-depth", type=int, default=None)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    print("ADAPTIVE DEPTH BENCHMARK")
+    engine = HybridSearchEngine()
+    engine.min_depth = args.min_depth or engine.min_depth
+    engine.max_depth = args.max_depth or engine.max_depth
+
+    tests = [t for t in EVALUATION_QUERIES if t["ground_truth"]]
+    print(f"{len(tests)} evaluation queries x {args.repeats} | depth {engine.min_depth}-{engine.max_depth}")
+
+    # Warm the embedding cache and the models once
+    for test in tests:
+        engine.search(test["query"], top_k=args.top_k)
+
+    configs = [("fixed", False, None)]
+    configs += [(f"adaptive {m:.2f}", True, m) for m in args.margins]
+
+    print(f"\n{'config':>15s}{'p50 ms':>9s}{'p95 ms':>9s}{'depth':>8s}"
+          f"{'deepened':>10s}{'skipped':>9s}{'NDCG@' + str(args.top_k):>10s}")
+    for name, adaptive, margin in configs:
+        engine.adaptive = adaptive
+        if margin is not None:
+            engine.rerank_skip_margin = margin
+        latencies, ndcg, stats = run(engine, tests, args.top_k, args.repeats)
+        print(f"{name:>15s}{np.percentile(latencies, 50):9.1f}{np.percentile(latencies, 95):9.1f}"
+              f"{stats['mean_depth']:8.1f}{stats['deepened_rate']:10.2f}"
+              f"{stats['rerank_skip_rate']:9.2f}{ndcg:10.3f}")
+
+
+if __name__ == "__main__":
+    main()
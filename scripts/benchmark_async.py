@@ -0,0 +1,174 @@
+"""
+ASYNC SEARCH BENCHMARK
+Sequential hybrid_search vs hybrid_search_async (embedding + dense retrieval
+and BM25 overlapped) with dense search on a local in-memory Qdrant.
+Qdrant is filled from the exported artifacts (cache/dense_index vectors,
+cache/payload_store payloads); --rtt-ms adds a simulated network round
+trip to every Qdrant call, as with Qdrant Cloud.
+Every query runs cold (engine caches cleared, persistent and semantic
+caches disabled). Reports per-query p50 / p95 and throughput at
+--concurrency parallel requests.
+
+Usage:
+    python scripts/benchmark_async.py
+    python scripts/benchmark_async.py --rtt-ms 40 --concurrency 8
+"""
+
+import sys
+import os
+sys.path.append(os.path.abspath("."))
+
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+# Cold retrieval only, dense search through Qdrant
+os.environ["QUERY_CACHE_BACKEND"] = "sqlite"
+os.environ["QUERY_CACHE_PATH"] = ""
+os.environ["SEMANTIC_CACHE_THRESHOLD"] = ""
+os.environ["DENSE_BACKEND"] = "qdrant"
+
+from qdrant_client import QdrantClient, AsyncQdrantClient
+from qdrant_client.models import Distance, VectorParams, PointStruct
+
+from models.hybrid_search_engine import HybridSearchEngine
+from models.dense_backends import DenseIndex, QdrantBackend
+from models.payload_store import PayloadStore
+from data.evaluation_queries import EVALUATION_QUERIES
+
+
+class DelayedQdrantBackend(QdrantBackend):
+    """ QdrantBackend with a fixed simulated round trip per call """
+
+    def __init__(self, qdrant, collection_name, async_qdrant, rtt):
+        super().__init__(qdrant, collection_name, async_qdrant=async_qdrant)
+        self.rtt = rtt
+
+    def search(self, vector, top_k: int = 50, filters=None):
+        time.sleep(self.rtt)
+        return super().search(vector, top_k, filters)
+
+    async def search_async(self, vector, top_k: int = 50, filters=None):
+        await asyncio.sleep(self.rtt)
+        return await super().search_async(vector, top_k, filters)
+
+
+def fill(client, collection_name, index, payloads, batch_size=1000):
+    client.create_collection(
+        collection_name=collection_name,
+        vectors_config=VectorParams(size=index.dim, distance=Distance.COSINE),
+    )
+    for start in range(0, index.num_vectors, batch_size):
+        rows = range(start, min(start + batch_size, index.num_vectors))
+        client.upsert(collection_name=collection_name, points=[
+            PointStruct(id=row, vector=np.asarray(index.embeddings[row]).tolist(), payload=payload)
+            for row, payload in zip(rows, payloads.get(rows))
+        ])
+
+
+async def async_fill(client, collection_name, index, payloads, batch_size=1000):
+    await client.create_collection(
+        collection_name=collection_name,
+        vectors_config=VectorParams(size=index.dim, distance=Distance.COSINE),
+    )
+    for start in range(0, index.num_vectors, batch_size):
+        rows = range(start, min(start + batch_size, index.num_vectors))
+        await client.upsert(collection_name=collection_name, points=[
+            PointStruct(id=row, vector=np.asarray(index.embeddings[row]).tolist(), payload=payload)
+            for row, payload in zip(rows, payloads.get(rows))
+        ])
+
+
+def clear_caches(engine):
+    for cache in (engine._embedding_cache, engine._dense_cache, engine._bm25_cache, engine._hybrid_cache):
+        cache.clear()
+
+
+def report(name, latencies, wall, count):
+    latencies = np.array(latencies) * 1000
+    print(f"  {name:12s}{np.percentile(latencies, 50):10.1f}{np.percentile(latencies, 95):10.1f}"
+          f"{count / wall:12.1f}")
+
+
+async def run_async(engine, queries, concurrency):
+    """ Per-query latencies (one at a time), then the wall time of concurrent batches """
+    latencies = []
+    for query in queries:
+        clear_caches(engine)
+        start = time.perf_counter()
+        await engine.hybrid_search_async(query, top_k=20, alpha=0.65)
+        latencies.append(time.perf_counter() - start)
+
+    clear_caches(engine)
+    start = time.perf_counter()
+    for i in range(0, len(queries), concurrency):
+        await asyncio.gather(*(engine.hybrid_search_async(q, top_k=20, alpha=0.65)
+                               for q in queries[i:i + concurrency]))
+    return latencies, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sequential vs async hybrid retrieval")
+    parser.add_argument("--rtt-ms", type=float, default=0.0, help="Simulated Qdrant round trip")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=5, help="Passes over the evaluation queries")
+    args = parser.parse_args()
+
+    print("ASYNC SEARCH BENCHMARK")
+    engine = HybridSearchEngine()
+
+    # Local in-memory Qdrant (sync and async clients each hold their own copy)
+    print("\nFilling in-memory Qdrant from cache/dense_index + cache/payload_store")
+    index = DenseIndex.load("cache/dense_index")
+    payloads = PayloadStore.load("cache/payload_store")
+    collection_name = "amazon-products"
+
+    qdrant = QdrantClient(":memory:")
+    async_qdrant = AsyncQdrantClient(":memory:")
+    fill(qdrant, collection_name, index, payloads)
+    asyncio.run(async_fill(async_qdrant, collection_name, index, payloads))
+
+    engine.qdrant, engine.async_qdrant = qdrant, async_qdrant
+    engine.dense = DelayedQdrantBackend(qdrant, collection_name, async_qdrant, args.rtt_ms / 1000)
+    # Hydrate through Qdrant retrieve as well (the path without a payload store)
+    engine.payloads = None
+
+    base = [t["query"] for t in EVALUATION_QUERIES]
+    queries = [f"{q} {i}" if i else q for i in range(args.repeat) for q in base]
+    print(f"{len(queries)} cold queries | rtt={args.rtt_ms}ms | concurrency={args.concurrency}")
+
+    # Warm up models and clients
+    engine.hybrid_search(base[0])
+    asyncio.run(engine.hybrid_search_async(base[0]))
+
+    print(f"\n  {'path':12s}{'p50 ms':>10s}{'p95 ms':>10s}{'queries/s':>12s}")
+
+    latencies = []
+    for query in queries:
+        clear_caches(engine)
+        start = time.perf_counter()
+        engine.hybrid_search(query, top_k=20, alpha=0.65)
+        latencies.append(time.perf_counter() - start)
+
+    clear_caches(engine)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(args.concurrency) as pool:
+        list(pool.map(lambda q: engine.hybrid_search(q, top_k=20, alpha=0.65), queries))
+    report("sequential", latencies, time.perf_counter() - start, len(queries))
+
+    latencies, wall = asyncio.run(run_async(engine, queries, args.concurrency))
+    report("async", latencies, wall, len(queries))
+
+    # Same results on both paths
+    clear_caches(engine)
+    sequential = [r["product_id"] for r in engine.hybrid_search(base[0])]
+    clear_caches(engine)
+    concurrent = [r["product_id"] for r in asyncio.run(engine.hybrid_search_async(base[0]))]
+    assert sequential == concurrent, "async path returned different results"
+    print("\nResults identical on both paths")
+
+
+if __name__ == "__main__":
+    main()
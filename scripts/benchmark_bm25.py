@@ -0,0 +1,176 @@
+"""
+BM25 BENCHMARK
+Compares the legacy rank_bm25 path (BM25Okapi.get_scores + full argsort)
+with the native posting-list index (BM25Index.search + argpartition),
+exhaustive and with Block-Max WAND pruning, on synthetic Zipfian corpora
+of increasing size. Latencies are also split by postings per query, which
+shows where pruning starts to pay (AUTO_PRUNING_MIN_POSTINGS).
+
+Usage:
+    python scripts/benchmark_bm25.py
+    python scripts/benchmark_bm25.py --sizes 31000 300000 1000000 --queries 400
+    python scripts/benchmark_bm25.py --skip-legacy-above 300000
+"""
+
+import sys
+import os
+sys.path.append(os.path.abspath("."))
+
+import argparse
+import time
+import numpy as np
+from rank_bm25 import BM25Okapi
+
+from models.bm25_index import BM25Index, AUTO_PRUNING_MIN_POSTINGS
+
+
+def make_corpus(num_docs, vocab_size, mean_len, rng):
+    """
+    Zipf-distributed tokens with Poisson document lengths.
+    Term ids are renumbered in first-seen order so the vocabulary (and the
+    idf averaging order) matches what BM25Okapi builds from the same tokens.
+    """
+    doc_len = rng.poisson(mean_len, size=num_docs)
+    doc_ptr = np.zeros(num_docs + 1, dtype=np.int64)
+    np.cumsum(doc_len, out=doc_ptr[1:])
+
+    ranks = np.arange(1, vocab_size + 1)
+    probs = 1.0 / ranks
+    probs /= probs.sum()
+    term_ids = rng.choice(vocab_size, size=int(doc_ptr[-1]), p=probs)
+
+    unique, first = np.unique(term_ids, return_index=True)
+    seen = unique[np.argsort(first)]
+    remap = np.empty(vocab_size, dtype=np.int64)
+    remap[seen] = np.arange(len(seen))
+
+    terms = [f"t{t}" for t in seen.tolist()]
+    return doc_ptr, remap[term_ids], terms
+
+
+def make_queries(num_queries, doc_ptr, term_ids, terms, rng):
+    """ 2-6 distinct terms drawn from random documents, like product queries """
+    queries = []
+    while len(queries) < num_queries:
+        doc = rng.integers(0, len(doc_ptr) - 1)
+        tokens = np.unique(term_ids[doc_ptr[doc]:doc_ptr[doc + 1]])
+        if len(tokens) < 2:
+            continue
+        n_terms = min(len(tokens), rng.integers(2, 7))
+        queries.append([terms[t] for t in rng.choice(tokens, size=n_terms, replace=False)])
+    return queries
+
+
+def time_queries(fn, queries):
+    latencies = []
+    for q in queries:
+        start = time.perf_counter()
+        fn(q)
+        latencies.append(time.perf_counter() - start)
+    return np.array(latencies) * 1000
+
+
+def legacy_search(bm25, tokens, top_k):
+    scores = bm25.get_scores(tokens)
+    top_idx = np.argsort(scores)[-top_k:][::-1]
+    return top_idx, scores[top_idx]
+
+
+def report(name, latencies):
+    print(f"  {name:8s} p50={np.percentile(latencies, 50):9.2f}ms "
+          f"p95={np.percentile(latencies, 95):9.2f}ms "
+          f"mean={latencies.mean():9.2f}ms")
+
+
+def report_by_postings(postings, native, pruned, buckets):
+    """ Exhaustive vs bmw latency per bucket of queries with similar postings counts """
+    order = np.argsort(postings, kind="stable")
+    for chunk in np.array_split(order, buckets):
+        if len(chunk) == 0:
+            continue
+        print(f"  {postings[chunk].min():>9,}-{postings[chunk].max():<9,} postings "
+              f"native mean={native[chunk].mean():7.2f}ms p95={np.percentile(native[chunk], 95):7.2f}ms | "
+              f"bmw mean={pruned[chunk].mean():7.2f}ms p95={np.percentile(pruned[chunk], 95):7.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark BM25 keyword search")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[31000, 300000, 3000000])
+    parser.add_argument("--vocab-size", type=int, default=200000)
+    parser.add_argument("--doc-len", type=int, default=40, help="Mean tokens per document")
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--top-k", type=int, default=50)
+    parser.add_argument("--buckets", type=int, default=10,
+                        help="Postings buckets for the exhaustive vs bmw breakdown")
+    parser.add_argument("--skip-legacy-above", type=int, default=None,
+                        help="Skip BM25Okapi for corpora larger than this (it needs several GB at 3M docs)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+
+    print("BM25 BENCHMARK")
+    print(f"Queries: {args.queries} | top_k={args.top_k} | mean doc length={args.doc_len}")
+
+    for num_docs in args.sizes:
+        print(f"\n{num_docs:,} documents")
+        doc_ptr, term_ids, terms = make_corpus(num_docs, args.vocab_size, args.doc_len, rng)
+        vocab = {term: i for i, term in enumerate(terms)}
+        queries = make_queries(args.queries, doc_ptr, term_ids, terms, rng)
+        product_ids = [str(i) for i in range(num_docs)]
+
+        start = time.perf_counter()
+        index = BM25Index.from_term_ids(doc_ptr, term_ids, vocab, product_ids)
+        print(f"  native build: {time.perf_counter() - start:.1f}s "
+              f"({len(index.doc_ids):,} postings)")
+
+        native = time_queries(lambda q: index.search(q, args.top_k), queries)
+        report("native", native)
+
+        pruned = time_queries(lambda q: index.search(q, args.top_k, mode="bmw"), queries)
+        report("bmw", pruned)
+
+        auto = time_queries(lambda q: index.search(q, args.top_k, mode="auto"), queries)
+        report("auto", auto)
+
+        postings = np.array([index.postings_touched(index.lookup(q)) for q in queries])
+        print(f"  by postings (auto prunes from {AUTO_PRUNING_MIN_POSTINGS:,}):")
+        report_by_postings(postings, native, pruned, args.buckets)
+
+        # Pruning must not change the result
+        for q in queries:
+            exact_idx, exact_scores = index.search(q, args.top_k)
+            bmw_idx, bmw_scores = index.search(q, args.top_k, mode="bmw")
+            assert np.array_equal(exact_idx, bmw_idx), f"bmw top-k mismatch for {q}"
+            assert np.array_equal(exact_scores, bmw_scores), f"bmw score mismatch for {q}"
+        print("  bmw      identical top-k to exhaustive")
+
+        if args.skip_legacy_above and num_docs > args.skip_legacy_above:
+            print("  legacy   skipped")
+            continue
+
+        names = np.array(terms, dtype=object)
+        corpus = [names[term_ids[doc_ptr[d]:doc_ptr[d + 1]]].tolist() for d in range(num_docs)]
+
+        start = time.perf_counter()
+        bm25 = BM25Okapi(corpus)
+        print(f"  legacy build: {time.perf_counter() - start:.1f}s")
+        del corpus
+
+        legacy = time_queries(lambda q: legacy_search(bm25, q, args.top_k), queries)
+        report("legacy", legacy)
+        print(f"  speedup  {legacy.mean() / native.mean():.1f}x (mean latency)")
+
+        # Relevance parity: identical scores for the returned documents
+        max_diff = 0.0
+        for q in queries:
+            ref = bm25.get_scores(q)
+            top_idx, top_scores = index.search(q, args.top_k)
+            max_diff = max(max_diff, float(np.abs(ref[top_idx] - top_scores).max(initial=0.0)))
+            ref_top = np.sort(ref)[-len(top_scores):][::-1]
+            assert np.array_equal(np.sort(top_scores)[::-1], ref_top), f"top-k mismatch for {q}"
+        print(f"  parity   max |score diff| = {max_diff:.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+DENSE QUANTIZATION BENCHMARK
+Local exact dense search with a float32, float16 or int8 first pass
+(quantized modes rescore top_k * oversample candidates in float32).
+Reports recall@k against exact float32 search, first-pass matrix size
+and per-query latency, on synthetic clustered embeddings.
+
+Usage:
+    python scripts/benchmark_dense.py
+    python scripts/benchmark_dense.py --sizes 31000 1000000 --oversample 2 4 8
+"""
+
+import sys
+import os
+sys.path.append(os.path.abspath("."))
+
+import argparse
+import time
+import numpy as np
+
+from models.dense_backends import DenseIndex, ExactBackend, QUANTIZATION_MODES, normalize_rows, quantize
+
+
+def make_embeddings(num_vectors, dim, num_clusters, rng):
+    """ Normalized vectors around random cluster centers (like product embeddings) """
+    centers = normalize_rows(rng.standard_normal((num_clusters, dim)))
+    vectors = np.empty((num_vectors, dim), dtype=np.float32)
+    for start in range(0, num_vectors, 100_000):
+        end = min(start + 100_000, num_vectors)
+        assign = rng.integers(0, num_clusters, end - start)
+        vectors[start:end] = normalize_rows(
+            centers[assign] + 0.6 * rng.standard_normal((end - start, dim)).astype(np.float32) / np.sqrt(dim)
+        )
+    return vectors
+
+
+def time_queries(backend, queries, top_k):
+    results, latencies = [], []
+    for q in queries:
+        start = time.perf_counter()
+        results.append(backend.search(q, top_k)[0])
+        latencies.append((time.perf_counter() - start) * 1000)
+    return results, np.array(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark quantized local dense search")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[31000, 300000, 1000000])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--clusters", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--top-k", type=int, default=50)
+    parser.add_argument("--oversample", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+
+    print("DENSE QUANTIZATION BENCHMARK")
+    print(f"Queries: {args.queries} | top_k={args.top_k} | dim={args.dim}")
+
+    for num_vectors in args.sizes:
+        print(f"\n{num_vectors:,} vectors")
+        embeddings = make_embeddings(num_vectors, args.dim, args.clusters, rng)
+        product_ids = [str(i) for i in range(num_vectors)]
+        index = DenseIndex(embeddings, product_ids, quantized={})
+        for mode in QUANTIZATION_MODES:
+            index.quantized[mode] = quantize(embeddings, mode)
+
+        # Queries near random products
+        rows = rng.integers(0, num_vectors, args.queries)
+        queries = normalize_rows(embeddings[rows] + 0.5 * rng.standard_normal((args.queries, args.dim)) / np.sqrt(args.dim))
+
+        exact, latencies = time_queries(ExactBackend(index), queries, args.top_k)
+        mb = embeddings.nbytes / 1024 / 1024
+        print(f"  {'mode':10s}{'oversample':>11s}{'first pass MB':>15s}{'recall@' + str(args.top_k):>11s}"
+              f"{'p50 ms':>9s}{'p95 ms':>9s}")
+        print(f"  {'float32':10s}{'-':>11s}{mb:15.1f}{1.0:11.3f}"
+              f"{np.percentile(latencies, 50):9.2f}{np.percentile(latencies, 95):9.2f}")
+
+        for mode in QUANTIZATION_MODES:
+            mb = index.quantized[mode][0].nbytes / 1024 / 1024
+            for oversample in args.oversample:
+                found, latencies = time_queries(ExactBackend(index, mode, oversample), queries, args.top_k)
+                recall = np.mean([len(set(a) & set(b)) / len(a) for a, b in zip(exact, found)])
+                print(f"  {mode:10s}{oversample:11d}{mb:15.1f}{recall:11.3f}"
+                      f"{np.percentile(latencies, 50):9.2f}{np.percentile(latencies, 95):9.2f}")
+
+        del index, embeddings
+
+
+if __name__ == "__main__":
+    main()
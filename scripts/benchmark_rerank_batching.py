@@ -0,0 +1,95 @@
+"""
+RERANK BATCHING BENCHMARK
+Throughput of the reranker under concurrent /search-like requests (20
+[query, product] pairs each) from --clients threads:
+- direct: every request calls reranker.predict on its own pairs (the
+  behaviour before the batcher)
+- batched: requests go through RerankBatcher, for each batch size x
+  max wait combination
+Reports requests/s, pairs/s, p50 / p95 request latency and the mean batch
+size the batcher ran. The reranker is the one the API would load
+(RERANKER_BACKEND, or --backend). direct holds --clients batches in memory at
+once; --no-direct skips it on small hosts.
+
+Usage:
+    python scripts/benchmark_rerank_batching.py
+    python scripts/benchmark_rerank_batching.py --backend onnx --batch-sizes 16 32 64 --waits 2 5 10
+"""
+
+import sys
+import os
+sys.path.append(os.path.abspath("."))
+
+import argparse
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+from models.rerankers import create_reranker
+from models.rerank_batcher import RerankBatcher
+from scripts.benchmark_reranker import sample_pairs, EXPORT_PATH, MODEL_NAME
+
+
+def run(score, requests, clients, rounds):
+    """ Each client sends rounds requests back to back; (latencies ms, wall seconds) """
+    def client(c):
+        latencies = []
+        for r in range(rounds):
+            pairs = requests[(c * rounds + r) % len(requests)]
+            start = time.perf_counter()
+            score(pairs)
+            latencies.append((time.perf_counter() - start) * 1000)
+        return latencies
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        latencies = [t for part in pool.map(client, range(clients)) for t in part]
+    return np.array(latencies), time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cross-request reranker batching")
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--rounds", type=int, default=5, help="Requests per client")
+    parser.add_argument("--pairs", type=int, default=20, help="Pairs per request")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[16, 32, 64])
+    parser.add_argument("--waits", type=float, nargs="+", default=[2, 5, 10], help="max_wait_ms values")
+    parser.add_argument("--backend", default=os.getenv("RERANKER_BACKEND", "torch"))
+    parser.add_argument("--model", default=MODEL_NAME)
+    parser.add_argument("--path", default=EXPORT_PATH)
+    parser.add_argument("--no-direct", action="store_true", help="Only measure the batcher")
+    args = parser.parse_args()
+
+    print("RERANK BATCHING BENCHMARK")
+    reranker = create_reranker(args.backend, args.model, path=args.path)
+    rng = random.Random(0)
+    requests = [sample_pairs(args.pairs, rng) for _ in range(64)]
+    print(f"Reranker {reranker.name} | {args.clients} clients x {args.rounds} requests x {args.pairs} pairs")
+
+    # Warm the model and the allocator at every batch size used
+    for size in sorted(set(args.batch_sizes + [args.pairs])):
+        reranker.predict((requests[0] * size)[:size], batch_size=size)
+
+    total = args.clients * args.rounds
+    print(f"\n{'mode':>20s}{'req/s':>8s}{'pairs/s':>9s}{'p50 ms':>9s}{'p95 ms':>9s}{'avg batch':>11s}")
+
+    direct = None
+    if not args.no_direct:
+        latencies, wall = run(lambda pairs: reranker.predict(pairs), requests, args.clients, args.rounds)
+        direct = total / wall
+        print(f"{'direct':>20s}{direct:8.1f}{total * args.pairs / wall:9.0f}"
+              f"{np.percentile(latencies, 50):9.1f}{np.percentile(latencies, 95):9.1f}{args.pairs:11.1f}")
+
+    for batch_size in args.batch_sizes:
+        for wait in args.waits:
+            batcher = RerankBatcher(reranker, batch_size=batch_size, max_wait_ms=wait)
+            latencies, wall = run(batcher.score, requests, args.clients, args.rounds)
+            stats = batcher.stats()
+            print(f"{f'batch {batch_size} wait {wait:g}ms':>20s}{total / wall:8.1f}{total * args.pairs / wall:9.0f}"
+                  f"{np.percentile(latencies, 50):9.1f}{np.percentile(latencies, 95):9.1f}"
+                  f"{stats['avg_batch_size']:11.1f}" + (f"  ({total / wall / direct:.2f}x direct)" if direct else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+RERANKER LATENCY BENCHMARK
+Latency of one rerank call (20 [query, product] pairs by default, the
+API's reranked candidate count) for the PyTorch CrossEncoder and the ONNX
+Runtime exports (float32, int8), at several intra-op thread counts.
+Documents are real product titles + summaries from cache/payload_store when
+present, else synthetic text of similar length.
+Pick RERANKER_THREADS from the fastest int8 row that leaves cores for the
+other search workers.
+
+Usage:
+    python scripts/benchmark_reranker.py
+    python scripts/benchmark_reranker.py --pairs 50 --threads 1 2 4 8 --backends onnx-int8
+"""
+
+import sys
+import os
+sys.path.append(os.path.abspath("."))
+
+import argparse
+import random
+import time
+import numpy as np
+
+from models.rerankers import ONNXReranker, TorchReranker
+from data.evaluation_queries import EVALUATION_QUERIES
+
+EXPORT_PATH = "cache/reranker_onnx"
+PAYLOAD_PATH = "cache/payload_store"
+MODEL_NAME = "BAAI/bge-reranker-base"
+
+
+def sample_pairs(num_pairs, rng):
+    """ num_pairs [query, title + summary] pairs for one random evaluation query """
+    query = rng.choice(EVALUATION_QUERIES)["query"]
+    if os.path.exists(os.path.join(PAYLOAD_PATH, "manifest.json")):
+        from models.payload_store import PayloadStore
+
+        store = PayloadStore.load(PAYLOAD_PATH)
+        rows = rng.sample(range(store.num_rows), num_pairs)
+        return [[query, f"{p['title']} {p['abstracted_summary']}"] for p in store.get(rows)]
+
+    words = "wireless earbuds charging case bass battery bluetooth noise cancelling sport fit sound comfort".split()
+    text = lambda n: " ".join(rng.choice(words) for _ in range(n))
+    return [[query, f"{text(12)} {text(rng.randint(60, 160))}"] for _ in range(num_pairs)]
+
+
+def time_ms(reranker, pairs, repeats, warmup=3):
+    for _ in range(warmup):
+        reranker.predict(pairs)
+    latencies = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        reranker.predict(pairs)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return np.array(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark reranker backends on one rerank call")
+    parser.add_argument("--pairs", type=int, default=20)
+    parser.add_argument("--repeats", type=int, default=30)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, os.cpu_count()])
+    parser.add_argument("--backends", nargs="+", default=["torch", "onnx-float32", "onnx-int8"],
+                        help="torch runs first at each thread count (the speedup baseline)")
+    parser.add_argument("--path", default=EXPORT_PATH)
+    args = parser.parse_args()
+
+    print("RERANKER LATENCY BENCHMARK")
+    pairs = sample_pairs(args.pairs, random.Random(0))
+    print(f"{args.pairs} pairs | query '{pairs[0][0]}' | mean document {np.mean([len(d) for _, d in pairs]):.0f} chars")
+
+    torch_reranker = TorchReranker(MODEL_NAME) if "torch" in args.backends else None
+
+    print(f"\n{'backend':>14s}{'threads':>9s}{'p50 ms':>9s}{'p95 ms':>9s}{'pairs/s':>9s}{'vs torch':>10s}")
+    for threads in sorted(set(args.threads)):
+        torch_p50 = None
+        for name in args.backends:
+            if name == "torch":
+                import torch
+
+                torch.set_num_threads(threads)
+                reranker = torch_reranker
+            else:
+                reranker = ONNXReranker(args.path, precision=name.split("-", 1)[1], threads=threads)
+
+            latencies = time_ms(reranker, pairs, args.repeats)
+            p50 = np.percentile(latencies, 50)
+            if name == "torch":
+                torch_p50 = p50
+            speedup = f"{torch_p50 / p50:9.1f}x" if torch_p50 else ""
+            print(f"{name:>14s}{threads:9d}{p50:9.1f}{np.percentile(latencies, 95):9.1f}"
+                  f"{args.pairs / p50 * 1000:9.0f}{speedup}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+SHARED CACHE BENCHMARK
+1. Value encoding: pickle vs models/cache_codec.py (bytes, encode / decode
+   time) for a query embedding, a (point ids, scores) hit list and a list of
+   20 hybrid results
+2. Workers: N processes serve one Zipf-skewed query stream (dealt round-robin,
+   like a load balancer). Each has a private LRU (L1); a lookup that misses it
+   goes to the shared query cache (L2) before "computing". Reports the share
+   of lookups served from L1 alone vs L1 + shared L2, and L2 read latency.
+No models or Qdrant needed. Redis is measured when --redis-url is given.
+
+Usage:
+    python scripts/benchmark_shared_cache.py
+    python scripts/benchmark_shared_cache.py --workers 4 --redis-url redis://localhost:6379/15
+"""
+
+import sys
+import os
+sys.path.append(os.path.abspath("."))
+
+import time
+import pickle
+import random
+import argparse
+import tempfile
+import multiprocessing
+import numpy as np
+
+from models import cache_codec
+from models.cache import LRUCache
+from models.query_cache import QueryCache, SQLiteStore, RedisStore
+
+VERSION = "benchmark"
+
+
+def sample_values(rng):
+    words = "wireless earbuds charging case bass battery bluetooth noise cancelling sport fit".split()
+    text = lambda n: " ".join(rng.choice(words) for _ in range(n))
+    results = [{
+        "product_id": f"B0{rng.randrange(10**8):08d}", "title": text(12), "brand": text(1),
+        "price": round(rng.uniform(5, 200), 2), "avg_rating": 4.2, "review_count": rng.randrange(5000),
+        "sentiment_score": 0.81, "abstracted_summary": text(80),
+        "aspects": [{"aspect": text(1), "sentiment": "positive", "count": 3}] * 3,
+        "hybrid_score": rng.random(), "dense_score": rng.random(), "bm25_score": rng.random(),
+    } for _ in range(20)]
+    return {
+        "embedding": np.random.default_rng(0).standard_normal(384).astype(np.float32),
+        "hits (50)": (np.arange(50, dtype=np.int32), np.linspace(1, 0, 50, dtype=np.float32)),
+        "hybrid (20)": results,
+    }
+
+
+def time_us(fn, repeats=2000):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats * 1e6
+
+
+def encoding_report():
+    print("\nVALUE ENCODING")
+    print(f"{'value':>13s}{'pickle B':>10s}{'codec B':>9s}{'pickle enc':>12s}{'codec enc':>11s}"
+          f"{'pickle dec':>12s}{'codec dec':>11s}  (us)")
+    for name, value in sample_values(random.Random(0)).items():
+        pickled = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        encoded = cache_codec.encode(value)
+        print(f"{name:>13s}{len(pickled):10d}{len(encoded):9d}"
+              f"{time_us(lambda: pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)):12.1f}"
+              f"{time_us(lambda: cache_codec.encode(value)):11.1f}"
+              f"{time_us(lambda: pickle.loads(pickled)):12.1f}{time_us(lambda: cache_codec.decode(encoded)):11.1f}")
+    print(f"  results list encoding: {'msgpack' if cache_codec.msgpack is not None else 'JSON (pip install msgpack)'}")
+
+
+def make_store(kind, target):
+    return SQLiteStore(target) if kind == "sqlite" else RedisStore(target, ttl=600)
+
+
+def worker(worker_id, args, kind, target, shared, out):
+    """ Serve every workers-th query of the stream """
+    rng = random.Random(0)
+    stream = [min(int(rng.paretovariate(args.zipf)), args.queries) for _ in range(args.lookups)]
+    value = sample_values(random.Random(1))["hybrid (20)"]
+    l1 = LRUCache("hybrid", args.l1_entries)
+    l2 = QueryCache(make_store(kind, target)) if shared else None
+
+    l1_hits = l2_hits = 0
+    l2_times = []
+    for i in range(worker_id, len(stream), args.workers):
+        query = f"query {stream[i]}"
+        if l1.get(query) is not None:
+            l1_hits += 1
+            continue
+        found = None
+        if l2 is not None:
+            start = time.perf_counter()
+            found = l2.get("hybrid", VERSION, query)
+            l2_times.append(time.perf_counter() - start)
+        if found is not None:
+            l2_hits += 1
+        else:
+            found = value
+            if l2 is not None:
+                l2.set("hybrid", VERSION, query, found)
+        l1.put(query, found)
+    out.put((l1_hits, l2_hits, l2_times))
+
+
+def workers_report(args, kind, target):
+    print(f"\n{args.workers} WORKERS, {kind.upper()} L2 ({args.lookups} lookups, {args.queries} distinct queries, "
+          f"L1 {args.l1_entries} entries per worker)")
+    for shared in (False, True):
+        out = multiprocessing.Queue()
+        procs = [multiprocessing.Process(target=worker, args=(w, args, kind, target, shared, out))
+                 for w in range(args.workers)]
+        for p in procs:
+            p.start()
+        parts = [out.get() for _ in procs]
+        for p in procs:
+            p.join()
+
+        l1_hits = sum(p[0] for p in parts)
+        l2_hits = sum(p[1] for p in parts)
+        l2_times = [t for p in parts for t in p[2]]
+        line = f"  {'private L1 + shared L2' if shared else 'private L1 only':>24s}: " \
+               f"served from cache {(l1_hits + l2_hits) / args.lookups:.3f} (L1 {l1_hits / args.lookups:.3f})"
+        if l2_times:
+            line += f" | L2 read p50 {np.percentile(l2_times, 50) * 1e3:.2f} ms, " \
+                    f"p95 {np.percentile(l2_times, 95) * 1e3:.2f} ms"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the shared (L2) query cache")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--lookups", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=5000, help="Distinct queries in the stream")
+    parser.add_argument("--zipf", type=float, default=0.5)
+    parser.add_argument("--l1-entries", type=int, default=1000)
+    parser.add_argument("--redis-url", default=None)
+    args = parser.parse_args()
+
+    print("SHARED CACHE BENCHMARK")
+    encoding_report()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workers_report(args, "sqlite", os.path.join(tmp, "query_cache.db"))
+    if args.redis_url:
+        RedisStore(args.redis_url).client.flushdb()
+        workers_report(args, "redis", args.redis_url)
+
+
+if __name__ == "__main__":
+    main()
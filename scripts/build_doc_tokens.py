@@ -0,0 +1,57 @@
+"""
+BUILD DOCUMENT TOKENS
+Tokenizes every product's rerank text (title + abstracted summary) once with
+the ONNX reranker's tokenizer and writes cache/rerank_doc_tokens. With it,
+RERANKER_BACKEND=onnx only tokenizes the query per rerank.
+Re-run after re-exporting the reranker or rebuilding the payload store
+(the engine ignores a store built from other ones).
+
+--budget caps the tokens kept per document. The default (max_length minus the
+pair's special tokens) gives the same model inputs as tokenizing the text;
+a lower budget trims long documents before the query-time truncation.
+
+Usage:
+    python scripts/build_doc_tokens.py
+    python scripts/build_doc_tokens.py --budget 384
+"""
+
+import sys
+import os
+sys.path.append(os.path.abspath("."))
+
+import argparse
+import time
+import numpy as np
+
+from models.rerankers import PairTokenizer
+from models.payload_store import PayloadStore
+from models.doc_tokens import DocTokenStore
+
+EXPORT_PATH = "cache/reranker_onnx"
+PAYLOAD_PATH = "cache/payload_store"
+TOKENS_PATH = "cache/rerank_doc_tokens"
+
+parser = argparse.ArgumentParser(description="Precompute reranker token ids of every product")
+parser.add_argument("--budget", type=int, default=None, help="Max tokens per document")
+parser.add_argument("--export-path", default=EXPORT_PATH)
+parser.add_argument("--payload-path", default=PAYLOAD_PATH)
+parser.add_argument("--path", default=TOKENS_PATH)
+args = parser.parse_args()
+
+print("BUILDING DOCUMENT TOKENS")
+
+tokenizer = PairTokenizer(args.export_path)
+payloads = PayloadStore.load(args.payload_path)
+print(f"{payloads.num_rows:,} products | tokenizer {tokenizer.tokenizer_id} | "
+      f"budget {min(args.budget or tokenizer.budget, tokenizer.budget)} (max {tokenizer.budget})")
+
+start = time.perf_counter()
+store = DocTokenStore.build(payloads, tokenizer, args.budget)
+lengths = np.diff(store.offsets)
+print(f"Tokenized in {time.perf_counter() - start:.1f}s | tokens per document: "
+      f"mean {lengths.mean():.0f}, p95 {np.percentile(lengths, 95):.0f}, "
+      f"at budget {(lengths >= store.budget).mean():.1%}")
+
+store.save(args.path)
+size = sum(os.path.getsize(os.path.join(args.path, name)) for name in os.listdir(args.path)) / (1024 * 1024)
+print(f"\n✓ Document tokens saved to {args.path}/ ({size:.1f}MB)")
@@ -1,9 +1,18 @@
-import polars as pl
-from rank_bm25 import BM25Okapi
-import pickle
+import sys
 import os
+sys.path.append(os.path.abspath("."))
+
+import polars as pl
 from tqdm import tqdm
 
+from models.bm25_index import BM25Index
+from models.text_analyzer import TextAnalyzer, document_text
+
+INDEX_PATH = "cache/bm25_index"
+
+# Terms found in fewer products than this are left out of the vocabulary
+MIN_DF = int(os.getenv("BM25_MIN_DF", "2"))
+
 print("CREATING BM25 KEYWORD INDEX")
 
 # Load dataset
@@ -13,42 +22,33 @@ print(f"Loaded {df.height:,} products")
 
 # Prepare corpus for BM25
 print("\nTokenizing corpus for BM25")
+analyzer = TextAnalyzer(min_df=MIN_DF)
 corpus = []
 product_ids = []
 
 for row in tqdm(df.iter_rows(named=True), total=df.height, desc="Processing products"):
-    # Combine text fields
-    title = str(row.get('title', ''))
-    summary = str(row.get('abstracted_summary', ''))
-    description = str(row.get('description', ''))
-    
-    text = f"{title} {summary} {description}"
-    
-    # Tokenize (simple word splitting)
-    tokens = text.lower().split()
-    
-    corpus.append(tokens)
+    # Shared analyzer: same normalization and stopwords as the query side
+    corpus.append(analyzer.tokenize(document_text(row)))
     product_ids.append(str(row['product_id']))
 
-# Build BM25 index
+# Build BM25 index (CSR posting lists, frozen vocabulary)
 print("\nBuilding BM25 index")
-bm25 = BM25Okapi(corpus)
+bm25 = BM25Index.from_corpus(corpus, product_ids, analyzer=analyzer)
 
 # Create cache directory
 os.makedirs("cache", exist_ok=True)
 
-# Save index
+# Save index (flat .npy arrays + manifest.json, opened memory-mapped by the API)
 print("\nSaving BM25 index")
-with open("cache/bm25_index.pkl", "wb") as f:
-    pickle.dump({
-        'bm25': bm25,
-        'corpus': corpus,
-        'product_ids': product_ids
-    }, f)
+bm25.save(INDEX_PATH)
 
-file_size = os.path.getsize('cache/bm25_index.pkl') / 1024 / 1024
+dir_size = sum(
+    os.path.getsize(os.path.join(INDEX_PATH, name)) for name in os.listdir(INDEX_PATH)
+) / 1024 / 1024
 
 print("BM25 INDEX CREATED!")
-print(f"Indexed {len(corpus):,} products")
-print(f"Saved to: cache/bm25_index.pkl")
-print(f"File size: {file_size:.1f}MB")
+print(f"Indexed {bm25.num_docs:,} products")
+print(f"Vocabulary: {bm25.num_terms:,} terms (min_df={MIN_DF}), {len(bm25.doc_ids):,} postings")
+print(f"Index id: {bm25.index_id}")
+print(f"Saved to: {INDEX_PATH}/")
+print(f"Index size: {dir_size:.1f}MB")
@@ -0,0 +1,35 @@
+"""
+CREATE PAYLOAD INDEXES
+Adds the payload indexes used by filtered search (models/product_filter.py)
+to an existing collection. New uploads (scripts/upload_to_qdrant.py) create
+them already; creating an index that exists is a no-op.
+
+Usage:
+    python scripts/create_payload_indexes.py
+"""
+
+import sys
+import os
+sys.path.append(os.path.abspath("."))
+
+from qdrant_client import QdrantClient
+from dotenv import load_dotenv
+
+from models.product_filter import create_payload_indexes, PAYLOAD_INDEXES
+
+load_dotenv()
+
+collection_name = "amazon-products"
+
+qdrant = QdrantClient(
+    url=os.getenv("QDRANT_URL"),
+    api_key=os.getenv("QDRANT_API_KEY"),
+)
+
+print(f"Creating payload indexes on '{collection_name}'")
+create_payload_indexes(qdrant, collection_name)
+
+schema = qdrant.get_collection(collection_name).payload_schema
+for field in PAYLOAD_INDEXES:
+    info = schema.get(field)
+    print(f"  {field:15s}{info.data_type if info else 'missing'}")
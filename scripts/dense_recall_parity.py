@@ -0,0 +1,80 @@
+"""
+DENSE RECALL PARITY
+In-process dense backends (exact matmul, HNSW) vs the Qdrant round trip
+on the evaluation queries. For each backend: recall@k of Qdrant's top-k
+(the current production results) and per-query latency.
+
+Usage:
+    python scripts/dense_recall_parity.py
+    python scripts/dense_recall_parity.py --top-k 50 --backends exact hnsw
+"""
+
+import sys
+import os
+sys.path.append(os.path.abspath("."))
+
+import argparse
+import time
+import numpy as np
+from qdrant_client import QdrantClient
+from fastembed import TextEmbedding
+from dotenv import load_dotenv
+
+from models.dense_backends import create_dense_backend
+from data.evaluation_queries import EVALUATION_QUERIES
+
+load_dotenv()
+
+INDEX_PATH = "cache/dense_index"
+COLLECTION_NAME = "amazon-products"
+
+parser = argparse.ArgumentParser(description="Recall parity of local dense backends against Qdrant")
+parser.add_argument("--top-k", type=int, default=50)
+parser.add_argument("--backends", nargs="+", default=["exact", "hnsw"])
+args = parser.parse_args()
+
+print("DENSE RECALL PARITY")
+
+qdrant = QdrantClient(
+    url=os.getenv("QDRANT_URL"),
+    api_key=os.getenv("QDRANT_API_KEY"),
+)
+embedder = TextEmbedding("BAAI/bge-small-en-v1.5")
+
+queries = [test['query'] for test in EVALUATION_QUERIES]
+vectors = list(embedder.embed(queries))
+print(f"{len(queries)} evaluation queries | top_k={args.top_k}")
+
+backends = {"qdrant": create_dense_backend("qdrant", qdrant=qdrant, collection_name=COLLECTION_NAME)}
+for kind in args.backends:
+    try:
+        backends[kind] = create_dense_backend(kind, path=INDEX_PATH)
+    except ImportError as e:
+        print(f"Skipping {kind}: {e}")
+
+results = {name: [] for name in backends}
+latency = {name: [] for name in backends}
+for vector in vectors:
+    for name, backend in backends.items():
+        start = time.perf_counter()
+        point_ids, _ = backend.search(vector, args.top_k)
+        latency[name].append((time.perf_counter() - start) * 1000)
+        results[name].append(point_ids.tolist())
+
+print(f"\n{'backend':10s}{'recall@10':>12s}{'recall@' + str(args.top_k):>12s}{'p50 ms':>10s}{'p95 ms':>10s}")
+for name in backends:
+    recall_10, recall_k = [], []
+    for reference, found in zip(results["qdrant"], results[name]):
+        recall_10.append(len(set(reference[:10]) & set(found[:10])) / max(len(reference[:10]), 1))
+        recall_k.append(len(set(reference) & set(found)) / max(len(reference), 1))
+    print(f"{name:10s}{np.mean(recall_10):12.3f}{np.mean(recall_k):12.3f}"
+          f"{np.percentile(latency[name], 50):10.2f}{np.percentile(latency[name], 95):10.2f}")
+
+# Queries where a local backend disagrees with Qdrant on the top 10
+for name in backends:
+    if name == "qdrant":
+        continue
+    for query, reference, found in zip(queries, results["qdrant"], results[name]):
+        missing = [point for point in reference[:10] if point not in found[:10]]
+        if missing:
+            print(f"  {name}: '{query}' misses {missing}")
@@ -5,7 +5,8 @@ CACHE_DIR = "cache"
 
 # Google Cloud Storage configuration
 GCS_BUCKET_NAME = os.getenv("GCS_BUCKET_NAME", "amazon-cache-bucket")
-GCS_FILES = ["bm25_index.pkl", "product_id_mapping.pkl"]
+GCS_FILES = ["product_id_mapping.pkl"]
+GCS_DIRS = ["bm25_index", "dense_index", "payload_store"]
 
 def download_from_gcs():
     """Download cache files from Google Cloud Storage"""
@@ -34,6 +35,27 @@ def download_from_gcs():
             
             file_size = os.path.getsize(destination) / (1024 * 1024)
             print(f"{filename} downloaded successfully ({file_size:.2f}MB)\n")
+
+        for dirname in GCS_DIRS:
+            local_dir = os.path.join(CACHE_DIR, dirname)
+
+            # manifest.json is written last, so it marks a complete index
+            if os.path.exists(os.path.join(local_dir, "manifest.json")):
+                print(f"{dirname}/ already exists, skipping\n")
+                continue
+
+            print(f"Downloading {dirname}/...")
+            os.makedirs(local_dir, exist_ok=True)
+            blobs = bucket.list_blobs(prefix=f"cache/{dirname}/")
+            for blob in sorted(blobs, key=lambda b: b.name.endswith("manifest.json")):
+                if blob.name.endswith("/"):
+                    continue
+                blob.download_to_filename(os.path.join(local_dir, os.path.basename(blob.name)))
+
+            dir_size = sum(
+                os.path.getsize(os.path.join(local_dir, name)) for name in os.listdir(local_dir)
+            ) / (1024 * 1024)
+            print(f"{dirname}/ downloaded successfully ({dir_size:.2f}MB)\n")
         
         print("All cache files ready!")
         return True
@@ -0,0 +1,90 @@
+import sys
+import os
+sys.path.append(os.path.abspath("."))
+
+import argparse
+import numpy as np
+from qdrant_client import QdrantClient
+from tqdm import tqdm
+from dotenv import load_dotenv
+
+from models.dense_backends import DenseIndex, HNSWBackend
+from models.payload_store import PayloadStore
+
+load_dotenv()
+
+INDEX_PATH = "cache/dense_index"
+PAYLOAD_PATH = "cache/payload_store"
+COLLECTION_NAME = "amazon-products"
+MODEL_NAME = "BAAI/bge-small-en-v1.5"
+
+parser = argparse.ArgumentParser(description="Export the Qdrant collection's vectors for in-process dense search")
+parser.add_argument("--hnsw", action="store_true", help="Also build the HNSW graph (needs hnswlib)")
+parser.add_argument("--payloads", action="store_true",
+                    help=f"Also write the full payloads to {PAYLOAD_PATH} (local result hydration)")
+parser.add_argument("--page-size", type=int, default=1000)
+args = parser.parse_args()
+
+print("EXPORTING PRODUCT EMBEDDINGS")
+
+qdrant = QdrantClient(
+    url=os.getenv("QDRANT_URL"),
+    api_key=os.getenv("QDRANT_API_KEY"),
+)
+total = qdrant.get_collection(COLLECTION_NAME).points_count
+print(f"\nCollection '{COLLECTION_NAME}': {total:,} points")
+
+# Scroll every point with its stored vector (exactly what Qdrant searches)
+vectors = {}
+product_ids = {}
+payloads = {}
+offset = None
+with tqdm(total=total, desc="Scrolling points") as progress:
+    while True:
+        points, offset = qdrant.scroll(
+            collection_name=COLLECTION_NAME,
+            limit=args.page_size,
+            offset=offset,
+            with_payload=True if args.payloads else ["product_id"],
+            with_vectors=True,
+        )
+        for point in points:
+            vectors[point.id] = point.vector
+            product_ids[point.id] = point.payload["product_id"]
+            if args.payloads:
+                payloads[point.id] = point.payload
+        progress.update(len(points))
+        if offset is None:
+            break
+
+# Row i must be point id i (same numbering as product_id_mapping.pkl and the BM25 index)
+ids = sorted(vectors)
+if ids != list(range(len(ids))):
+    raise ValueError("Point ids are not 0..N-1; re-run scripts/upload_to_qdrant.py")
+
+index = DenseIndex.from_vectors(
+    np.array([vectors[i] for i in ids], dtype=np.float32),
+    [product_ids[i] for i in ids],
+    model=MODEL_NAME,
+)
+
+print("\nSaving dense index")
+index.save(INDEX_PATH)
+
+if args.hnsw:
+    HNSWBackend(index, INDEX_PATH)
+
+if args.payloads:
+    print("Saving payload store")
+    PayloadStore.from_payloads([payloads[i] for i in ids]).save(PAYLOAD_PATH)
+    print(f"Payloads saved to: {PAYLOAD_PATH}/")
+
+dir_size = sum(
+    os.path.getsize(os.path.join(INDEX_PATH, name)) for name in os.listdir(INDEX_PATH)
+) / 1024 / 1024
+
+print("DENSE INDEX EXPORTED!")
+print(f"Vectors: {index.num_vectors:,} x {index.dim}")
+print(f"Index id: {index.index_id}")
+print(f"Saved to: {INDEX_PATH}/")
+print(f"Index size: {dir_size:.1f}MB")
@@ -0,0 +1,45 @@
+"""
+EXPORT RERANKER TO ONNX
+Exports the BGE CrossEncoder to cache/reranker_onnx (float32 ONNX graph, a
+dynamically quantized int8 copy, the fast tokenizer and manifest.json) for
+RERANKER_BACKEND=onnx. Needs torch, transformers and onnxruntime; serving
+the export only needs onnxruntime and tokenizers.
+
+Usage:
+    python scripts/export_reranker_onnx.py
+    python scripts/export_reranker_onnx.py --no-quantize
+"""
+
+import sys
+import os
+sys.path.append(os.path.abspath("."))
+
+import argparse
+
+from models.rerankers import export_onnx
+
+EXPORT_PATH = "cache/reranker_onnx"
+MODEL_NAME = "BAAI/bge-reranker-base"
+
+parser = argparse.ArgumentParser(description="Export the CrossEncoder reranker to ONNX (+ int8)")
+parser.add_argument("--model", default=MODEL_NAME)
+parser.add_argument("--path", default=EXPORT_PATH)
+parser.add_argument("--max-length", type=int, default=512)
+parser.add_argument("--opset", type=int, default=14)
+parser.add_argument("--no-quantize", action="store_true", help="Skip the int8 copy")
+args = parser.parse_args()
+
+print("EXPORTING RERANKER TO ONNX")
+print(f"Model: {args.model}")
+
+manifest = export_onnx(args.model, args.path, max_length=args.max_length, opset=args.opset,
+                       quantize=not args.no_quantize)
+
+for precision in manifest["precisions"]:
+    name = "model_int8.onnx" if precision == "int8" else "model.onnx"
+    size = os.path.getsize(os.path.join(args.path, name)) / (1024 * 1024)
+    print(f"  {precision:8s} {name:18s} {size:8.1f}MB")
+
+print(f"\n✓ Reranker exported to {args.path}/")
+print("Check it with: python scripts/reranker_parity.py")
+print("Then precompute document tokens: python scripts/build_doc_tokens.py")
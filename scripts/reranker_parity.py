@@ -0,0 +1,96 @@
+"""
+RERANKER PARITY
+ONNX Runtime reranker (float32 and int8 exports) vs the sentence-transformers
+CrossEncoder on the evaluation queries. Each query's hybrid candidates
+(top 50, like the API) are scored by every backend and ranked like
+engine.rerank (CrossEncoder score + sentiment + popularity). For each backend:
+- max |score - torch score|
+- same top-1, top-3 / top-10 overlap and Kendall tau of the candidate order
+  against the torch ranking
+- p50 latency of one query's predict call
+
+Usage:
+    python scripts/reranker_parity.py
+    python scripts/reranker_parity.py --precisions int8 --threads 4
+"""
+
+import sys
+import os
+sys.path.append(os.path.abspath("."))
+
+import argparse
+import time
+import numpy as np
+from scipy.stats import kendalltau
+
+# Reference scores from the PyTorch CrossEncoder; fresh candidates (no shared cache)
+os.environ["RERANKER_BACKEND"] = "torch"
+os.environ["QUERY_CACHE_PATH"] = ""
+os.environ["SEMANTIC_CACHE_THRESHOLD"] = ""
+
+from models.hybrid_search_engine import HybridSearchEngine
+from models.rerankers import ONNXReranker
+from data.evaluation_queries import EVALUATION_QUERIES
+
+EXPORT_PATH = "cache/reranker_onnx"
+
+parser = argparse.ArgumentParser(description="Rerank order parity of the ONNX reranker against PyTorch")
+parser.add_argument("--candidates", type=int, default=50)
+parser.add_argument("--precisions", nargs="+", default=["float32", "int8"])
+parser.add_argument("--threads", type=int, default=None)
+parser.add_argument("--path", default=EXPORT_PATH)
+args = parser.parse_args()
+
+print("RERANKER PARITY")
+engine = HybridSearchEngine()
+
+backends = {"torch": engine.reranker}
+for precision in args.precisions:
+    reranker = ONNXReranker(args.path, precision=precision, threads=args.threads)
+    backends[reranker.name] = reranker
+
+queries = [test["query"] for test in EVALUATION_QUERIES]
+print(f"{len(queries)} evaluation queries | {args.candidates} candidates | threads={args.threads or 'default'}")
+
+
+def ranking(candidates, scores):
+    """ Product ids in engine.rerank order """
+    ranked = HybridSearchEngine._rank_reranked([dict(r) for r in candidates], scores, len(candidates))
+    return [r["product_id"] for r in ranked]
+
+
+orders = {name: [] for name in backends}
+scores = {name: [] for name in backends}
+latency = {name: [] for name in backends}
+for query in queries:
+    candidates = engine.hybrid_search(query, top_k=args.candidates)
+    if not candidates:
+        continue
+    pairs = [[query, f"{r['title']} {r['abstracted_summary']}"] for r in candidates]
+    for name, backend in backends.items():
+        start = time.perf_counter()
+        query_scores = np.asarray(backend.predict(pairs), dtype=np.float32)
+        latency[name].append((time.perf_counter() - start) * 1000)
+        scores[name].append(query_scores)
+        orders[name].append(ranking(candidates, query_scores))
+
+print(f"\n{'backend':>14s}{'max diff':>10s}{'top-1':>8s}{'top-3':>8s}{'top-10':>8s}{'tau':>8s}{'p50 ms':>9s}")
+for name in backends:
+    diff = max(float(np.abs(s - r).max()) for s, r in zip(scores[name], scores["torch"]))
+    top1, top3, top10, tau = [], [], [], []
+    for found, reference in zip(orders[name], orders["torch"]):
+        top1.append(found[0] == reference[0])
+        top3.append(len(set(found[:3]) & set(reference[:3])) / len(reference[:3]))
+        top10.append(len(set(found[:10]) & set(reference[:10])) / len(reference[:10]))
+        position = {product_id: i for i, product_id in enumerate(found)}
+        tau.append(kendalltau(range(len(reference)), [position[p] for p in reference])[0] if len(reference) > 1 else 1.0)
+    print(f"{name:>14s}{diff:10.4f}{np.mean(top1):8.3f}{np.mean(top3):8.3f}{np.mean(top10):8.3f}"
+          f"{np.mean(tau):8.3f}{np.percentile(latency[name], 50):9.1f}")
+
+# Queries whose top 3 changes
+for name in backends:
+    if name == "torch":
+        continue
+    for query, found, reference in zip(queries, orders[name], orders["torch"]):
+        if found[:3] != reference[:3]:
+            print(f"  {name}: '{query}' top-3 {found[:3]} (torch: {reference[:3]})")
@@ -0,0 +1,131 @@
+"""
+CACHE STRESS TEST
+Hammers one LRUCache (models/cache.py) from many threads with a skewed
+(Zipf-like) key stream of get / put / pop / clear calls, values sized like
+the engine's tiers (score arrays, result lists). Checks after every round:
+- no exceptions, every hit returns the value stored for its key
+- entry and byte counts within the budgets, bytes == sum of entry sizes
+- hits + misses == gets issued
+Prints throughput and the cache's counters. No models or Qdrant needed.
+
+Usage:
+    python scripts/stress_cache.py
+    python scripts/stress_cache.py --threads 32 --ops 50000 --ttl 0.01
+"""
+
+import sys
+import os
+sys.path.append(os.path.abspath("."))
+
+import time
+import random
+import argparse
+import threading
+import numpy as np
+
+from models.cache import LRUCache
+
+
+def make_value(key):
+    """ Value derived from the key, so a hit can be checked without shared state """
+    n = 10 + key % 90
+    if key % 2:
+        return (np.full(n, key, dtype=np.int32), np.zeros(n, dtype=np.float32))
+    return [{"product_id": f"P{key}", "title": "x" * n, "rank": i} for i in range(n // 10)]
+
+
+def holds_key(value, key):
+    if isinstance(value, tuple):
+        return int(value[0][0]) == key
+    return value[0]["product_id"] == f"P{key}"
+
+
+def worker(cache, ops, keys, seed, counts, errors, clear_every):
+    gets = 0
+    try:
+        rng = random.Random(seed)
+        for i in range(ops):
+            key = min(int(rng.paretovariate(1.1)), keys) - 1
+            action = rng.random()
+            if action < 0.7:
+                gets += 1
+                value = cache.get(key)
+                if value is not None and not holds_key(value, key):
+                    errors.append(f"key {key} returned a value of another key")
+            elif action < 0.97:
+                cache.put(key, make_value(key))
+            else:
+                cache.pop(key)
+            if clear_every and i % clear_every == clear_every - 1:
+                cache.clear()
+    except Exception as e:
+        errors.append(repr(e))
+    counts.append(gets)
+
+
+def check(cache, gets):
+    """ Budget / accounting invariants once all threads have stopped """
+    problems = []
+    stats = cache.stats()
+    for shard in cache._shards:
+        size = sum(entry[1] for entry in shard.entries.values())
+        if size != shard.bytes:
+            problems.append(f"shard bytes {shard.bytes} != entry sizes {size}")
+        if len(shard.entries) > cache._shard_entries:
+            problems.append(f"shard holds {len(shard.entries)} > {cache._shard_entries} entries")
+        if cache._shard_bytes is not None and shard.bytes > cache._shard_bytes:
+            problems.append(f"shard holds {shard.bytes} > {cache._shard_bytes} bytes")
+    if stats["hits"] + stats["misses"] != gets:
+        problems.append(f"hits + misses = {stats['hits'] + stats['misses']}, gets = {gets}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrency stress test of models/cache.py")
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--ops", type=int, default=20000, help="Operations per thread per round")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--keys", type=int, default=5000)
+    parser.add_argument("--max-entries", type=int, default=1000)
+    parser.add_argument("--max-kb", type=int, default=256)
+    parser.add_argument("--ttl", type=float, default=None)
+    parser.add_argument("--shards", type=int, default=8)
+    parser.add_argument("--clear-every", type=int, default=0, help="Each thread clears the cache every N ops")
+    args = parser.parse_args()
+
+    print("CACHE STRESS TEST")
+    print(f"{args.threads} threads x {args.ops} ops x {args.rounds} rounds | {args.keys} keys | "
+          f"budget {args.max_entries} entries / {args.max_kb} KB | {args.shards} shards | ttl {args.ttl}")
+
+    cache = LRUCache("stress", args.max_entries, args.max_kb * 1024, args.ttl, args.shards)
+    total_gets, failed = 0, False
+    for round_ in range(1, args.rounds + 1):
+        counts, errors = [], []
+        threads = [
+            threading.Thread(target=worker, args=(cache, args.ops, args.keys, round_ * 1000 + t, counts, errors,
+                                                  args.clear_every))
+            for t in range(args.threads)
+        ]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        total_gets += sum(counts)
+        problems = errors[:5] + check(cache, total_gets)
+        failed |= bool(problems)
+        ops = args.threads * args.ops
+        print(f"  round {round_}: {ops / elapsed:,.0f} ops/s | {'OK' if not problems else 'FAILED'}")
+        for problem in problems:
+            print(f"    {problem}")
+
+    print("\nCounters:")
+    for name, value in cache.stats().items():
+        print(f"  {name}: {value}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
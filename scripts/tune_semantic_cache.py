@@ -0,0 +1,118 @@
+"""
+SEMANTIC CACHE THRESHOLD TUNING
+Replays EVALUATION_QUERIES and rewrites of them (case / spacing, extra words,
+word order, dropped word) against a semantic cache warmed with the original
+queries. For each similarity threshold:
+- hit rate of the rewrites (they should be served from their original)
+- false hits: a probe served the results of a different evaluation query
+- NDCG@10 of the served results vs the probe's own fresh results
+Pick the lowest threshold with no false hits and no NDCG loss, then set
+SEMANTIC_CACHE_THRESHOLD.
+
+Usage:
+    python scripts/tune_semantic_cache.py
+    python scripts/tune_semantic_cache.py --thresholds 0.85 0.9 0.95
+"""
+
+import sys
+import os
+sys.path.append(os.path.abspath("."))
+
+import argparse
+import numpy as np
+
+# Fresh results only: no persistent or semantic cache while measuring
+os.environ["QUERY_CACHE_BACKEND"] = "sqlite"
+os.environ["QUERY_CACHE_PATH"] = ""
+os.environ["SEMANTIC_CACHE_THRESHOLD"] = ""
+
+from models.hybrid_search_engine import HybridSearchEngine
+from models.evaluation_metrics import ndcg_at_k
+from models.query_cache import normalize_query
+from data.evaluation_queries import EVALUATION_QUERIES
+
+
+def rewrites(query):
+    """ Near-duplicate phrasings a user could type for the same need """
+    words = query.split()
+    variants = [query.upper(), "  ".join(words), f"best {query}", f"{query} for sale"]
+    if len(words) >= 2:
+        variants.append(" ".join(reversed(words)))
+    if len(words) >= 3:
+        variants.append(" ".join(words[:-1]))
+    return variants
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tune the semantic cache similarity threshold")
+    parser.add_argument("--thresholds", type=float, nargs="+",
+                        default=[0.80, 0.85, 0.88, 0.90, 0.92, 0.94, 0.95, 0.96, 0.98])
+    parser.add_argument("--top-k", type=int, default=10)
+    args = parser.parse_args()
+
+    print("SEMANTIC CACHE THRESHOLD TUNING")
+    engine = HybridSearchEngine()
+
+    tests = [t for t in EVALUATION_QUERIES if t["ground_truth"]]
+    originals = [t["query"] for t in tests]
+
+    # Probes: every original (must not hit another original) and its rewrites
+    probes = [(q, i, False) for i, q in enumerate(originals)]
+    probes += [(v, i, True) for i, q in enumerate(originals) for v in rewrites(q)]
+    print(f"{len(originals)} evaluation queries, {len(probes) - len(originals)} rewrites")
+
+    def unit(query):
+        v = np.asarray(engine.get_embedding(query), dtype=np.float32)
+        return v / np.linalg.norm(v)
+
+    cached_vectors = np.stack([unit(q) for q in originals])
+    fresh = {}
+    for query, _, _ in probes:
+        results = engine.hybrid_search(query, top_k=args.top_k, alpha=0.65)
+        fresh[query] = [r["product_id"] for r in results]
+
+    # Nearest original for every probe (an original never matches itself)
+    matches = []
+    for query, origin, is_rewrite in probes:
+        sims = cached_vectors @ unit(query)
+        if not is_rewrite:
+            sims[origin] = -1.0
+        best = int(np.argmax(sims))
+        exact = is_rewrite and normalize_query(query) == normalize_query(originals[origin])
+        matches.append((best, 1.0 if exact else float(sims[best])))
+
+    print(f"\n{'threshold':>10s}{'rewrite hits':>14s}{'false hits':>12s}"
+          f"{'NDCG fresh':>12s}{'NDCG served':>13s}")
+    for threshold in args.thresholds:
+        hits = false_hits = 0
+        ndcg_fresh, ndcg_served = [], []
+        for (query, origin, is_rewrite), (best, sim) in zip(probes, matches):
+            truth = tests[origin]["ground_truth"]
+            served = fresh[query]
+            if sim >= threshold:
+                served = fresh[originals[best]]
+                hits += is_rewrite and best == origin
+                false_hits += best != origin
+            ndcg_fresh.append(ndcg_at_k(truth, fresh[query], args.top_k))
+            ndcg_served.append(ndcg_at_k(truth, served, args.top_k))
+
+        rewrite_count = sum(is_rewrite for _, _, is_rewrite in probes)
+        print(f"{threshold:10.2f}{hits / rewrite_count:14.3f}{false_hits:12d}"
+              f"{np.mean(ndcg_fresh):12.3f}{np.mean(ndcg_served):13.3f}")
+
+    # Closest pairs of distinct evaluation queries: the threshold must stay above these
+    sims = cached_vectors @ cached_vectors.T
+    np.fill_diagonal(sims, -1.0)
+    print("\nMost similar distinct evaluation queries:")
+    for flat in np.argsort(-sims, axis=None)[:6:2]:
+        i, j = np.unravel_index(flat, sims.shape)
+        print(f"  {sims[i, j]:.3f}  '{originals[i]}' ~ '{originals[j]}'")
+
+    print("\nLowest-similarity rewrites of each query:")
+    for (query, origin, is_rewrite), (best, sim) in zip(probes, matches):
+        if is_rewrite and sim < 0.9:
+            print(f"  {sim:.3f}  '{query}' -> '{originals[best]}'")
+
+
+if __name__ == "__main__":
+    main()
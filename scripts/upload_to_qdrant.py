@@ -1,12 +1,19 @@
+import sys
+import os
+sys.path.append(os.path.abspath("."))
+
 import polars as pl
 from qdrant_client import QdrantClient
 from qdrant_client.models import Distance, VectorParams, PointStruct
 from fastembed import TextEmbedding
 from tqdm import tqdm
 import json
-import os
 from dotenv import load_dotenv
 
+from models.text_analyzer import document_text
+from models.payload_store import PayloadStore
+from models.product_filter import create_payload_indexes, PAYLOAD_INDEXES
+
 load_dotenv()
 
 print("="*80)
@@ -50,6 +57,10 @@ qdrant.create_collection(
 )
 print(f"Collection '{collection_name}' created")
 
+# Payload indexes for filtered search (price, rating, reviews, brand, categories)
+create_payload_indexes(qdrant, collection_name)
+print(f"Payload indexes created: {', '.join(PAYLOAD_INDEXES)}")
+
 
 # Upload in batches
 batch_size = 200
@@ -57,6 +68,9 @@ total_batches = (df.height + batch_size - 1) // batch_size
 
 print(f"\nUploading {total_batches} batches")
 
+# Every payload, by point id, for the local payload store
+all_payloads = []
+
 
 def safe_float(x, default=0.0):
     try:
@@ -84,10 +98,9 @@ for batch_num in tqdm(range(total_batches), desc="Uploading batches"):
     texts = []
     for row in batch.iter_rows(named=True):
         title = str(row.get('title', ''))
-        summary = str(row.get('abstracted_summary', ''))
-        desc = str(row.get('description', ''))
-        
-        text = f"{title} {summary} {desc}".strip()
+
+        # Same product text as the BM25 index
+        text = document_text(row).strip()
         
         # Ensure non-empty
         if len(text) < 10:
@@ -135,9 +148,15 @@ for batch_num in tqdm(range(total_batches), desc="Uploading batches"):
     
     # Upload batch
     qdrant.upsert(collection_name=collection_name, points=points)
+    all_payloads.extend(point.payload for point in points)
 
 print("\nUpload complete!")
 
+# Local copy of the payloads: hybrid_search hydrates results without qdrant.retrieve
+print("\nSaving payload store")
+PayloadStore.from_payloads(all_payloads).save("cache/payload_store")
+print(f"Saved {len(all_payloads):,} payloads to cache/payload_store/")
+
 # Verify
 collection_info = qdrant.get_collection(collection_name)
 print("VERIFICATION")
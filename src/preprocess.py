@@ -1,16 +1,15 @@
-import re
+import os
+import sys
 import pandas as pd
 
+# Shared normalizer lives with the search index (models/text_analyzer.py)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from models.text_analyzer import normalize_text
+
 # CLEAN TEXT
 def clean_text(text):
-    if not isinstance(text, str):
-        return ""
-    text = text.lower()
-    text = re.sub(r'<.*?>', ' ', text)                           # remove HTML tags
-    text = re.sub(r'(http|https)://\S+', ' ', text)              # remove URLs
-    text = re.sub(r'[^a-z0-9\s]', ' ', text)                     # remove punctuation
-    text = re.sub(r'\s+', ' ', text).strip()                     # normalize spaces
-    return text
+    # lowercase, remove HTML tags / URLs / punctuation, normalize spaces
+    return normalize_text(text)
 
     
 # FLATTEN STYLE FIELD